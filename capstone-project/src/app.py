@@ -1,8 +1,68 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
 import base64
-from utils.helpers import process_dataframe_with_currency_conversion, remove_empty_entries
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from utils.bitmap import dashboard_index, take_rows
+from utils.cache import ByteLRUCache, evict_lru_paths
+from utils.cleaning import load_cleaning_rules
+from utils.cube import LoanCube
+from utils.ingest import load_processed
+from utils.merge import merge_sources
+from utils.profiling import StageRecorder, get_profile_mode
+from utils.render import box_outliers, box_stats, get_row_threshold
+from utils.schema import compact_frame, expand_frame, memory_saved
+from utils.scoring import rate_applicant, sweep_grid
+from utils.sql_cube import ParquetLoans, SqlLoanCube, get_sql_threshold, parquet_rows, use_sql_backend
+from utils.training_store import TrainingStore
+from utils.writers import FORMAT_EXTENSIONS, frame_chunks, get_writer, read_partitioned_parquet
+
+# Memory budget shared by all sessions for processed uploads (default 512 MB)
+UPLOAD_CACHE_MAX_BYTES = int(os.getenv('UPLOAD_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# Stage timings kept per session for the performance panel
+SESSION_METRICS_MAX_RECORDS = 200
+
+# Exports of uploads are written here once per content and format, then served from disk
+EXPORT_DIR = os.getenv('LOAN_EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'loan-exports'))
+
+# Part of the export file names, bump when the exported content changes
+EXPORT_VERSION = 2
+
+# Disk budget of the exports, the least recently downloaded ones are removed beyond it (default 2 GB)
+EXPORT_MAX_BYTES = int(os.getenv('LOAN_EXPORT_MAX_BYTES', 2 * 1024 ** 3))
+
+# Download formats: label -> (output format, mime type)
+DOWNLOAD_FORMATS = {"CSV": ('csv', "text/csv"), "CSV (gzip)": ('csv.gz', "application/gzip")}
+
+# Rows shown by the Raw Data view of a dataset queried in place
+RAW_PREVIEW_ROWS = 1000
+
+# How applicants found in several uploaded files are merged: label -> policy of merge_sources
+MERGE_POLICIES = {"Keep the first file's row": 'first', "Keep the last file's row": 'last',
+                  "Fill gaps from the other files": 'coalesce', "Stop on differing rows": 'error'}
+
+# Ranges of the what-if analysis factors and the grid points along each axis
+SWEEP_RANGES = {
+    'Age': (18, 100),
+    'Income': (0, 250000),
+    'Credit_Score': (300, 850),
+    'Debt_to_Income_Ratio': (0.0, 1.0),
+    'Loan_Amount': (0, 200000),
+}
+SWEEP_HEATMAP_POINTS = 100
+SWEEP_SLICE_POINTS = 50
+
+# Memory budget for cached what-if grids (a 100x100x50 grid takes 4 MB)
+SWEEP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Views of an uploaded file
+VIEWS = ["Raw Data", "Dashboard", "Risk Calculator"]
 
 # Update the custom color scheme
 COLOR_PALETTE = {
@@ -13,9 +73,8 @@ COLOR_PALETTE = {
     'text': '#FFFFFF'        # White text
 }
 
-# Update the custom CSS
-st.markdown(
-    """
+# Custom CSS, injected by apply_style on every run
+APP_STYLE = """
     <style>
     /* Main app background and text */
     .stApp {
@@ -52,20 +111,17 @@ st.markdown(
         border: 1px solid #FF6B00;
     }
 
-    /* Tabs */
-    .stTabs [data-baseweb="tab-list"] {
+    /* View selector */
+    .stRadio [role="radiogroup"] {
         background-color: #2D2D2D;
         border-radius: 4px;
+        padding: 0.5rem;
     }
 
-    .stTabs [data-baseweb="tab"] {
+    .stRadio [role="radiogroup"] label {
         color: white;
     }
 
-    .stTabs [data-baseweb="tab-highlight"] {
-        background-color: #FF6B00;
-    }
-
     /* Metrics */
     [data-testid="stMetricValue"] {
         color: #FF6B00;
@@ -103,9 +159,10 @@ st.markdown(
         border-radius: 5px;
     }
     </style>
-    """,
-    unsafe_allow_html=True
-)
+    """
+
+def apply_style():
+    st.markdown(APP_STYLE, unsafe_allow_html=True)
 
 # Update the logo generation
 def generate_logo():
@@ -117,65 +174,144 @@ def generate_logo():
     """
     return st.markdown(logo, unsafe_allow_html=True)
 
-def create_dashboard(df):
+@st.cache_resource(max_entries=8)
+def build_cube(df):
+    """Pre-aggregated cube of the dashboard metrics, built once per dataset"""
+    return LoanCube(df)
+
+@st.cache_resource(max_entries=8)
+def build_index(df):
+    """Bitmap index of the dashboard filters, built once per dataset"""
+    return dashboard_index(df)
+
+def box_figure(df, x, y, title, threshold=None):
+    """
+    Box plot of y by x that stays light for large selections.
+
+    Up to the row threshold every row is sent to plotly as before. Above it the
+    quartiles and whiskers are computed here, so only one summary per group
+    reaches the browser, and a sample of the outliers is drawn as a WebGL trace.
+    """
+    import plotly.express as px
+
+    threshold = get_row_threshold(threshold)
+    if len(df) <= threshold:
+        return px.box(df, x=x, y=y, title=title)
+
+    stats = box_stats(df, x, y)
+    return summary_box_figure(stats, box_outliers(df, x, y, stats, threshold), x, y, title)
+
+def summary_box_figure(stats, outliers, x, y, title):
+    """Box plot drawn from precomputed box statistics and a sample of the outliers"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Box(
+        x=stats[x], q1=stats['q1'], median=stats['median'], q3=stats['q3'],
+        lowerfence=stats['lowerfence'], upperfence=stats['upperfence'],
+        name=y, boxpoints=False, showlegend=False
+    ))
+    fig.add_trace(go.Scattergl(
+        x=outliers[x], y=outliers[y], mode='markers', marker_size=4, showlegend=False
+    ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
+
+def filter_state_values(cube, filters):
+    """
+    Values derived from the current filter state, shared by every figure.
+
+    The memo lives in the session and is reset when the data or the filters
+    change, so intermediates like the correlation matrix are computed once.
+    """
+    memo = st.session_state.get('dashboard_memo')
+    if memo is None or memo['cube'] is not cube or memo['filters'] != filters:
+        memo = {'cube': cube, 'filters': filters, 'values': {}}
+        st.session_state['dashboard_memo'] = memo
+    return memo['values']
+
+def memoized(values, name, compute):
+    """Returns values[name], computing it on first use"""
+    if name not in values:
+        values[name] = compute()
+    return values[name]
+
+def create_dashboard(df, cube=None, index=None, dataset=None):
+    """
+    Renders the dashboard of df, or of a ParquetLoans dataset queried with SQL
+    when df is None, in which case cube must be its SqlLoanCube
+    """
+    # Loaded with the first chart, views without charts never import plotly
+    import plotly.express as px
+
     st.subheader("Interactive Dashboard")
+    if cube is None:
+        cube = build_cube(df)
+    if index is None and dataset is None:
+        index = build_index(df)
     
     # Sidebar filters
     st.sidebar.header("Filters")
     
-    # Get unique values for filtering
-    age_ranges = pd.cut(df['Age'], bins=[0, 25, 35, 45, 55, 100], 
-                       labels=['18-25', '26-35', '36-45', '46-55', '55+'])
-    
     # Filter selectors
     selected_age = st.sidebar.multiselect(
         "Select Age Range",
-        options=age_ranges.unique()
+        options=cube.options['Age_Band']
     )
     
     selected_education = st.sidebar.multiselect(
         "Select Education Level",
-        options=df['Education_Level'].unique()
+        options=cube.options['Education_Level']
     )
     
     # Add loan purpose filter to sidebar
     selected_purpose = st.sidebar.multiselect(
         "Select Loan Purpose",
-        options=df['Loan_Purpose'].unique()
+        options=cube.options['Loan_Purpose']
     )
     
-    # Apply filters
-    mask = pd.Series(True, index=df.index)
-    if selected_age:
-        mask &= age_ranges.isin(selected_age)
-    if selected_education:
-        mask &= df['Education_Level'].isin(selected_education)
-    if selected_purpose:
-        mask &= df['Loan_Purpose'].isin(selected_purpose)
+    # Aggregates come from the cube cells matching the filters
+    values = filter_state_values(cube, (tuple(selected_age), tuple(selected_education), tuple(selected_purpose)))
+    cells = memoized(values, 'cells', lambda: cube.select(selected_age, selected_education, selected_purpose))
+    
+    filters = {'Age_Band': selected_age, 'Education_Level': selected_education, 'Loan_Purpose': selected_purpose}
+    
+    # The box plots still need the individual rows, resolved from the bitmap index
+    if dataset is None:
+        positions = memoized(values, 'rows', lambda: index.positions(index.select(filters)))
     
-    filtered_df = df[mask]
+    def filtered_rows(columns):
+        # Only the columns a figure uses are gathered, once per filter state
+        return memoized(values, ('rows', tuple(columns)), lambda: take_rows(df, positions, list(columns)))
+    
+    def filtered_box(x, y, title):
+        if dataset is None:
+            return box_figure(filtered_rows([x, y]), x=x, y=y, title=title)
+        # Summaries computed by SQL, the rows never leave the Parquet files
+        stats = memoized(values, ('box', x, y), lambda: dataset.box_stats(x, y, filters))
+        outliers = memoized(values, ('outliers', x, y),
+                            lambda: dataset.box_outliers(x, y, stats, get_row_threshold(), filters))
+        return summary_box_figure(stats, outliers, x, y, title)
     
     # Display metrics
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Average Loan Amount", f"${filtered_df['Loan_Amount'].mean():,.2f}")
+        st.metric("Average Loan Amount", f"${cube.mean(cells, 'Loan_Amount'):,.2f}")
     with col2:
-        st.metric("Average Income", f"${filtered_df['Income'].mean():,.2f}")
+        st.metric("Average Income", f"${cube.mean(cells, 'Income'):,.2f}")
     with col3:
-        st.metric("Total Applications", len(filtered_df))
+        st.metric("Total Applications", cube.count(cells))
     
     # Create visualizations
     col1, col2 = st.columns(2)
     
     with col1:
         # Loan Amount by Education Level
-        fig1 = px.box(filtered_df, x='Education_Level', y='Loan_Amount',
-                     title='Loan Amount Distribution by Education Level')
+        fig1 = filtered_box('Education_Level', 'Loan_Amount', title='Loan Amount Distribution by Education Level')
         st.plotly_chart(fig1)
     
     with col2:
         # Average Income by Education Level
-        avg_income = filtered_df.groupby('Education_Level')['Income'].mean().reset_index()
+        avg_income = memoized(values, 'avg_income', lambda: cube.group_mean(cells, 'Education_Level', 'Income'))
         fig2 = px.bar(avg_income, x='Education_Level', y='Income',
                       title='Average Income by Education Level')
         st.plotly_chart(fig2)
@@ -186,14 +322,16 @@ def create_dashboard(df):
     
     with col3:
         # Risk Rating Distribution
-        fig4 = px.histogram(filtered_df, x='Risk Rating', 
-                          title='Risk Rating Distribution',
-                          color='Education_Level')
+        risk_counts = memoized(values, 'risk_counts',
+                               lambda: cube.group_count(cells, ['Risk Rating', 'Education_Level']))
+        fig4 = px.bar(risk_counts, x='Risk Rating', y='count',
+                      title='Risk Rating Distribution',
+                      color='Education_Level')
         st.plotly_chart(fig4)
     
     with col4:
         # Average Loan Amount by Risk Rating
-        risk_loan = filtered_df.groupby('Risk Rating')['Loan_Amount'].mean().reset_index()
+        risk_loan = memoized(values, 'risk_loan', lambda: cube.group_mean(cells, 'Risk Rating', 'Loan_Amount'))
         fig5 = px.bar(risk_loan, x='Risk Rating', y='Loan_Amount',
                       title='Average Loan Amount by Risk Rating')
         st.plotly_chart(fig5)
@@ -204,10 +342,12 @@ def create_dashboard(df):
     # Select numerical columns for correlation analysis
     numeric_cols = ['Age', 'Income', 'Credit_Score', 'Debt_to_Income_Ratio', 
                     'Loan_Amount', 'Risk Rating']
-    correlation_df = filtered_df[numeric_cols]
     
-    # Create correlation matrix
-    correlation = correlation_df.corr()
+    # Correlation matrix of every measure, computed once per filter state.
+    # cube.corr always uses the rows where every measure is present, so a
+    # slice of the full matrix equals the matrix of the sliced columns.
+    measure_correlation = memoized(values, 'corr', lambda: cube.corr(cells))
+    correlation = measure_correlation.loc[numeric_cols, numeric_cols]
     
     # Plot correlation heatmap
     fig6 = px.imshow(
@@ -233,20 +373,25 @@ def create_dashboard(df):
     risk_metrics_cols = st.columns(3)
     
     with risk_metrics_cols[0]:
-        avg_risk = filtered_df['Risk Rating'].mean()
+        avg_risk = cube.mean(cells, 'Risk Rating')
         st.metric("Average Risk Rating", f"{avg_risk:.2f}")
     
     with risk_metrics_cols[1]:
-        high_risk = len(filtered_df[filtered_df['Risk Rating'] >= 7])
+        high_risk = cube.count_where(cells, 'Risk Rating', lambda rating: rating >= 7)
         st.metric("High Risk Applications", high_risk)
     
     with risk_metrics_cols[2]:
-        low_risk = len(filtered_df[filtered_df['Risk Rating'] <= 3])
+        low_risk = cube.count_where(cells, 'Risk Rating', lambda rating: rating <= 3)
         st.metric("Low Risk Applications", low_risk)
     
     # Correlation heatmap
-    numeric_cols = filtered_df.select_dtypes(include=['float64', 'int64']).columns
-    correlation = filtered_df[numeric_cols].corr()
+    numeric_cols = df.select_dtypes(include='number').columns if dataset is None else dataset.numeric_columns
+    if set(numeric_cols) <= set(cube.measures):
+        correlation = measure_correlation.loc[numeric_cols, numeric_cols]
+    elif dataset is None:
+        correlation = memoized(values, 'row_corr', lambda: filtered_rows(numeric_cols).corr())
+    else:
+        correlation = memoized(values, 'row_corr', lambda: dataset.corr(numeric_cols, filters))
     fig3 = px.imshow(correlation, title='Correlation Matrix')
     st.plotly_chart(fig3)
 
@@ -256,7 +401,8 @@ def create_dashboard(df):
     
     with col5:
         # Average loan amount by purpose
-        purpose_loan = filtered_df.groupby('Loan_Purpose')['Loan_Amount'].mean().reset_index()
+        purpose_loan = memoized(values, 'purpose_loan',
+                                lambda: cube.group_mean(cells, 'Loan_Purpose', 'Loan_Amount'))
         fig7 = px.bar(purpose_loan, 
                       x='Loan_Purpose', 
                       y='Loan_Amount',
@@ -266,10 +412,7 @@ def create_dashboard(df):
     
     with col6:
         # Risk rating distribution by loan purpose
-        fig8 = px.box(filtered_df, 
-                      x='Loan_Purpose', 
-                      y='Risk Rating',
-                      title='Risk Rating Distribution by Loan Purpose')
+        fig8 = filtered_box('Loan_Purpose', 'Risk Rating', title='Risk Rating Distribution by Loan Purpose')
         fig8.update_layout(xaxis_tickangle=-45)
         st.plotly_chart(fig8)
     
@@ -278,7 +421,7 @@ def create_dashboard(df):
     purpose_metrics = st.columns(3)
     
     with purpose_metrics[0]:
-        most_common = filtered_df['Loan_Purpose'].mode()[0]
+        most_common = cube.mode(cells, 'Loan_Purpose')
         st.metric("Most Common Purpose", most_common)
     
     with purpose_metrics[1]:
@@ -321,6 +464,8 @@ def create_dashboard(df):
 
 def create_risk_heatmap(data):
     """Create risk analysis heatmap with proper colorscale"""
+    import plotly.express as px
+
     
     # Define proper colorscale format
     colorscale = [
@@ -360,50 +505,43 @@ def create_risk_heatmap(data):
 
     return fig
 
+def get_session_recorder():
+    """Stage metrics of the current session"""
+    if 'stage_recorder' not in st.session_state:
+        st.session_state['stage_recorder'] = StageRecorder(profile=get_profile_mode(),
+                                                           max_records=SESSION_METRICS_MAX_RECORDS)
+    return st.session_state['stage_recorder']
+
+def performance_panel():
+    """Sidebar panel with the stage timings of the current session"""
+    recorder = get_session_recorder()
+    with st.sidebar.expander("Performance"):
+        if not recorder.records:
+            st.write("No stages timed yet")
+            return
+        summary = recorder.summary()
+        summary['peak_rss_mb'] = summary['peak_rss_bytes'] / 2 ** 20
+        st.dataframe(summary.drop(columns=['peak_rss_bytes']), hide_index=True)
+        last = recorder.records[-1]
+        st.caption(f"Last stage: {last['stage']} in {last['seconds'] * 1000:.1f} ms")
+
+@st.cache_resource
+def get_training_store():
+    """Training data and model parameters, loaded once and shared by all sessions"""
+    return TrainingStore()
+
 def calculate_risk_rating(age, income, credit_score, dti_ratio, education_level, loan_purpose, loan_amount):
     """Calculate risk rating based on input parameters using both datasets for training"""
-    try:
-        # Load and process training data
-        df1 = pd.read_excel("C:\Dev\Training\Week3_FinalExercise\group1\group1\input\Dataset1.xlsx")
-        df2 = pd.read_excel("C:\Dev\Training\Week3_FinalExercise\group1\group1\input\Dataset1.xlsx")
-        
-        # Validate DTI ratio is between 0 and 1
-        if not (0 <= dti_ratio <= 1):
-            raise ValueError("Debt to Income ratio must be between 0 and 1")
-
-        # Calculate risk weights based on correlation analysis
-        weights = {
-            'Credit_Score': 0.3,    # Higher credit score = lower risk
-            'DTI': 0.25,           # Higher DTI = higher risk
-            'Income': 0.2,         # Higher income = lower risk
-            'Loan_Amount': 0.15,   # Higher loan amount = higher risk
-            'Age': 0.1             # Age has less impact
-        }
-        
-        # Normalize and score each factor
-        credit_score_norm = (credit_score - 300) / (850 - 300)  # Credit score range: 300-850
-        dti_score = dti_ratio                                    # DTI already in 0-1 range
-        income_norm = min(income / 200000, 1)                   # Cap income at 200k
-        loan_amount_norm = min(loan_amount / 150000, 1)         # Cap loan at 150k
-        age_norm = min(age / 100, 1)                           # Cap age at 100
-        
-        # Calculate risk score (0 = lowest risk, 1 = highest risk)
-        risk_score = (
-            weights['Credit_Score'] * (1 - credit_score_norm) +  # Invert credit score
-            weights['DTI'] * dti_score +
-            weights['Income'] * (1 - income_norm) +              # Invert income
-            weights['Loan_Amount'] * loan_amount_norm +
-            weights['Age'] * (1 - age_norm)                      # Invert age
-        )
-        
-        # Convert to 0-2 scale matching the training data
-        final_risk_rating = round(risk_score * 2)
-        
-        return min(max(final_risk_rating, 0), 2)  # Ensure output is 0, 1, or 2
-        
-    except Exception as e:
-        st.error(f"Error calculating risk rating: {str(e)}")
-        return None
+    with get_session_recorder().stage('score', rows_in=1):
+        try:
+            # Model parameters come from the shared store, reloaded only when the datasets change
+            params = get_training_store().params()
+            return rate_applicant(age, income, credit_score, dti_ratio, education_level, loan_purpose,
+                                  loan_amount, params)
+
+        except Exception as e:
+            st.error(f"Error calculating risk rating: {str(e)}")
+            return None
 
 def risk_calculator_tab():
     """Risk calculator interface"""
@@ -466,6 +604,71 @@ def risk_calculator_tab():
                 unsafe_allow_html=True
             )
 
+    what_if_analysis({
+        'Age': age, 'Income': income, 'Credit_Score': credit_score, 'Debt_to_Income_Ratio': dti_ratio,
+        'Loan_Amount': loan_amount, 'Education_Level': education_level, 'Loan_Purpose': loan_purpose,
+    })
+
+@st.cache_resource
+def get_sweep_cache():
+    """What-if grids shared by all sessions, keyed by their inputs and the model"""
+    return ByteLRUCache(SWEEP_CACHE_MAX_BYTES)
+
+def sweep_axes(axes):
+    """Grid values of each swept factor: heatmap axes first, then the slider axis"""
+    return {factor: np.linspace(*SWEEP_RANGES[factor], SWEEP_HEATMAP_POINTS if i < 2 else SWEEP_SLICE_POINTS)
+            for i, factor in enumerate(axes)}
+
+def sweep_params_key(params):
+    """Identifies the formula weights or trained model a grid was scored with"""
+    if params['model'] is None:
+        return repr((sorted(params['weights'].items()), sorted(params['normalisation'].items())))
+    return hashlib.sha256(json.dumps(params['model'].to_dict(), sort_keys=True).encode('utf-8')).hexdigest()
+
+def risk_sweep(base, axes):
+    """Ratings over the what-if grid, computed in one call and cached per input set"""
+    params = get_training_store().params()
+    fixed = tuple(sorted((factor, value) for factor, value in base.items() if factor not in axes))
+    key = (sweep_params_key(params), fixed, tuple(axes))
+    cache = get_sweep_cache()
+    ratings = cache.get(key)
+    if ratings is None:
+        grid = sweep_axes(axes)
+        with get_session_recorder().stage('sweep') as stage:
+            ratings = sweep_grid(base, grid, params, params['model'])
+            stage['rows_out'] = ratings.size
+        cache.put(key, ratings, ratings.nbytes)
+    return ratings
+
+def what_if_analysis(base):
+    """Heatmap of the rating over two factors, optionally sliced along a third"""
+    st.subheader("What-if Analysis")
+    factors = list(SWEEP_RANGES)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        x_factor = st.selectbox("Horizontal axis", factors, index=factors.index('Credit_Score'))
+    with col2:
+        y_options = [factor for factor in factors if factor != x_factor]
+        y_default = 'Debt_to_Income_Ratio' if 'Debt_to_Income_Ratio' in y_options else y_options[0]
+        y_factor = st.selectbox("Vertical axis", y_options, index=y_options.index(y_default))
+    with col3:
+        slice_options = ["None"] + [factor for factor in factors if factor not in (x_factor, y_factor)]
+        slice_default = 'Loan_Amount' if 'Loan_Amount' in slice_options else "None"
+        slice_factor = st.selectbox("Slider", slice_options, index=slice_options.index(slice_default))
+
+    axes = [y_factor, x_factor] + ([slice_factor] if slice_factor != "None" else [])
+    grid = sweep_axes(axes)
+    ratings = risk_sweep(base, axes)
+    if slice_factor != "None":
+        # Every slice is already computed, moving the slider only picks one
+        labels = [f"{value:,.2f}" for value in grid[slice_factor]]
+        ratings = ratings[:, :, labels.index(st.select_slider(slice_factor, options=labels))]
+
+    # Ratings 0-2 are scaled to the heatmap's 0-1 risk level
+    data = pd.DataFrame(ratings / 2, index=pd.Index(grid[y_factor].round(2), name=y_factor),
+                        columns=pd.Index(grid[x_factor].round(2), name=x_factor))
+    st.plotly_chart(create_risk_heatmap(data))
+
 def risk_rating_description(rating):
     """Return description based on 0-2 scale"""
     if rating == 0:
@@ -475,7 +678,185 @@ def risk_rating_description(rating):
     else:
         return "High Risk"
 
+@st.cache_resource
+def get_upload_cache():
+    """Processed uploads shared by all sessions, keyed by file content hash"""
+    return ByteLRUCache(UPLOAD_CACHE_MAX_BYTES)
+
+def upload_key(uploaded_file):
+    """Content hash of an uploaded file, computed only once per session"""
+    keys = st.session_state.setdefault('upload_keys', {})
+    if uploaded_file.file_id not in keys:
+        keys[uploaded_file.file_id] = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    return keys[uploaded_file.file_id]
+
+def load_upload(uploaded_file):
+    """Process an uploaded workbook once and reuse the result on every rerun"""
+    key = upload_key(uploaded_file)
+
+    cache = get_upload_cache()
+    entry = cache.get(key)
+    if entry is None:
+        # Read and process the data in chunks
+        processed_df = load_processed(io.BytesIO(uploaded_file.getvalue()), file_type='xlsx',
+                                      recorder=get_session_recorder(), rules=load_cleaning_rules())
+        # Keep the compact typed frame (categoricals, small numeric types) in memory
+        processed_df, schema_report = compact_frame(processed_df)
+        entry = {'df': processed_df, 'memory': memory_saved(schema_report)}
+        cache.put(key, entry, int(processed_df.memory_usage(deep=True).sum()))
+    return dict(entry, key=key)
+
+def merge_uploads(uploaded_files, policy):
+    """
+    Processed data of several uploaded workbooks, with each applicant kept once
+    (see merge_sources) and the file each row was kept from in a Source column
+    """
+    uploads = [load_upload(uploaded_file) for uploaded_file in uploaded_files]
+    key = hashlib.sha256(json.dumps([upload['key'] for upload in uploads] + [policy]).encode()).hexdigest()
+
+    cache = get_upload_cache()
+    entry = cache.get(key)
+    if entry is None:
+        with get_session_recorder().stage('merge', rows_in=sum(len(upload['df']) for upload in uploads)) as stage:
+            merged_df, report = merge_sources([upload['df'] for upload in uploads],
+                                              names=[uploaded_file.name for uploaded_file in uploaded_files],
+                                              policy=policy, source_column='Source')
+            stage['rows_out'] = len(merged_df)
+        # Categories differ between files, so compact the merged frame again
+        merged_df, schema_report = compact_frame(merged_df)
+        entry = {'df': merged_df, 'memory': memory_saved(schema_report), 'merge': report}
+        cache.put(key, entry, int(merged_df.memory_usage(deep=True).sum()))
+    return dict(entry, key=key)
+
+def upload_derived(upload, name, build, size, stage_name):
+    """
+    Value derived from an upload (CSV export, cube), built the first time a view
+    needs it and cached alongside the processed data.
+    """
+    cache = get_upload_cache()
+    value = cache.get((upload['key'], name))
+    if value is None:
+        with get_session_recorder().stage(stage_name, rows_in=len(upload['df'])):
+            value = build(upload['df'])
+        cache.put((upload['key'], name), value, int(size(value)))
+    return value
+
+def upload_export(upload, output_format):
+    """
+    Export file of an upload, written chunk by chunk to disk the first time it
+    is downloaded instead of being built as one string in memory. Exports are
+    kept in EXPORT_DIR up to EXPORT_MAX_BYTES, least recently used first out.
+    See export_download for how the file reaches the browser
+    """
+    path = os.path.join(EXPORT_DIR, f"{upload['key']}-v{EXPORT_VERSION}{FORMAT_EXTENSIONS[output_format]}")
+    try:
+        # Mark the export as recently used
+        os.utime(path)
+        return path
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    # Write under a temporary name so other sessions never serve a partial file
+    fd, partial_path = tempfile.mkstemp(dir=EXPORT_DIR, suffix='.tmp')
+    os.close(fd)
+    if output_format == 'parquet':
+        # A partitioned dataset is a folder, created by the writer
+        os.remove(partial_path)
+    with get_session_recorder().stage('export', rows_in=len(upload['df'])) as stage:
+        # Written with the pipeline's types, not the compact in-memory ones
+        chunks = (expand_frame(chunk) for chunk in frame_chunks(upload['df']))
+        stage['rows_out'] = get_writer(output_format)(chunks, partial_path)
+    try:
+        os.replace(partial_path, path)
+    except OSError:
+        # Another session already moved the same dataset folder in place
+        shutil.rmtree(partial_path, ignore_errors=True)
+    evict_lru_paths(EXPORT_DIR, EXPORT_MAX_BYTES, keep=path)
+    return path
+
+def export_download(upload, download_format):
+    """
+    Download button of an upload's export, shown only after an explicit request.
+
+    st.download_button (Streamlit 1.29) reads the whole file into memory every
+    time the script reruns while the button is shown. The file is therefore
+    only read after "Prepare download" and the button is removed again once
+    clicked, so a session holds the export in memory between those two clicks
+    only. Static file serving is not an option: it refuses files over 200 MB
+    """
+    output_format, mime = DOWNLOAD_FORMATS[download_format]
+    request = (upload['key'], output_format)
+    if st.session_state.get('export_downloaded'):
+        # Streamlit keeps a served download for one more run, it no longer needs the button
+        st.session_state.pop('export_request', None)
+    if st.session_state.get('export_request') != request:
+        if not st.button(f"Prepare download as {download_format}"):
+            return
+        st.session_state['export_request'] = request
+
+    with open(upload_export(upload, output_format), 'rb') as export_file:
+        st.download_button(
+            label=f"Download processed data as {download_format}",
+            data=export_file,
+            file_name=f"processed_data{FORMAT_EXTENSIONS[output_format]}",
+            mime=mime,
+            key='export_downloaded'
+        )
+
+@st.cache_resource(max_entries=4)
+def open_parquet(path, version):
+    """DuckDB view of a Parquet dataset and its SQL cube, built once per version of the data"""
+    with get_session_recorder().stage('aggregate') as stage:
+        dataset = ParquetLoans(path)
+        cube = SqlLoanCube(dataset)
+        stage['rows_out'] = dataset.rows
+    return dataset, cube
+
+def upload_sql(upload):
+    """
+    DuckDB dataset and cube of data too large for the pandas aggregations
+    (LOAN_SQL_MIN_ROWS), queried from its Parquet export, or None
+    """
+    if upload['df'] is None:
+        return upload['sql']
+    if not use_sql_backend(len(upload['df'])):
+        return None
+    return open_parquet(upload_export(upload, 'parquet'), upload['key'])
+
+def load_dataset(path):
+    """
+    Processed Parquet dataset configured with LOAN_DATASET_PATH. Above the SQL
+    threshold it is only queried in place, otherwise it is loaded like an upload.
+    """
+    version = os.stat(path).st_mtime_ns
+    key = hashlib.sha256(f"{os.path.abspath(path)}|{version}".encode()).hexdigest()
+    rows = parquet_rows(path)
+    if use_sql_backend(rows):
+        return {'df': None, 'sql': open_parquet(path, version), 'key': key}
+    if rows > get_sql_threshold():
+        st.warning(f"{rows:,} rows are loaded in memory, install duckdb to query them in place instead")
+
+    cache = get_upload_cache()
+    entry = cache.get(key)
+    if entry is None:
+        processed_df, schema_report = compact_frame(read_partitioned_parquet(path))
+        entry = {'df': processed_df, 'memory': memory_saved(schema_report)}
+        cache.put(key, entry, int(processed_df.memory_usage(deep=True).sum()))
+    return dict(entry, key=key)
+
+def upload_cube(upload):
+    """Dashboard cube of an upload"""
+    return upload_derived(upload, 'cube', LoanCube, lambda cube: cube.cells.memory_usage(deep=True).sum(),
+                          'aggregate')
+
+def upload_index(upload):
+    """Dashboard filter index of an upload"""
+    return upload_derived(upload, 'index', dashboard_index, lambda index: index.nbytes, 'index')
+
 def main():
+    apply_style()
+
     # Display logo
     generate_logo()
     
@@ -483,35 +864,60 @@ def main():
     st.write("Upload your loan data for comprehensive analysis")
 
     # File uploader
-    uploaded_file = st.file_uploader("Choose an Excel file", type=['xlsx'])
+    uploaded_files = st.file_uploader("Choose Excel files", type=['xlsx'], accept_multiple_files=True)
 
-    if uploaded_file is not None:
+    dataset_path = os.getenv('LOAN_DATASET_PATH')
+
+    if uploaded_files or dataset_path:
         try:
-            # Read and process the data
-            df = pd.read_excel(uploaded_file)
-            df = remove_empty_entries(df)
-            processed_df = process_dataframe_with_currency_conversion(df)
+            # Processing is cached by file content, reruns skip ingestion
+            if not uploaded_files:
+                upload = load_dataset(dataset_path)
+            elif len(uploaded_files) == 1:
+                upload = load_upload(uploaded_files[0])
+            else:
+                policy = st.selectbox("Applicants found in several files", list(MERGE_POLICIES))
+                upload = merge_uploads(uploaded_files, MERGE_POLICIES[policy])
+                report = upload['merge']
+                st.caption(f"Merged {len(uploaded_files)} files: {report['rows_in']} rows, "
+                           f"{report['rows_in'] - report['rows_out']} duplicates removed, "
+                           f"{report['conflicts']} applicants with differing rows")
+            processed_df = upload['df']
+            
+            # Only the selected view is computed, unlike st.tabs which runs every tab
+            view = st.radio("View", VIEWS, horizontal=True, label_visibility="collapsed", key="view")
             
-            # Tabs for different views
-            tab1, tab2, tab3 = st.tabs(["Raw Data", "Dashboard", "Risk Calculator"])
+            if view == "Raw Data" and processed_df is None:
+                dataset = upload['sql'][0]
+                st.subheader("Processed Data")
+                st.dataframe(dataset.head(RAW_PREVIEW_ROWS))
+                st.caption(f"First {min(RAW_PREVIEW_ROWS, dataset.rows):,} of {dataset.rows:,} rows "
+                           f"of {dataset.path}, queried in place with DuckDB")
             
-            with tab1:
+            elif view == "Raw Data":
                 st.subheader("Processed Data")
                 st.dataframe(processed_df)
+                before, after, factor = upload['memory']
+                st.caption(f"In memory: {after / 2 ** 20:.1f} MB with compact types "
+                           f"({before / 2 ** 20:.1f} MB before, {factor:.1f}x smaller)")
                 
-                # Download button
-                csv = processed_df.to_csv(index=False)
-                st.download_button(
-                    label="Download processed data as CSV",
-                    data=csv,
-                    file_name="processed_data.csv",
-                    mime="text/csv"
-                )
+                # Download button, served from the export file
+                download_format = st.selectbox("Download format", list(DOWNLOAD_FORMATS))
+                export_download(upload, download_format)
             
-            with tab2:
-                create_dashboard(processed_df)
+            elif view == "Dashboard":
+                sql = upload_sql(upload)
+                if sql is not None:
+                    # Aggregated with SQL over Parquet instead of pandas
+                    dataset, cube = sql
+                    with get_session_recorder().stage('render', rows_in=dataset.rows):
+                        create_dashboard(None, cube, dataset=dataset)
+                else:
+                    cube = upload_cube(upload)
+                    with get_session_recorder().stage('render', rows_in=len(processed_df)):
+                        create_dashboard(processed_df, cube, upload_index(upload))
                 
-            with tab3:
+            else:
                 risk_calculator_tab()
 
         except Exception as e:
@@ -520,5 +926,8 @@ def main():
         # Show only risk calculator if no file is uploaded
         risk_calculator_tab()
 
+    # Rendered last so it includes the stages of this run
+    performance_panel()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
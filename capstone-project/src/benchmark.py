@@ -0,0 +1,47 @@
+import argparse
+import sys
+from utils.benchmark import DEFAULT_BASELINE_PATH, SIZES, compare, load_baseline, run_benchmarks, save_baseline
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the pipeline and dashboard on synthetic loan data.")
+    parser.add_argument("--sizes", nargs="+", default=['10k'],
+                        help=f"Row counts to run, e.g. {' '.join(SIZES)} or 50000 (default: 10k)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, the fastest is kept")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Stored baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.repeat)
+    baseline = load_baseline(args.baseline)
+
+    regressions = []
+    if baseline is None:
+        print(f"No baseline found at {args.baseline}")
+    else:
+        missing = [label for label in results if label not in baseline.get('results', {})]
+        if missing:
+            print(f"No baseline for {', '.join(missing)} in {args.baseline}, save one with --save-baseline")
+    comparison = {(row['size'], row['case']): row for row in compare(results, baseline or {}, args.threshold)}
+    for label, cases in results.items():
+        print(f"\n{label} rows")
+        for case, seconds in cases.items():
+            row = comparison.get((label, case))
+            line = f"  {case:<24} {seconds * 1000:10.1f} ms"
+            if row is not None:
+                line += f"  baseline {row['baseline'] * 1000:10.1f} ms  x{row['ratio']:.2f}"
+                if row['regression']:
+                    line += "  REGRESSION"
+                    regressions.append(row)
+            print(line)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"\nBaseline saved to: {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,25 @@
 import os
 from dotenv import load_dotenv
 
+# Project folders, the input/output data lives next to the capstone-project folder
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REPO_DIR = os.path.dirname(PROJECT_DIR)
+
+# Workbooks used to train the risk rating calculator
+TRAINING_FILES = ['Dataset1.xlsx', 'Dataset2.xlsx']
+
 def load_env():
     load_dotenv()
     print("Environment variables loaded.")
+
+def get_input_dir():
+    """Returns the input data directory, overridable with LOAN_INPUT_DIR."""
+    return os.getenv('LOAN_INPUT_DIR', os.path.join(REPO_DIR, 'input'))
+
+def get_output_dir():
+    """Returns the output data directory, overridable with LOAN_OUTPUT_DIR."""
+    return os.getenv('LOAN_OUTPUT_DIR', os.path.join(REPO_DIR, 'output'))
+
+def get_training_files():
+    """Returns the paths of the training workbooks."""
+    return [os.path.join(get_input_dir(), name) for name in TRAINING_FILES]
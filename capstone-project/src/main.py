@@ -1,15 +1,25 @@
+import argparse
+import functools
 import os
-import pandas as pd
-from config.settings import load_env
-from utils.helpers import read_excel_with_ids, remove_empty_entries, process_dataframe_with_currency_conversion, convert_to_usd
+import time
+from config.settings import get_input_dir, get_output_dir, load_env
+from utils.helpers import remove_empty_entries
+from utils.ingest import DEFAULT_CHUNKSIZE, stream_pipeline
+from utils.cache import get_cache_dir, read_excel_with_ids_cached
+from utils.cleaning import load_cleaning_rules
+from utils.incremental import run_incremental
+from utils.merge import CONFLICT_POLICIES, deduplicating
+from utils.profiling import PROFILE_MODES, StageRecorder, get_metrics_path, get_profile_mode
+from utils.runner import run_pipeline
+from utils.writers import FORMAT_EXTENSIONS, WRITERS, get_writer, output_stem
 
 def test_read_excel_with_ids():
     """
     Test the read_excel_with_ids function by providing a sample Excel file path.
     """
-    sample_file_path = "C:\Dev\Training\Week3_FinalExercise\group1\group1\input\Dataset1.xlsx"  # Replace with your actual file path
+    sample_file_path = os.path.join(get_input_dir(), "Dataset1.xlsx")
     if os.path.exists(sample_file_path):
-        df = read_excel_with_ids(sample_file_path)
+        df = read_excel_with_ids_cached(sample_file_path)
         print(df.head())
     else:
         print(f"File {sample_file_path} does not exist.")
@@ -18,9 +28,9 @@ def test_remove_empty_entries():
     """
     Test the remove_empty_entries function by providing a sample DataFrame.
     """
-    sample_file_path = "C:\Dev\Training\Week3_FinalExercise\group1\group1\input\Dataset1.xlsx"  # Replace with your actual file path
+    sample_file_path = os.path.join(get_input_dir(), "Dataset1.xlsx")
     if os.path.exists(sample_file_path):
-        df = read_excel_with_ids(sample_file_path)
+        df = read_excel_with_ids_cached(sample_file_path)
         print("Original DataFrame:")
         print(df)
 
@@ -35,38 +45,148 @@ def test_process_dataframe_with_currency_conversion():
     """
     Test the process_dataframe_with_currency_conversion function and export results to CSV.
     """
-    sample_file_path = "C:\Dev\Training\Week3_FinalExercise\group1\group1\input\Dataset1.xlsx"
-    output_dir = "C:\Dev\Training\Week3_FinalExercise\group1\group1\output"
+    sample_file_path = os.path.join(get_input_dir(), "Dataset1.xlsx")
+    output_dir = get_output_dir()
     
     # Create output directory if it doesn't exist
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
         
     if os.path.exists(sample_file_path):
-        df = read_excel_with_ids(sample_file_path)
-        df = remove_empty_entries(df)
-        print("Original DataFrame:")
-        print(df)
-
-        # Process the DataFrame for currency conversion
-        processed_df = process_dataframe_with_currency_conversion(df)
-        print("Processed DataFrame:")
-        print(processed_df)
-        
-        # Export to CSV
+        # Stream the workbook through read -> clean -> convert -> write in chunks
         output_file = os.path.join(output_dir, "processed_data.csv")
-        processed_df.to_csv(output_file, index=False)
-        print(f"Processed data exported to: {output_file}")
+        rows_written = stream_pipeline(sample_file_path, output_file)
+        print(f"Processed {rows_written} rows exported to: {output_file}")
     else:
         print(f"File {sample_file_path} does not exist.")
 
-# Call the test function in main
+def run(input_dir, output_file, workers=None, chunksize=None, keep_parts=False, metrics_path=None, profile=None,
+        rules_path=None, convert_workers=None, output_format='csv', partition_by=None, dedupe=None, cache=True):
+    """
+    Processes every loan file of input_dir in parallel and merges them into output_file.
+
+    Stage metrics are exported to metrics_path when one is given (or configured).
+    With cleaning rules, the rejected rows are written next to output_file, and
+    so are the rows whose currency values could not be converted. Parquet output
+    is partitioned by partition_by (default Loan_Purpose and Risk Rating). With
+    dedupe, applicants found in several files are kept once, see merge_sources.
+    With cache, files unchanged since a previous run are not processed again.
+    """
+    start = time.perf_counter()
+    options = {'chunksize': chunksize} if chunksize else {}
+    quarantine_path = f"{output_stem(output_file)}.quarantine.csv"
+    if os.path.exists(quarantine_path):
+        # Only this run's failures should be listed
+        os.remove(quarantine_path)
+    rules = load_cleaning_rules(rules_path)
+    if rules is not None:
+        options['rules'] = rules
+        options['rejected_path'] = f"{output_stem(output_file)}.rejected.csv"
+    metrics_path = get_metrics_path(metrics_path)
+    profile = get_profile_mode(profile)
+    if metrics_path or profile:
+        options['recorder'] = StageRecorder(profile=profile)
+    if cache:
+        options['cache_dir'] = get_cache_dir()
+    writer = get_writer(output_format)
+    if partition_by:
+        writer = functools.partial(writer, partition_columns=partition_by)
+    if dedupe:
+        writer = deduplicating(writer, dedupe, chunksize=chunksize or DEFAULT_CHUNKSIZE)
+    results = run_pipeline(input_dir, output_file, workers=workers, keep_parts=keep_parts,
+                           quarantine_path=quarantine_path, convert_workers=convert_workers, writer=writer,
+                           **options)
+    for result in results:
+        print(f"{os.path.basename(result['source'])}: {result['rows_read']} rows read, "
+              f"{result['rows_written']} rows processed")
+    total = sum(result['rows_written'] for result in results)
+    print(f"Processed {total} rows from {len(results)} file(s) in {time.perf_counter() - start:.2f}s, "
+          f"exported to: {output_file}")
+    if rules is not None:
+        print(f"Rejected rows written to: {options['rejected_path']}")
+    if os.path.exists(quarantine_path):
+        print(f"Rows that could not be converted written to: {quarantine_path}")
+
+    if 'recorder' in options:
+        print(options['recorder'].summary().to_string(index=False))
+        if metrics_path:
+            options['recorder'].export(metrics_path)
+            print(f"Stage metrics written to: {metrics_path}")
+
+def run_incremental_update(input_dir, output_file, chunksize=None):
+    """
+    Updates output_file with only the rows that changed since the previous run.
+
+    The rows whose currency values could not be converted are written next to output_file.
+    """
+    start = time.perf_counter()
+    options = {'chunksize': chunksize} if chunksize else {}
+    quarantine_path = f"{output_stem(output_file)}.quarantine.csv"
+    summary = run_incremental(input_dir, output_file, quarantine_path=quarantine_path, **options)
+    for source, result in summary.items():
+        details = ""
+        if result['status'] in ('new', 'updated'):
+            details = (f": {result['appended']} appended, {result['changed']} changed, "
+                       f"{result['deleted']} deleted, {result['converted']} converted, "
+                       f"{result['quarantined']} quarantined")
+        print(f"{os.path.basename(source)} {result['status']}{details}")
+    print(f"Incremental update finished in {time.perf_counter() - start:.2f}s, exported to: {output_file}")
+    if os.path.exists(quarantine_path):
+        print(f"Rows that could not be converted written to: {quarantine_path}")
+
 def main():
+    parser = argparse.ArgumentParser(description="Process every loan file of the input directory.")
+    parser.add_argument("--input-dir", default=None, help="Directory with the loan files (default: input/)")
+    parser.add_argument("--output", default=None,
+                        help="Merged output (default: output/processed_data with the format's extension)")
+    parser.add_argument("--format", choices=list(WRITERS), default='csv',
+                        help="Output format: plain CSV, gzip-compressed CSV or partitioned Parquet")
+    parser.add_argument("--partition-by", default=None,
+                        help="Comma-separated Parquet partition columns (default: Loan_Purpose,Risk Rating)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=None, help="Rows processed at a time per file")
+    parser.add_argument("--keep-parts", action="store_true", help="Keep the per-file outputs")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only convert rows that changed since the previous incremental run")
+    parser.add_argument("--dedupe", choices=CONFLICT_POLICIES, default=None,
+                        help="Keep each applicant once across files, resolving differing rows by this policy")
+    parser.add_argument("--cleaning-rules", default=None,
+                        help="JSON cleaning rules (e.g. config/cleaning_rules.json), default drops incomplete rows")
+    parser.add_argument("--convert-workers", type=int, default=None,
+                        help="Processes converting the chunks of each file (default: in the file's worker)")
+    parser.add_argument("--metrics", default=None,
+                        help="Write stage metrics to this file (.prom for Prometheus, JSON lines otherwise)")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="Profile every stage with cProfile (written to profiles/) or tracemalloc")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Process every file again instead of reusing the outputs of unchanged files")
+    parser.add_argument("--demo", action="store_true", help="Run the step-by-step walkthrough on Dataset1 instead")
+    args = parser.parse_args()
+    if args.partition_by and args.format != 'parquet':
+        parser.error("--partition-by only applies to --format parquet")
+    if args.incremental and args.format != 'csv':
+        parser.error("--incremental only writes CSV output")
+    if args.incremental and args.dedupe:
+        parser.error("--incremental does not support --dedupe")
+    if args.incremental and args.cleaning_rules:
+        parser.error("--incremental does not support --cleaning-rules")
+
     load_env()
     print("Capstone Project Initialized")
-    test_read_excel_with_ids()
-    test_remove_empty_entries()
-    test_process_dataframe_with_currency_conversion()
+    if args.demo:
+        test_read_excel_with_ids()
+        test_remove_empty_entries()
+        test_process_dataframe_with_currency_conversion()
+        return
+
+    input_dir = args.input_dir or get_input_dir()
+    output_file = args.output or os.path.join(get_output_dir(), f"processed_data{FORMAT_EXTENSIONS[args.format]}")
+    if args.incremental:
+        run_incremental_update(input_dir, output_file, args.chunksize)
+    else:
+        run(input_dir, output_file, args.workers, args.chunksize, args.keep_parts, args.metrics, args.profile,
+            args.cleaning_rules, args.convert_workers, args.format,
+            args.partition_by.split(',') if args.partition_by else None, args.dedupe, not args.no_cache)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,80 @@
+import argparse
+import time
+from utils.ingest import DEFAULT_CHUNKSIZE, clean_chunks, convert_chunks, iter_chunks, iter_chunks_with_ids, write_chunks
+from utils.profiling import PROFILE_MODES, StageRecorder, get_metrics_path, get_profile_mode, timed, timed_stage
+from utils.risk_model import load_risk_model
+from utils.scoring import score_batch
+
+def score_chunks(chunks, model=None):
+    """
+    Adds a 'Predicted Risk Rating' column to each chunk of a stream.
+
+    Uses the trained model when one is given, the weighted formula otherwise.
+    """
+    for chunk in chunks:
+        chunk['Predicted Risk Rating'] = model.predict(chunk) if model is not None else score_batch(chunk)
+        yield chunk
+
+def score_file(input_path, output_path, chunksize=DEFAULT_CHUNKSIZE, processed=False, model=None, recorder=None):
+    """
+    Streams a loan file through the batch risk scorer and writes the scored rows to CSV.
+
+    Args:
+        input_path (str): Input xlsx, CSV or Parquet file.
+        output_path (str): Path of the scored CSV file.
+        chunksize (int): Maximum number of rows per chunk.
+        processed (bool): Whether the input is already cleaned and converted to USD.
+        model (RiskModel, optional): Trained model to score with instead of the weighted formula.
+        recorder (StageRecorder, optional): Records the metrics of every stage.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if processed:
+        chunks = timed(recorder, 'read', iter_chunks(input_path, chunksize))
+    else:
+        chunks = timed(recorder, 'read', iter_chunks_with_ids(input_path, chunksize))
+        chunks = timed(recorder, 'clean', clean_chunks(chunks))
+        chunks = timed(recorder, 'convert', convert_chunks(chunks))
+    chunks = timed(recorder, 'score', score_chunks(chunks, model))
+    with timed_stage(recorder, 'write') as stage:
+        stage['rows_out'] = write_chunks(chunks, output_path)
+    return stage['rows_out']
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every loan of a portfolio with the risk rating model.")
+    parser.add_argument("input", help="Input xlsx, CSV or Parquet file")
+    parser.add_argument("output", help="Output CSV file")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows processed at a time")
+    parser.add_argument("--processed", action="store_true",
+                        help="Input is already cleaned and converted to USD (e.g. output/processed_data.csv)")
+    parser.add_argument("--model", action="store_true", help="Score with the trained model (see train.py)")
+    parser.add_argument("--metrics", default=None,
+                        help="Write stage metrics to this file (.prom for Prometheus, JSON lines otherwise)")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="Profile every stage with cProfile (written to profiles/) or tracemalloc")
+    args = parser.parse_args()
+
+    model = None
+    if args.model:
+        model = load_risk_model()
+        if model is None:
+            parser.error("No trained model found, run train.py first")
+
+    metrics_path = get_metrics_path(args.metrics)
+    profile = get_profile_mode(args.profile)
+    recorder = StageRecorder(profile=profile) if metrics_path or profile else None
+
+    start = time.perf_counter()
+    rows_written = score_file(args.input, args.output, args.chunksize, args.processed, model, recorder)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows_written} rows in {elapsed:.2f}s, written to: {args.output}")
+
+    if recorder is not None:
+        print(recorder.summary().to_string(index=False))
+        if metrics_path:
+            recorder.export(metrics_path)
+            print(f"Stage metrics written to: {metrics_path}")
+
+if __name__ == "__main__":
+    main()
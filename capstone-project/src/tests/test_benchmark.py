@@ -0,0 +1,51 @@
+import unittest
+import pandas as pd
+from utils.benchmark import compare, parse_size, run_size
+from utils.helpers import process_dataframe_with_currency_conversion, remove_empty_entries
+from utils.synthetic import COLUMNS, generate_loans
+
+class TestSyntheticLoans(unittest.TestCase):
+    def test_matches_the_input_schema_and_goes_through_the_pipeline(self):
+        df = generate_loans(2000, seed=3)
+        self.assertEqual(list(df.columns), COLUMNS)
+        pd.testing.assert_frame_equal(df, generate_loans(2000, seed=3))
+
+        # Mixed $/€ amounts and missing values in every column except Age and Gender
+        amounts = df['Loan_Amount'].dropna()
+        self.assertTrue(amounts.str.endswith('$').any() and amounts.str.endswith('â‚¬').any())
+        # Incomes are numbers with some euro strings
+        incomes = df['Income'].dropna()
+        as_text = incomes.map(lambda value: isinstance(value, str))
+        self.assertTrue(as_text.any() and not as_text.all())
+        self.assertTrue(incomes[as_text].str.endswith('â‚¬').all())
+        self.assertEqual(df[['Age', 'Gender']].isna().sum().sum(), 0)
+        self.assertTrue(df.drop(columns=['Age', 'Gender']).isna().any().all())
+
+        processed = process_dataframe_with_currency_conversion(remove_empty_entries(df))
+        self.assertEqual(processed['Loan_Amount'].dtype, 'float64')
+        self.assertEqual(processed['Income'].dtype, 'float64')
+
+class TestBenchmark(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual([parse_size(label) for label in ['10k', '1M', '250k', '500']],
+                         [10_000, 1_000_000, 250_000, 500])
+        with self.assertRaises(ValueError):
+            parse_size('lots')
+
+    def test_run_and_compare_with_baseline(self):
+        results = {'500': run_size(500, repeat=1, read_max_rows=0)}
+        self.assertNotIn('read_excel_with_ids', results['500'])
+        # The calculator is timed without and with a trained model
+        self.assertIn('calculate_risk_rating', results['500'])
+        self.assertIn('calculate_risk_rating_model', results['500'])
+        self.assertTrue(all(seconds >= 0 for seconds in results['500'].values()))
+
+        baseline = {'results': {'500': {'score_batch': results['500']['score_batch'] / 2,
+                                        'build_cube': results['500']['build_cube'] * 2}}}
+        rows = {row['case']: row for row in compare(results, baseline, threshold=0.25)}
+        self.assertEqual(set(rows), {'score_batch', 'build_cube'})
+        self.assertTrue(rows['score_batch']['regression'])
+        self.assertFalse(rows['build_cube']['regression'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.bitmap import BitmapIndex, dashboard_index, take_rows
+from utils.cube import age_bands
+
+class TestBitmapIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        rows = 1003
+        self.df = pd.DataFrame({
+            'Age': rng.integers(18, 80, rows),
+            'Education_Level': rng.choice(['Bachelor', 'Master', 'PhD'], rows),
+            'Loan_Purpose': pd.Categorical(rng.choice(['Car', 'Home', 'Medical'], rows)),
+            'Loan_Amount': rng.uniform(1000, 100000, rows),
+        })
+        self.index = dashboard_index(self.df)
+
+    def test_select_matches_isin_masks(self):
+        for ages, education, purposes in [(['26-35', '55+'], ['PhD'], []),
+                                          ([], ['Bachelor', 'Master'], ['Home', 'Car']),
+                                          (['18-25'], [], ['Medical', 'Unknown'])]:
+            mask = np.ones(len(self.df), dtype=bool)
+            if ages:
+                mask &= age_bands(self.df['Age']).isin(ages).to_numpy()
+            if education:
+                mask &= self.df['Education_Level'].isin(education).to_numpy()
+            if purposes:
+                mask &= self.df['Loan_Purpose'].isin(purposes).to_numpy()
+
+            bitmap = self.index.select({'Age_Band': ages, 'Education_Level': education, 'Loan_Purpose': purposes})
+            self.assertEqual(self.index.count(bitmap), int(mask.sum()))
+            np.testing.assert_array_equal(self.index.positions(bitmap), np.flatnonzero(mask))
+            pd.testing.assert_frame_equal(take_rows(self.df, self.index.positions(bitmap), ['Loan_Amount']),
+                                          self.df.loc[mask, ['Loan_Amount']])
+
+    def test_no_filter_keeps_every_row(self):
+        bitmap = self.index.select({'Age_Band': [], 'Education_Level': None})
+        self.assertIsNone(bitmap)
+        self.assertEqual(self.index.count(bitmap), len(self.df))
+        rows = take_rows(self.df, self.index.positions(bitmap), ['Loan_Amount'])
+        pd.testing.assert_frame_equal(rows, self.df[['Loan_Amount']])
+
+    def test_missing_values_match_nothing(self):
+        index = BitmapIndex({'Loan_Purpose': pd.Series(['Car', None, 'Home'])})
+        self.assertEqual(index.positions(index.select({'Loan_Purpose': ['Car', 'Home']})).tolist(), [0, 2])
+
+if __name__ == "__main__":
+    unittest.main()
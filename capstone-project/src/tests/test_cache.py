@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from utils import cache
+from utils.cache import ByteLRUCache, cached_files, cached_frame, evict_lru_paths, file_hash
+
+class TestCachedFrame(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, 'cache')
+        self.source = os.path.join(self.tmp.name, 'loans.csv')
+        self.builds = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, file_path):
+        self.builds += 1
+        return pd.read_csv(file_path)
+
+    def write_source(self, ages):
+        pd.DataFrame({'Age': ages, 'Gender': ['Male'] * len(ages)}).to_csv(self.source, index=False)
+
+    def test_reuses_cache_until_source_changes(self):
+        self.write_source([30, 40])
+        first = cached_frame(self.source, 'raw', self.build, self.cache_dir)
+        second = cached_frame(self.source, 'raw', self.build, self.cache_dir)
+        self.assertEqual(self.builds, 1)
+        pd.testing.assert_frame_equal(first, second)
+
+        self.write_source([30, 40, 50])
+        third = cached_frame(self.source, 'raw', self.build, self.cache_dir)
+        self.assertEqual(self.builds, 2)
+        self.assertEqual(third['Age'].tolist(), [30, 40, 50])
+        # The entry for the old contents is removed
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_rebuilds_when_key_changes(self):
+        self.write_source([30, 40])
+        cached_frame(self.source, 'processed', self.build, self.cache_dir, key='rates-a')
+        cached_frame(self.source, 'processed', self.build, self.cache_dir, key='rates-a')
+        self.assertEqual(self.builds, 1)
+
+        # e.g. the exchange rates changed
+        cached_frame(self.source, 'processed', self.build, self.cache_dir, key='rates-b')
+        self.assertEqual(self.builds, 2)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_cached_files_are_reused_until_source_changes(self):
+        def build(folder):
+            self.builds += 1
+            pd.read_csv(self.source).to_csv(os.path.join(folder, 'part.csv'), index=False)
+
+        self.write_source([30, 40])
+        first = cached_files(self.source, 'part', build, self.cache_dir, key='rates-a')
+        second = cached_files(self.source, 'part', build, self.cache_dir, key='rates-a')
+        self.assertEqual((first, self.builds), (second, 1))
+        self.assertEqual(pd.read_csv(os.path.join(first, 'part.csv'))['Age'].tolist(), [30, 40])
+
+        self.write_source([30, 40, 50])
+        third = cached_files(self.source, 'part', build, self.cache_dir, key='rates-a')
+        self.assertEqual(self.builds, 2)
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(third)])
+
+    def test_hash_memo_keeps_the_most_recent_files(self):
+        self.write_source([30])
+        with mock.patch.object(cache, 'HASH_MEMO_MAX_ENTRIES', 2), mock.patch.object(cache, '_hash_memo',
+                                                                                      type(cache._hash_memo)()):
+            for ages in ([30], [30, 40], [30, 40, 50]):
+                self.write_source(ages)
+                file_hash(self.source)
+            self.assertEqual(len(cache._hash_memo), 2)
+
+class TestByteLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used_entries_over_budget(self):
+        cache = ByteLRUCache(max_bytes=100)
+        cache.put('a', 'A', 40)
+        cache.put('b', 'B', 40)
+        self.assertEqual(cache.get('a'), 'A')
+
+        # 'b' is now the least recently used entry
+        cache.put('c', 'C', 40)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), ('A', 'C'))
+        self.assertEqual(cache.total_bytes, 80)
+
+    def test_oversized_values_are_not_cached(self):
+        cache = ByteLRUCache(max_bytes=100)
+        cache.put('a', 'A', 40)
+        cache.put('big', 'BIG', 101)
+        self.assertNotIn('big', cache)
+        self.assertEqual(len(cache), 1)
+
+class TestEvictLruPaths(unittest.TestCase):
+    def test_removes_least_recently_used_entries_over_budget(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for i, name in enumerate(['old.csv', 'used.csv', 'new.csv', 'writing.tmp']):
+                with open(os.path.join(tmp, name), 'wb') as entry:
+                    entry.write(b'x' * 40)
+                os.utime(os.path.join(tmp, name), (i, i))
+            os.makedirs(os.path.join(tmp, 'folder.parquet'))
+            with open(os.path.join(tmp, 'folder.parquet', 'part.parquet'), 'wb') as entry:
+                entry.write(b'x' * 40)
+            os.utime(os.path.join(tmp, 'folder.parquet'), (1.5, 1.5))
+            # Touching an entry marks it as recently used
+            os.utime(os.path.join(tmp, 'used.csv'))
+
+            removed = evict_lru_paths(tmp, 120, keep=os.path.join(tmp, 'new.csv'))
+            self.assertEqual([os.path.basename(path) for path in removed], ['old.csv', 'folder.parquet'])
+            self.assertEqual(sorted(os.listdir(tmp)), ['new.csv', 'used.csv', 'writing.tmp'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from utils.cleaning import REASON_IMPUTE_FAILED, REASON_MISSING_REQUIRED, CleaningRules
+from utils.helpers import remove_empty_entries, usd_amounts
+from utils.ingest import clean_chunks, convert_chunks, impute_converted, stream_pipeline
+from utils.synthetic import generate_loans
+
+# Rules file shipped with the project
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config',
+                          'cleaning_rules.json')
+
+class TestCleaningRules(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'Education_Level': ['PhD', 'PhD', 'PhD', 'Master', 'Master', np.nan],
+            'Income': [100.0, np.nan, 300.0, 50.0, np.nan, np.nan],
+            'Credit_Score': [100.0, np.nan, 300.0, 50.0, np.nan, np.nan],
+            'Marital_Status': ['Married', np.nan, 'Married', 'Married', 'Married', 'Married'],
+            'Loan_Amount': ['1$', '2$', np.nan, '4$', '5$', '6$'],
+        })
+
+    def test_default_rules_match_remove_empty_entries(self):
+        df = generate_loans(2000, seed=4)
+        cleaned, rejected = CleaningRules().apply(df)
+        pd.testing.assert_frame_equal(cleaned, remove_empty_entries(df))
+        self.assertEqual(len(rejected), len(df) - len(cleaned))
+
+    def test_imputes_optional_and_rejects_with_reasons(self):
+        rules = CleaningRules({
+            'Credit_Score': {'impute': 'median', 'by': 'Education_Level'},
+            'Income': {'required': False},
+            'Marital_Status': {'required': False},
+            'Education_Level': {'required': False},
+        })
+        cleaned, rejected = rules.apply(self.df)
+
+        # Group medians, with the overall median for rows without a group
+        self.assertEqual(cleaned['Credit_Score'].tolist(), [100.0, 200.0, 50.0, 50.0, 100.0])
+        self.assertTrue(cleaned['Marital_Status'].isna().any())
+        self.assertEqual(rejected.index.tolist(), [2])
+        self.assertEqual((rejected.loc[2, 'reason'], rejected.loc[2, 'missing_columns']),
+                         (REASON_MISSING_REQUIRED, 'Loan_Amount'))
+
+    def test_forward_fill_continues_across_chunks_and_reports_failures(self):
+        rules = CleaningRules({'Income': {'impute': 'ffill', 'required': True}}, default='optional')
+        chunks = [self.df.iloc[:2].assign(Income=[np.nan, 1.0]), self.df.iloc[2:].assign(Income=np.nan)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            rejected_path = os.path.join(tmp, 'rejected.csv')
+            cleaned = pd.concat(clean_chunks(chunks, rules, rejected_path))
+            rejected = pd.read_csv(rejected_path)
+
+        self.assertEqual(cleaned['Income'].tolist(), [1.0] * 5)
+        self.assertEqual(rejected[['reason', 'missing_columns']].values.tolist(), [[REASON_IMPUTE_FAILED, 'Income']])
+
+    def test_currency_medians_are_imputed_in_usd(self):
+        rules = CleaningRules({'Income': {'impute': 'median', 'by': 'Education_Level'}}, default='optional')
+        df = pd.DataFrame({
+            'Education_Level': ['PhD', 'PhD', 'PhD', 'Master', 'Master'],
+            'Income': ['100â‚¬', '300 GBP', np.nan, 1000.0, np.nan],
+            'Loan_Amount': ['1$', '2$', '3$', '4$', '5$'],
+        })
+        state = rules.fit([df])
+        cleaned = clean_chunks([df], rules, state=state)
+        processed = pd.concat(impute_converted(convert_chunks(cleaned), rules, state=state))
+
+        # Each group's median is taken over the incomes converted from their own currency
+        income = usd_amounts(df['Income'], 'Income')
+        self.assertEqual(processed['Income'].tolist(),
+                         [income[0], income[1], np.median(income[:2]), income[3], income[3]])
+
+    def test_median_imputation_does_not_depend_on_chunksize(self):
+        # The shipped rules, on incomes partly written as '12345.67€' strings
+        rules = CleaningRules.load(RULES_PATH)
+        df = generate_loans(3000, seed=5)
+        df.loc[df.sample(frac=0.2, random_state=1).index, 'Income'] = np.nan
+
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'loans.csv')
+            df.to_csv(source, index=False)
+            outputs = []
+            for chunksize in (3000, 250):
+                output_path = os.path.join(tmp, f"processed-{chunksize}.csv")
+                stream_pipeline(source, output_path, chunksize=chunksize, rules=rules)
+                with open(output_path, encoding='utf-8') as output_file:
+                    outputs.append(output_file.read())
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_invalid_rules_are_rejected(self):
+        with self.assertRaises(ValueError):
+            CleaningRules({'Income': {'impute': 'mean'}})
+        with self.assertRaises(ValueError):
+            CleaningRules({'Income': {'impute': 'constant'}})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.cube import LoanCube, age_bands
+
+class TestLoanCube(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        rows = 2000
+        self.df = pd.DataFrame({
+            'Age': rng.integers(18, 90, rows),
+            'Education_Level': rng.choice(['Bachelor', 'Master', 'PhD'], rows),
+            'Income': rng.uniform(20000, 250000, rows),
+            'Credit_Score': rng.integers(300, 851, rows).astype(float),
+            'Loan_Purpose': rng.choice(['Home', 'Car', 'Business', 'Medical'], rows),
+            'Debt_to_Income_Ratio': rng.uniform(0, 1, rows),
+            'Risk Rating': rng.integers(0, 3, rows).astype(float),
+            'Loan_Amount': rng.uniform(1000, 150000, rows),
+        })
+        self.cube = LoanCube(self.df)
+
+    def test_filtered_aggregates_match_pandas(self):
+        cells = self.cube.select(['26-35', '55+'], ['PhD', 'Master'], ['Home', 'Car'])
+        mask = (age_bands(self.df['Age']).isin(['26-35', '55+'])
+                & self.df['Education_Level'].isin(['PhD', 'Master'])
+                & self.df['Loan_Purpose'].isin(['Home', 'Car']))
+        filtered_df = self.df[mask]
+
+        self.assertEqual(self.cube.count(cells), len(filtered_df))
+        self.assertAlmostEqual(self.cube.mean(cells, 'Income'), filtered_df['Income'].mean(), places=6)
+        self.assertEqual(self.cube.mode(cells, 'Loan_Purpose'), filtered_df['Loan_Purpose'].mode()[0])
+
+        expected = filtered_df.groupby('Risk Rating')['Loan_Amount'].mean().reset_index()
+        pd.testing.assert_frame_equal(self.cube.group_mean(cells, 'Risk Rating', 'Loan_Amount'), expected)
+
+        columns = ['Age', 'Income', 'Credit_Score', 'Debt_to_Income_Ratio', 'Loan_Amount', 'Risk Rating']
+        pd.testing.assert_frame_equal(self.cube.corr(cells, columns), filtered_df[columns].corr())
+
+    def test_no_filter_selects_everything(self):
+        cells = self.cube.select()
+        self.assertEqual(self.cube.count(cells), len(self.df))
+        self.assertEqual(self.cube.count_where(cells, 'Risk Rating', lambda rating: rating <= 1),
+                         int((self.df['Risk Rating'] <= 1).sum()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import pandas as pd
+from utils.helpers import convert_currency_columns, round_half_even
+from utils.rates import RateTable
+
+class TestCurrencyConversion(unittest.TestCase):
+    def test_round_half_even_matches_builtin_round(self):
+        values = [122487.925, 193534.115, 100197.495, 0.125, -0.001, 2.675]
+        expected = [round(v, 2) for v in values]
+        self.assertEqual(round_half_even(values).tolist(), expected)
+
+    def test_convert_currency_columns(self):
+        df = pd.DataFrame({
+            'Loan_Amount': ['1986.95$', '3558.06€', 'n/a'],
+            'Income': [35676.69802, 112280.1907, 1000.0],
+        })
+        processed_df, errors_df = convert_currency_columns(df)
+
+        self.assertEqual(processed_df['Loan_Amount'].tolist()[:2],
+                         [1986.95, round(3558.06 * 1.137, 2)])
+        self.assertEqual(processed_df['Income'].tolist()[:2],
+                         [round(35676.7 * 1.137, 2), round(112280.19 * 1.137, 2)])
+        self.assertEqual(str(processed_df['Loan_Amount'].dtype), 'float64')
+        # The unparsable row is quarantined whole, with its original values
+        self.assertEqual(len(processed_df), 2)
+        self.assertEqual(errors_df.index.tolist(), [2])
+        self.assertEqual(errors_df['Loan_Amount'].iloc[0], 'n/a')
+        self.assertEqual(errors_df['Income'].iloc[0], 1000.0)
+        self.assertEqual(errors_df['failed_columns'].iloc[0], 'Loan_Amount')
+
+    def test_each_cell_is_converted_from_its_marked_currency(self):
+        rates = RateTable(pd.DataFrame({'currency': ['EUR', 'GBP', 'CHF'], 'date': ['2024-01-01'] * 3,
+                                        'rate': [1.1, 1.3, 1.2]}))
+        df = pd.DataFrame({
+            'Loan_Amount': ['100$', '100€', '£100', '100 CHF', '100', 'JPY 100'],
+            'Income': ['1000', '1000 GBP', '1000€', '1000', 'CHF1000', '1000'],
+        })
+        processed_df, errors_df = convert_currency_columns(df, rates)
+
+        self.assertEqual(processed_df['Loan_Amount'].tolist(), [100.0, 110.0, 130.0, 120.0, 110.0])
+        self.assertEqual(processed_df['Income'].tolist(), [1100.0, 1300.0, 1100.0, 1100.0, 1200.0])
+        # No JPY rate: quarantined instead of converted as EUR
+        self.assertEqual(errors_df.index.tolist(), [5])
+        self.assertEqual(errors_df['error'].iloc[0], 'No exchange rate for Loan_Amount')
+
+    def test_numeric_columns_convert_like_their_text(self):
+        incomes = [122487.925, 35676.69802, float('nan'), 1000.0]
+        numeric_df, numeric_errors = convert_currency_columns(pd.DataFrame({'Loan_Amount': ['100$'] * 4,
+                                                                            'Income': incomes}))
+        text_df, _ = convert_currency_columns(pd.DataFrame({'Loan_Amount': ['100$'] * 4,
+                                                            'Income': ['122487.925', '35676.69802', None,
+                                                                       '1000.0']}))
+
+        pd.testing.assert_frame_equal(numeric_df, text_df)
+        self.assertEqual(numeric_df['Income'].tolist()[:2], [round(122487.93 * 1.137, 2), round(35676.7 * 1.137, 2)])
+        # Missing amounts are left to the cleaning rules, not quarantined
+        self.assertTrue(numeric_df['Income'].isna().iloc[2])
+        self.assertTrue(numeric_errors.empty)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from utils.incremental import run_incremental
+from utils.rates import RateTable
+from utils.runner import run_pipeline
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.tmp.name, 'input')
+        os.makedirs(self.input_dir)
+        self.output_path = os.path.join(self.tmp.name, 'output', 'processed.csv')
+        self.df = pd.DataFrame({
+            'Age': range(20, 30),
+            'Income': [50000.0] * 10,
+            'Loan_Amount': ['1000$', '2000€', None, '3000$', '4000€'] * 2,
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_and_compare(self, **options):
+        source = os.path.join(self.input_dir, 'loans.csv')
+        self.df.to_csv(source, index=False)
+        quarantine_path = os.path.join(self.tmp.name, 'quarantine.csv')
+        summary = run_incremental(self.input_dir, self.output_path, quarantine_path=quarantine_path, **options)
+        expected_path = os.path.join(self.tmp.name, 'expected.csv')
+        expected_quarantine = os.path.join(self.tmp.name, 'expected.quarantine.csv')
+        run_pipeline(self.input_dir, expected_path, workers=1, quarantine_path=expected_quarantine, **options)
+        for path, expected_path in [(self.output_path, expected_path), (quarantine_path, expected_quarantine)]:
+            self.assertEqual(os.path.exists(path), os.path.exists(expected_path))
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as output, open(expected_path, encoding='utf-8') as expected:
+                    self.assertEqual(output.read(), expected.read())
+                os.remove(expected_path)
+        return summary[os.path.abspath(source)]
+
+    def test_only_changed_rows_are_converted(self):
+        self.assertEqual(self.run_and_compare()['converted'], 8)
+        self.assertEqual(self.run_and_compare()['status'], 'unchanged')
+
+        # Change one row and append two new ones
+        self.df.loc[1, 'Loan_Amount'] = '2500€'
+        self.df = pd.concat([self.df, pd.DataFrame({
+            'Age': [40, 41], 'Income': [60000.0] * 2, 'Loan_Amount': ['5000$', '6000€']})], ignore_index=True)
+        result = self.run_and_compare()
+        self.assertEqual((result['changed'], result['appended'], result['deleted']), (1, 2, 1))
+        self.assertEqual(result['converted'], 3)
+
+        # Deleted rows disappear from the output without converting anything
+        self.df = self.df.drop(index=[0, 3]).reset_index(drop=True)
+        result = self.run_and_compare()
+        self.assertEqual((result['deleted'], result['converted']), (2, 0))
+
+    def test_appending_keeps_earlier_partitions(self):
+        self.run_and_compare(chunksize=4)
+        store = os.path.join(os.path.dirname(self.output_path), '.incremental', 'store')
+        first_partition = os.path.join(store, os.listdir(store)[0], '00000.pkl')
+        written = os.stat(first_partition).st_mtime_ns
+
+        self.df = pd.concat([self.df, pd.DataFrame({
+            'Age': [40, 41], 'Income': [60000.0] * 2, 'Loan_Amount': ['5000$', '6000€']})], ignore_index=True)
+        result = self.run_and_compare(chunksize=4)
+        self.assertEqual((result['appended'], result['converted']), (2, 2))
+        self.assertEqual(os.stat(first_partition).st_mtime_ns, written)
+
+    def test_unconvertible_rows_are_quarantined_until_fixed(self):
+        self.df.loc[3, 'Loan_Amount'] = '3,000.00.0$'
+        self.assertEqual(self.run_and_compare()['quarantined'], 1)
+        self.assertEqual(self.run_and_compare()['status'], 'unchanged')
+
+        # Changing another row keeps the quarantine
+        self.df.loc[0, 'Age'] = 21
+        result = self.run_and_compare()
+        self.assertEqual((result['converted'], result['quarantined']), (1, 1))
+
+        self.df.loc[3, 'Loan_Amount'] = '3000$'
+        result = self.run_and_compare()
+        self.assertEqual((result['converted'], result['quarantined']), (1, 0))
+
+    def test_new_exchange_rates_convert_every_row_again(self):
+        source = os.path.join(self.input_dir, 'loans.csv')
+        self.df.to_csv(source, index=False)
+        rates = RateTable(pd.DataFrame({'currency': ['EUR'], 'date': ['2024-01-01'], 'rate': [1.1]}))
+        run_incremental(self.input_dir, self.output_path, rates=rates)
+        summary = run_incremental(self.input_dir, self.output_path, rates=rates)
+        self.assertEqual(summary[os.path.abspath(source)]['status'], 'unchanged')
+
+        rates = RateTable(pd.DataFrame({'currency': ['EUR'], 'date': ['2024-01-01'], 'rate': [1.2]}))
+        summary = run_incremental(self.input_dir, self.output_path, rates=rates)
+        self.assertEqual(summary[os.path.abspath(source)]['converted'], 8)
+        output = pd.read_csv(self.output_path)
+        self.assertEqual(output.loc[output['ID'] == 2, 'Loan_Amount'].item(), 2400.0)
+
+if __name__ == "__main__":
+    unittest.main()
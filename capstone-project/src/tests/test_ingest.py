@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from utils.helpers import process_dataframe_with_currency_conversion, remove_empty_entries
+from utils.ingest import convert_chunks, iter_chunks_with_ids, stream_pipeline
+
+class TestStreamingIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame({
+            'Age': range(20, 45),
+            'Income': [50000.0] * 25,
+            'Loan_Amount': ['1000$', '2000€', None, '3000$', '4000€'] * 5,
+        })
+        self.csv_path = os.path.join(self.tmp.name, 'loans.csv')
+        self.df.to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_ids_continue_across_chunks(self):
+        chunks = list(iter_chunks_with_ids(self.csv_path, chunksize=7))
+        self.assertEqual([len(chunk) for chunk in chunks], [7, 7, 7, 4])
+        ids = pd.concat(chunks)['ID'].tolist()
+        self.assertEqual(ids, list(range(1, 26)))
+
+    def test_stream_pipeline_matches_full_processing(self):
+        output_path = os.path.join(self.tmp.name, 'processed.csv')
+        rows_written = stream_pipeline(self.csv_path, output_path, chunksize=4)
+
+        expected = self.df.copy()
+        expected['ID'] = range(1, len(expected) + 1)
+        expected = process_dataframe_with_currency_conversion(remove_empty_entries(expected))
+        self.assertEqual(rows_written, 20)
+        with open(output_path, encoding='utf-8') as output_file:
+            self.assertEqual(output_file.read(), expected.to_csv(index=False))
+
+    def test_income_written_as_euro_strings(self):
+        df = self.df.astype({'Income': object})
+        df.loc[[3, 11], 'Income'] = ['1000.5€', '€2500']
+        df.to_csv(self.csv_path, index=False)
+        output_path = os.path.join(self.tmp.name, 'processed.csv')
+        stream_pipeline(self.csv_path, output_path, chunksize=4)
+
+        expected = df.copy()
+        expected['ID'] = range(1, len(expected) + 1)
+        expected = process_dataframe_with_currency_conversion(remove_empty_entries(expected))
+        self.assertEqual(expected.loc[3, 'Income'], round(expected.loc[0, 'Income'] / 50000 * 1000.5, 2))
+        with open(output_path, encoding='utf-8') as output_file:
+            self.assertEqual(output_file.read(), expected.to_csv(index=False))
+
+    def test_convert_chunks_isolates_failures(self):
+        chunks = [self.df.iloc[:5], self.df.iloc[5:10].drop(columns='Income'), self.df.iloc[10:15].copy()]
+        chunks[2].loc[12, 'Loan_Amount'] = 'n/a'
+        quarantine_path = os.path.join(self.tmp.name, 'quarantine.csv')
+        converted = list(convert_chunks(chunks, quarantine_path, workers=2))
+
+        # The chunk that cannot be converted at all does not affect the others
+        self.assertEqual([len(chunk) for chunk in converted], [5, 0, 4])
+        quarantine = pd.read_csv(quarantine_path, keep_default_na=False)
+        self.assertEqual(quarantine['Age'].tolist(), list(range(25, 30)) + [32])
+        self.assertEqual(quarantine['Loan_Amount'].iloc[-1], 'n/a')
+        self.assertEqual(quarantine['failed_columns'].iloc[-1], 'Loan_Amount')
+
+if __name__ == "__main__":
+    unittest.main()
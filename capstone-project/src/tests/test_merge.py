@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.merge import deduplicating, merge_sources
+
+class TestMergeSources(unittest.TestCase):
+    def setUp(self):
+        applicant = {'Age': 30, 'Gender': 'Male', 'Education_Level': 'PhD', 'Marital_Status': 'Single',
+                     'Income': 50000.0, 'Credit_Score': 700}
+        self.first = pd.DataFrame([
+            dict(applicant, ID=1, Loan_Amount=1000.0, Loan_Purpose='Car'),
+            dict(applicant, ID=2, Age=40, Loan_Amount=2000.0, Loan_Purpose=None),
+            dict(applicant, ID=3, Age=50, Loan_Amount=3000.0, Loan_Purpose='Home'),
+        ])
+        # Applicant 30 is a duplicate, 40 conflicts, 60 is new and 3 has no Credit_Score column
+        self.second = pd.DataFrame([
+            dict(applicant, ID=1, Age=60, Loan_Amount=6000.0, Loan_Purpose='Medical', Employment='Yes'),
+            dict(applicant, ID=2, Loan_Amount=1000.0, Loan_Purpose='Car', Employment=None),
+            dict(applicant, ID=3, Age=40, Loan_Amount=2500.0, Loan_Purpose='Home', Employment='No'),
+        ])
+
+    def test_policies(self):
+        expected = {'first': ([1000.0, 2000.0, 3000.0, 6000.0], ['Car', None, 'Home', 'Medical']),
+                    'last': ([1000.0, 2500.0, 3000.0, 6000.0], ['Car', 'Home', 'Home', 'Medical']),
+                    'coalesce': ([1000.0, 2000.0, 3000.0, 6000.0], ['Car', 'Home', 'Home', 'Medical'])}
+        for policy, (amounts, purposes) in expected.items():
+            merged, report = merge_sources([self.first, self.second], names=['a', 'b'], policy=policy,
+                                           source_column='Source')
+            self.assertEqual(merged['Age'].tolist(), [30, 40, 50, 60], policy)
+            self.assertEqual(merged['Loan_Amount'].tolist(), amounts, policy)
+            self.assertEqual(merged['Loan_Purpose'].replace({np.nan: None}).tolist(), purposes, policy)
+            self.assertEqual(report, {'rows_in': 6, 'rows_out': 4, 'duplicates': 1, 'conflicts': 1})
+        self.assertEqual(merged.columns[-2:].tolist(), ['Employment', 'Source'])
+
+        merged, _ = merge_sources([self.first, self.second], names=['a', 'b'], source_column='Source')
+        self.assertEqual(merged['Source'].tolist(), ['a', 'a', 'a', 'b'])
+
+    def test_error_policy_raises_on_conflicts_only(self):
+        with self.assertRaises(ValueError):
+            merge_sources([self.first, self.second], policy='error')
+        merged, report = merge_sources([self.first, self.first], policy='error')
+        pd.testing.assert_frame_equal(merged, self.first)
+        self.assertEqual(report['duplicates'], 3)
+        with self.assertRaises(ValueError):
+            merge_sources([self.first], policy='newest')
+
+    def test_rows_missing_a_key_are_kept(self):
+        incomplete = self.first.assign(Credit_Score=np.nan)
+        merged, report = merge_sources([incomplete, incomplete])
+        self.assertEqual(len(merged), 6)
+        self.assertEqual(report['duplicates'], 0)
+
+    def test_deduplicating_writer(self):
+        written = []
+        def writer(chunks, output_path):
+            written.append(pd.concat(chunks, ignore_index=True))
+            return len(written[-1])
+
+        rows = deduplicating(writer, chunksize=2)(iter([self.first, self.second]), 'out.csv')
+        self.assertEqual(rows, 4)
+        self.assertEqual(written[0]['Age'].tolist(), [30, 40, 50, 60])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import pandas as pd
+from utils.profiling import StageRecorder
+
+def slow_chunks(chunks, delay):
+    for chunk in chunks:
+        time.sleep(delay)
+        yield chunk
+
+class TestStageRecorder(unittest.TestCase):
+    def test_nested_streams_record_exclusive_time_and_rows(self):
+        recorder = StageRecorder(labels={'source': 'test.xlsx'})
+        source = [pd.DataFrame({'a': range(10)}), pd.DataFrame({'a': range(5)})]
+        chunks = recorder.iter('read', slow_chunks(source, 0.02))
+        chunks = recorder.iter('clean', (chunk.head(3) for chunk in slow_chunks(chunks, 0.01)))
+        with recorder.stage('write') as stage:
+            stage['rows_out'] = sum(len(chunk) for chunk in chunks)
+
+        records = {record['stage']: record for record in recorder.records}
+        self.assertEqual((records['read']['rows_in'], records['read']['rows_out']), (None, 15))
+        self.assertEqual((records['clean']['rows_in'], records['clean']['rows_out']), (15, 6))
+        self.assertEqual((records['write']['rows_in'], records['write']['rows_out']), (6, 6))
+        # Time spent reading is not counted again by the stages consuming the chunks
+        self.assertGreaterEqual(records['read']['seconds'], 0.04)
+        self.assertLess(records['clean']['seconds'], 0.04)
+        self.assertLess(records['write']['seconds'], 0.01)
+        self.assertEqual(records['clean']['source'], 'test.xlsx')
+
+    def test_export_prometheus_and_json_lines(self):
+        recorder = StageRecorder()
+        with recorder.stage('aggregate', rows_in=100) as stage:
+            stage['rows_out'] = 10
+
+        with tempfile.TemporaryDirectory() as tmp:
+            recorder.export(os.path.join(tmp, 'metrics.prom'))
+            with open(os.path.join(tmp, 'metrics.prom'), encoding='utf-8') as metrics_file:
+                text = metrics_file.read()
+            self.assertIn('# TYPE loan_stage_seconds gauge', text)
+            self.assertIn('loan_stage_rows_in{stage="aggregate"} 100.0', text)
+
+            recorder.export(os.path.join(tmp, 'metrics.jsonl'))
+            with open(os.path.join(tmp, 'metrics.jsonl'), encoding='utf-8') as metrics_file:
+                record = json.loads(metrics_file.readline())
+            self.assertEqual((record['stage'], record['rows_out']), ('aggregate', 10))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+from utils.helpers import convert_currency_columns
+from utils.rate_fetcher import FileRateProvider, HttpRateProvider, RateCache, RateFetcher
+from utils.rates import RateTable
+
+class StubRatesHandler(BaseHTTPRequestHandler):
+    """Answers every lookup with the same EUR rate and counts the requests."""
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        body = json.dumps({'rates': {'USD': 1.25}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestRateFetcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RateCache(os.path.join(self.tmp.name, 'rates.sqlite'), ttl=60)
+        self.rates_path = os.path.join(self.tmp.name, 'rates.csv')
+        pd.DataFrame({'currency': ['EUR', 'EUR'], 'date': ['2024-01-01', '2024-06-01'],
+                      'rate': [1.10, 1.20]}).to_csv(self.rates_path, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_one_lookup_per_distinct_pair(self):
+        fetcher = RateFetcher(FileRateProvider(self.rates_path), self.cache)
+        df = pd.DataFrame({
+            'Loan_Amount': ['100€', '200$', '300€', '400€'],
+            'Income': [1000.0, 2000.0, 3000.0, 4000.0],
+            'Date': ['2024-03-01', '2024-03-01', '2024-07-01', '2024-03-01'],
+        })
+        processed_df, _ = convert_currency_columns(df, fetcher, date_column='Date')
+        self.assertEqual(processed_df['Loan_Amount'].tolist(), [110.0, 200.0, 360.0, 440.0])
+        self.assertEqual(processed_df['Income'].tolist(), [1100.0, 2200.0, 3600.0, 4400.0])
+        self.assertEqual(fetcher.lookups, 2)
+
+        # Fresh cached rates are reused by the next fetcher
+        second = RateFetcher(FileRateProvider(self.rates_path), self.cache)
+        convert_currency_columns(df, second, date_column='Date')
+        self.assertEqual(second.lookups, 0)
+
+    def test_all_currencies_are_looked_up_in_one_batch(self):
+        fetcher = RateFetcher(FileRateProvider(self.rates_path), self.cache)
+        batches = []
+        get_rates = fetcher.get_rates
+        fetcher.get_rates = lambda pairs, skip_missing=False: batches.append(pairs) or get_rates(pairs, skip_missing)
+        df = pd.DataFrame({
+            'Loan_Amount': ['100€', '200$', '300 CHF', '400€'],
+            'Income': ['1000 GBP', 2000.0, 3000.0, 4000.0],
+        })
+        processed_df, quarantine_df = convert_currency_columns(df, fetcher)
+
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(sorted(currency for currency, _ in batches[0]), ['CHF', 'EUR', 'GBP'])
+        # Only the rows in a currency without a rate are quarantined
+        self.assertEqual(processed_df.index.tolist(), [1, 3])
+        self.assertEqual(quarantine_df['error'].tolist(), ["No exchange rate for Income",
+                                                           "No exchange rate for Loan_Amount"])
+
+    def test_http_provider_and_offline_fallback(self):
+        StubRatesHandler.requests_seen = []
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubRatesHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            fetcher = RateFetcher(HttpRateProvider(url), self.cache)
+            rates = fetcher.get_rates([('EUR', '2024-03-01'), ('eur', '2024-03-01'), ('GBP', None), ('USD', None)])
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(sorted(StubRatesHandler.requests_seen),
+                         ['/2024-03-01?from=EUR&to=USD', '/latest?from=GBP&to=USD'])
+        self.assertEqual(rates[('EUR', pd.Timestamp('2024-03-01'))], 1.25)
+        self.assertEqual(rates[('USD', None)], 1.0)
+
+        # With the server gone, expired cache entries and then the fallback table are used
+        self.cache.ttl = 0
+        fallback = RateTable(pd.DataFrame({'currency': ['CHF'], 'date': ['2024-01-01'], 'rate': [1.1]}))
+        offline = RateFetcher(HttpRateProvider(url, timeout=1), self.cache, fallback)
+        self.assertEqual(offline.get_rate('EUR', '2024-03-01'), 1.25)
+        self.assertEqual(offline.get_rate('CHF'), 1.1)
+        with self.assertRaises(ValueError):
+            RateFetcher(HttpRateProvider(url, timeout=1), self.cache).get_rate('JPY')
+
+    def test_http_provider_uses_a_session_per_thread(self):
+        provider = HttpRateProvider('http://127.0.0.1:1')
+        sessions = []
+        threads = [threading.Thread(target=lambda: sessions.append(provider.session)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIsNot(sessions[0], sessions[1])
+        self.assertIs(provider.session, provider.session)
+
+    def test_cache_evicts_old_entries(self):
+        key = ('EUR', pd.Timestamp('2024-03-01'))
+        cache = RateCache(self.cache.path, ttl=60, keep=120)
+        cache.put_many({key: 1.2}, now=1000)
+        self.assertEqual(cache.get_many([key], max_age=60, now=1030), {key: 1.2})
+        self.assertEqual(cache.get_many([key], max_age=60, now=1100), {})
+        cache.put_many({('GBP', None): 1.3}, now=1200)
+        self.assertEqual(cache.get_many([key]), {})
+
+    def test_fingerprint_follows_the_fetched_rates(self):
+        # Rates expire at once, so every fingerprint fetches them again
+        cache = RateCache(self.cache.path, ttl=0)
+        fallback = RateTable.load(self.rates_path)
+        fetcher = RateFetcher(FileRateProvider(self.rates_path), cache, fallback=fallback)
+        first = fetcher.fingerprint()
+        self.assertEqual(fetcher.fingerprint(), first)
+        self.assertEqual(fetcher.lookups, 2)
+
+        pd.DataFrame({'currency': ['EUR'], 'date': ['2024-06-01'], 'rate': [1.30]}).to_csv(self.rates_path, index=False)
+        changed = RateFetcher(FileRateProvider(self.rates_path), cache, fallback=fallback)
+        self.assertNotEqual(changed.fingerprint(), first)
+
+if __name__ == "__main__":
+    unittest.main()
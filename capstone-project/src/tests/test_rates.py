@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from utils.helpers import convert_to_usd
+from utils.rates import RateTable
+
+class TestRateTable(unittest.TestCase):
+    def setUp(self):
+        self.table = RateTable(pd.DataFrame({
+            'currency': ['EUR', 'EUR', 'GBP'],
+            'date': ['2024-01-01', '2024-06-01', '2024-01-01'],
+            'rate': [1.10, 1.20, 1.30],
+        }))
+
+    def test_convert_many_uses_rate_in_effect_on_each_date(self):
+        converted = self.table.convert_many(
+            [100, 100, 100, 100, 100],
+            ['EUR', 'EUR', 'gbp', 'USD', 'XXX'],
+            ['2024-03-01', '2024-07-01', '2023-01-01', None, '2024-03-01'],
+        )
+        np.testing.assert_allclose(converted[:4], [110.0, 120.0, 130.0, 100.0])
+        self.assertTrue(np.isnan(converted[4]))
+
+    def test_get_rate_defaults_to_latest(self):
+        self.assertEqual(self.table.get_rate('EUR'), 1.20)
+        with self.assertRaises(ValueError):
+            self.table.get_rate('XXX')
+
+    def test_sqlite_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'rates.sqlite')
+            self.table.to_sqlite(path)
+            loaded = RateTable.load(path)
+        self.assertEqual(loaded.get_rate('EUR', '2024-03-01'), 1.10)
+
+    def test_fingerprint_follows_the_rates(self):
+        same = RateTable(self.table.rates)
+        changed = self.table.rates.copy()
+        changed.loc[0, 'rate'] = 1.11
+        self.assertEqual(same.fingerprint(), self.table.fingerprint())
+        self.assertNotEqual(RateTable(changed).fingerprint(), self.table.fingerprint())
+
+    def test_convert_to_usd_wrapper(self):
+        self.assertAlmostEqual(convert_to_usd(100, 'EUR'), 113.7)
+        self.assertIsNone(convert_to_usd(100, 'XXX'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.render import box_outliers, box_stats
+
+class TestBoxStats(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            'group': rng.choice(['b', 'a', 'c'], size=500),
+            'value': np.append(rng.normal(100, 10, size=498), [400.0, np.nan]),
+        })
+
+    def test_matches_row_level_quantiles_and_whiskers(self):
+        stats = box_stats(self.df, 'group', 'value').set_index('group')
+        for group, rows in self.df.dropna().groupby('group'):
+            values = rows['value'].to_numpy()
+            q1, median, q3 = np.percentile(values, [25, 50, 75])
+            inside = values[(values >= q1 - 1.5 * (q3 - q1)) & (values <= q3 + 1.5 * (q3 - q1))]
+            np.testing.assert_allclose(stats.loc[group, ['q1', 'median', 'q3']].to_numpy(dtype=float),
+                                       [q1, median, q3])
+            self.assertEqual(stats.loc[group, 'lowerfence'], inside.min())
+            self.assertEqual(stats.loc[group, 'upperfence'], inside.max())
+            self.assertEqual(stats.loc[group, 'count'], len(values))
+
+    def test_outliers_are_outside_the_whiskers_and_capped(self):
+        stats = box_stats(self.df, 'group', 'value')
+        outliers = box_outliers(self.df, 'group', 'value', stats, max_points=1000)
+        self.assertIn(400.0, outliers['value'].tolist())
+        self.assertLessEqual(len(box_outliers(self.df, 'group', 'value', stats, max_points=1)), 1)
+
+if __name__ == "__main__":
+    unittest.main()
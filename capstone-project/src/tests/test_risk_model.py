@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from utils.risk_model import RiskModel, fit_risk_model
+
+class TestRiskModel(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        rows = 600
+        credit_score = rng.uniform(300, 850, rows)
+        purpose = rng.choice(['Home', 'Car', 'Business'], rows)
+        # Rating driven by the credit score and the loan purpose
+        rating = np.where(credit_score > 650, 0.0, np.where(credit_score > 450, 1.0, 2.0))
+        rating = np.where(purpose == 'Business', 2.0, rating)
+        self.df = pd.DataFrame({
+            'Age': rng.integers(18, 80, rows),
+            'Income': rng.uniform(20000, 200000, rows),
+            'Credit_Score': credit_score,
+            'Debt_to_Income_Ratio': rng.uniform(0, 1, rows),
+            'Loan_Amount': rng.uniform(1000, 150000, rows),
+            'Education_Level': rng.choice(['Bachelor', 'Master'], rows),
+            'Loan_Purpose': purpose,
+            'Risk Rating': rating,
+        })
+
+    def test_fit_learns_numeric_and_categorical_features(self):
+        model = fit_risk_model(self.df)
+        self.assertGreater((model.predict(self.df) == self.df['Risk Rating']).mean(), 0.9)
+        self.assertEqual(model.predict_one(40, 80000, 800, 0.2, 'Master', 'Business', 5000), 2)
+
+    def test_save_and_load_round_trip(self):
+        model = fit_risk_model(self.df, iterations=50)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'model.json')
+            model.save(path)
+            loaded = RiskModel.load(path)
+        np.testing.assert_allclose(loaded.predict_proba(self.df), model.predict_proba(self.df))
+
+if __name__ == "__main__":
+    unittest.main()
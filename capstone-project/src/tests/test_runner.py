@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from utils.cleaning import CleaningRules
+from utils import runner
+from utils.runner import run_pipeline
+
+class TestRunner(unittest.TestCase):
+    def test_ids_are_deterministic_across_files_and_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_dir = os.path.join(tmp, 'input')
+            os.makedirs(input_dir)
+            for name, rows in [('b_branch.csv', 4), ('a_branch.csv', 3)]:
+                pd.DataFrame({
+                    'Age': range(rows),
+                    'Income': [1000.0] * rows,
+                    'Loan_Amount': ['500$'] + [None] * (rows - 2) + ['200€'],
+                }).to_csv(os.path.join(input_dir, name), index=False)
+
+            outputs = []
+            for workers in (1, 2):
+                output_path = os.path.join(tmp, f'merged_{workers}.csv')
+                results = run_pipeline(input_dir, output_path, workers=workers)
+                with open(output_path, encoding='utf-8') as output_file:
+                    outputs.append(output_file.read())
+
+            self.assertEqual(outputs[0], outputs[1])
+            self.assertEqual([os.path.basename(r['source']) for r in results], ['a_branch.csv', 'b_branch.csv'])
+            # a_branch keeps IDs 1 and 3, b_branch is offset by the 3 rows read from a_branch
+            merged = pd.read_csv(os.path.join(tmp, 'merged_1.csv'))
+            self.assertEqual(merged['ID'].tolist(), [1, 3, 4, 7])
+            self.assertEqual(sorted(os.listdir(tmp)), ['input', 'merged_1.csv', 'merged_2.csv'])
+
+    def test_parts_are_merged_with_the_output_types(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_dir = os.path.join(tmp, 'input')
+            os.makedirs(input_dir)
+            pd.DataFrame({
+                'Age': [30, 31, np.nan, 33],
+                'Income': [1000.0] * 4,
+                'Loan_Amount': ['500$'] * 4,
+            }).to_csv(os.path.join(input_dir, 'loans.csv'), index=False)
+
+            # The second part chunk has a missing Age and is written with floats
+            output_path = os.path.join(tmp, 'merged.csv')
+            run_pipeline(input_dir, output_path, workers=1, chunksize=2, rules=CleaningRules(default='optional'))
+            with open(output_path, encoding='utf-8') as output_file:
+                ages = [line.split(',')[0] for line in output_file.read().splitlines()[1:]]
+            self.assertEqual(ages, ['30', '31', '', '33'])
+
+    def test_unchanged_files_are_reused_from_the_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_dir = os.path.join(tmp, 'input')
+            os.makedirs(input_dir)
+            for name in ('a_branch.csv', 'b_branch.csv'):
+                pd.DataFrame({
+                    'Age': [30, None, 32],
+                    'Income': [1000.0] * 3,
+                    'Loan_Amount': ['500$', '200€', '300€'],
+                }).to_csv(os.path.join(input_dir, name), index=False)
+
+            outputs = []
+            rules = CleaningRules()
+            with mock.patch.object(runner, '_process_part', wraps=runner._process_part) as process_part:
+                for _ in range(2):
+                    output_path = os.path.join(tmp, 'merged.csv')
+                    rejected_path = os.path.join(tmp, 'rejected.csv')
+                    run_pipeline(input_dir, output_path, workers=1, rules=rules, rejected_path=rejected_path,
+                                 cache_dir=os.path.join(tmp, 'cache'))
+                    outputs.append([pd.read_csv(output_path), pd.read_csv(rejected_path)])
+
+            # The second run copies both files from the cache
+            self.assertEqual(process_part.call_count, 2)
+            for first, second in zip(*outputs):
+                pd.testing.assert_frame_equal(first, second)
+            self.assertEqual(outputs[1][0]['ID'].tolist(), [1, 3, 4, 6])
+            self.assertEqual(outputs[1][1]['ID'].tolist(), [2, 5])
+
+    def test_parts_are_removed_when_a_file_fails(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_dir = os.path.join(tmp, 'input')
+            os.makedirs(input_dir)
+            with open(os.path.join(input_dir, 'broken.xlsx'), 'w', encoding='utf-8') as broken:
+                broken.write('not a workbook')
+
+            with self.assertRaises(Exception):
+                run_pipeline(input_dir, os.path.join(tmp, 'merged.csv'), workers=1)
+            self.assertEqual(os.listdir(tmp), ['input'])
+
+if __name__ == "__main__":
+    unittest.main()
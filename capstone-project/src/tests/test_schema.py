@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.cube import LoanCube
+from utils.schema import compact_frame, expand_frame, memory_saved
+from utils.scoring import score_batch
+
+class TestCompactFrame(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        rows = 3000
+        self.df = pd.DataFrame({
+            'ID': np.arange(1, rows + 1),
+            'Age': rng.integers(18, 80, rows),
+            'Gender': rng.choice(['Female', 'Male', 'Other'], rows).astype(object),
+            'Education_Level': rng.choice(['Bachelor', 'Master', 'PhD'], rows).astype(object),
+            'Marital_Status': rng.choice(['Married', 'Not Married'], rows).astype(object),
+            'Income': rng.uniform(20000, 200000, rows),
+            'Credit_Score': rng.integers(300, 851, rows).astype(np.float64),
+            'Loan_Purpose': rng.choice(['Home', 'Car', 'Business'], rows).astype(object),
+            'Debt_to_Income_Ratio': rng.uniform(0.1, 0.9, rows),
+            'Risk Rating': rng.integers(0, 3, rows).astype(np.float64),
+            'Loan_Amount': rng.uniform(1000, 100000, rows).round(2),
+        })
+
+    def test_casts_to_compact_types_and_reports_savings(self):
+        compact, report = compact_frame(self.df)
+        self.assertEqual(compact['Gender'].dtype, 'category')
+        self.assertEqual((compact['Age'].dtype, compact['Credit_Score'].dtype, compact['Risk Rating'].dtype),
+                         (np.int16, np.int16, np.int8))
+        self.assertEqual(compact['Debt_to_Income_Ratio'].dtype, np.float64)
+        # Amounts keep their cents
+        pd.testing.assert_series_equal(compact['Loan_Amount'], self.df['Loan_Amount'])
+
+        before, after, factor = memory_saved(report)
+        self.assertEqual(before, self.df.memory_usage(index=False, deep=True).sum())
+        self.assertGreater(factor, 4)
+
+    def test_expanded_frame_exports_like_the_original(self):
+        df = self.df.copy()
+        df.loc[0, 'Debt_to_Income_Ratio'] = 0.234053231
+        df.loc[1, 'Risk Rating'] = np.nan
+        expanded = expand_frame(compact_frame(df)[0])
+        self.assertEqual(expanded.to_csv(index=False), df.to_csv(index=False))
+
+    def test_keeps_columns_that_cannot_be_cast_losslessly(self):
+        df = self.df.astype({'Loan_Amount': object, 'Risk Rating': np.float64})
+        df.loc[0, 'Loan_Amount'] = '123.45XYZ'
+        df.loc[1, 'Risk Rating'] = np.nan
+        df.loc[2, 'Credit_Score'] = 700.5
+        compact = compact_frame(df)[0]
+        self.assertEqual(compact['Loan_Amount'].dtype, object)
+        self.assertEqual(compact['Risk Rating'].dtype, 'Int8')
+        self.assertEqual(compact['Credit_Score'].dtype, np.float64)
+
+    def test_downstream_results_are_unchanged(self):
+        compact = compact_frame(self.df)[0]
+        pd.testing.assert_series_equal(score_batch(compact), score_batch(self.df))
+
+        cube, compact_cube = LoanCube(self.df), LoanCube(compact)
+        cells, compact_cells = cube.select(), compact_cube.select()
+        pd.testing.assert_frame_equal(compact_cube.group_mean(compact_cells, 'Loan_Purpose', 'Loan_Amount'),
+                                      cube.group_mean(cells, 'Loan_Purpose', 'Loan_Amount'))
+        np.testing.assert_allclose(compact_cube.corr(compact_cells), cube.corr(cells), atol=1e-6)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import itertools
+import unittest
+import numpy as np
+import pandas as pd
+from utils.scoring import risk_rating, score_batch, sweep_grid
+
+class TestScoring(unittest.TestCase):
+    def test_score_batch_matches_single_applicant_rating(self):
+        rows = list(itertools.product(
+            [18, 45, 90],
+            [0.0, 60000.0, 250000.0],
+            [300.0, 575.0, 850.0],
+            [0.0, 0.35, 1.0],
+            [0.0, 75000.0, 300000.0],
+        ))
+        df = pd.DataFrame(rows, columns=['Age', 'Income', 'Credit_Score',
+                                         'Debt_to_Income_Ratio', 'Loan_Amount'])
+        expected = [risk_rating(*row) for row in rows]
+        self.assertEqual(score_batch(df).tolist(), expected)
+
+    def test_invalid_rows_are_not_scored(self):
+        df = pd.DataFrame({
+            'Age': [30, 30],
+            'Income': [50000.0, np.nan],
+            'Credit_Score': [700.0, 700.0],
+            'Debt_to_Income_Ratio': [1.5, 0.3],
+            'Loan_Amount': [100000.0, 100000.0],
+        })
+        self.assertTrue(score_batch(df).isna().all())
+
+    def test_sweep_grid_matches_single_applicant_rating(self):
+        base = {'Age': 30, 'Income': 50000.0, 'Credit_Score': 700.0, 'Debt_to_Income_Ratio': 0.3,
+                'Loan_Amount': 100000.0}
+        grid = {'Credit_Score': np.linspace(300, 850, 12), 'Debt_to_Income_Ratio': np.linspace(0, 1.2, 7),
+                'Loan_Amount': np.linspace(0, 200000, 5)}
+        ratings = sweep_grid(base, grid)
+
+        self.assertEqual(ratings.shape, (12, 7, 5))
+        for i, j, k in itertools.product(range(12), range(7), range(5)):
+            dti_ratio = grid['Debt_to_Income_Ratio'][j]
+            if dti_ratio > 1:
+                self.assertTrue(np.isnan(ratings[i, j, k]))
+            else:
+                self.assertEqual(ratings[i, j, k], risk_rating(30, 50000.0, grid['Credit_Score'][i], dti_ratio,
+                                                               grid['Loan_Amount'][k]))
+        with self.assertRaises(ValueError):
+            sweep_grid(base, {'Education_Level': ['PhD']})
+
+if __name__ == "__main__":
+    unittest.main()
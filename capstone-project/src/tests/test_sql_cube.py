@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from utils.bitmap import dashboard_index, take_rows
+from utils.cube import LoanCube
+from utils.render import box_stats
+from utils.sql_cube import ParquetLoans, SqlLoanCube, duckdb_available, use_sql_backend
+from utils.writers import frame_chunks, get_writer
+
+@unittest.skipUnless(duckdb_available(), "duckdb is not installed")
+class TestSqlLoanCube(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        rows = 3000
+        self.df = pd.DataFrame({
+            'ID': np.arange(rows),
+            'Age': rng.integers(18, 90, rows).astype(float),
+            'Education_Level': rng.choice(['Bachelor', 'Master', 'PhD'], rows),
+            'Income': rng.uniform(20000, 250000, rows),
+            'Credit_Score': rng.integers(300, 851, rows).astype(float),
+            'Loan_Purpose': rng.choice(['Home', 'Car', 'Business', 'Medical'], rows).astype(object),
+            'Debt_to_Income_Ratio': rng.uniform(0, 1, rows),
+            'Risk Rating': rng.integers(0, 3, rows).astype(float),
+            'Loan_Amount': rng.uniform(1000, 150000, rows),
+        })
+        # Missing values, including in the partition columns
+        for column in ['Age', 'Income', 'Loan_Purpose', 'Risk Rating']:
+            self.df.loc[rng.random(rows) < 0.03, column] = np.nan
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, 'loans.parquet')
+        get_writer('parquet')(frame_chunks(self.df, 700), path)
+        self.dataset = ParquetLoans(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_aggregates_match_pandas_cube(self):
+        cube = LoanCube(self.df)
+        sql_cube = SqlLoanCube(self.dataset)
+        self.assertEqual(sql_cube.options['Loan_Purpose'], sorted(cube.options['Loan_Purpose']))
+
+        for selection in [([], [], []), (['26-35', '55+'], ['PhD'], []), ([], ['Master'], ['Home', 'Car'])]:
+            cells, sql_cells = cube.select(*selection), sql_cube.select(*selection)
+            self.assertEqual(sql_cube.count(sql_cells), cube.count(cells))
+            self.assertAlmostEqual(sql_cube.mean(sql_cells, 'Loan_Amount'), cube.mean(cells, 'Loan_Amount'), places=6)
+            for by, column in [('Education_Level', 'Income'), ('Risk Rating', 'Loan_Amount'),
+                               ('Loan_Purpose', 'Loan_Amount')]:
+                pd.testing.assert_frame_equal(sql_cube.group_mean(sql_cells, by, column),
+                                              cube.group_mean(cells, by, column), rtol=1e-12)
+            pd.testing.assert_frame_equal(sql_cube.group_count(sql_cells, ['Risk Rating', 'Education_Level']),
+                                          cube.group_count(cells, ['Risk Rating', 'Education_Level']))
+            self.assertEqual(sql_cube.count_where(sql_cells, 'Risk Rating', lambda rating: rating >= 2),
+                             cube.count_where(cells, 'Risk Rating', lambda rating: rating >= 2))
+            self.assertEqual(sql_cube.mode(sql_cells, 'Loan_Purpose'), cube.mode(cells, 'Loan_Purpose'))
+            pd.testing.assert_frame_equal(sql_cube.corr(sql_cells), cube.corr(cells), rtol=1e-10)
+
+    def test_row_queries_match_pandas(self):
+        filters = {'Age_Band': ['26-35', '36-45'], 'Loan_Purpose': ['Home', 'Car']}
+        index = dashboard_index(self.df)
+        rows = take_rows(self.df, index.positions(index.select(filters)), list(self.df.columns))
+
+        expected = box_stats(rows, 'Education_Level', 'Loan_Amount')
+        expected = expected.sort_values('Education_Level').reset_index(drop=True)
+        pd.testing.assert_frame_equal(self.dataset.box_stats('Education_Level', 'Loan_Amount', filters), expected,
+                                      rtol=1e-12)
+        stats = self.dataset.box_stats('Education_Level', 'Loan_Amount', filters)
+        self.assertLessEqual(len(self.dataset.box_outliers('Education_Level', 'Loan_Amount', stats, 5, filters)), 5)
+
+        numeric = ['ID', 'Age', 'Income', 'Risk Rating', 'Loan_Amount']
+        pd.testing.assert_frame_equal(self.dataset.corr(numeric, filters), rows[numeric].corr(), rtol=1e-10)
+
+        # Partition columns keep their place in the written column order
+        self.assertEqual(self.dataset.columns, list(self.df.columns))
+        self.assertEqual(list(self.dataset.head(5).columns), list(self.df.columns))
+
+class TestSqlThreshold(unittest.TestCase):
+    def test_threshold(self):
+        self.assertFalse(use_sql_backend(10, threshold=100))
+        self.assertEqual(use_sql_backend(1000, threshold=100), duckdb_available())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import os
+import unittest
+from utils.profiling import import_times, imported_modules
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budget of each entry point in microseconds, as reported by
+# python -X importtime, about 5x the time measured on a single-core build machine
+IMPORT_BUDGETS_US = {
+    'main': 2_000_000,
+    'utils.scoring': 300_000,
+    'app': 4_000_000,
+}
+
+# Heavy modules each entry point must not load at import time
+EXCLUDED_IMPORTS = {
+    'main': ['requests', 'streamlit', 'plotly'],
+    'utils.scoring': ['pandas', 'requests', 'streamlit', 'plotly'],
+    'app': ['requests', 'plotly.express'],
+}
+
+class TestStartup(unittest.TestCase):
+    def test_entry_points_import_within_budget(self):
+        for module, budget in IMPORT_BUDGETS_US.items():
+            # Best of two runs, the first one can include reading the files from a cold disk
+            elapsed = min(import_times(module, cwd=SRC_DIR)[module] for _ in range(2))
+            self.assertLess(elapsed, budget, f"{module} took {elapsed} us to import")
+
+    def test_entry_points_only_import_what_they_use(self):
+        for module, excluded in EXCLUDED_IMPORTS.items():
+            modules = imported_modules(module, cwd=SRC_DIR)
+            self.assertIn(module, modules)
+            loaded = [name for name in excluded if name in modules]
+            self.assertEqual(loaded, [], f"{module} imports {', '.join(loaded)}")
+
+if __name__ == "__main__":
+    unittest.main()
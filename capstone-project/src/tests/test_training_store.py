@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from utils.risk_model import RiskModel
+from utils.training_store import TrainingStore
+from train import load_training_data
+
+class TestTrainingStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {'LOAN_CACHE_DIR': os.path.join(self.tmp.name, 'cache')})
+        self.env.start()
+        self.path = os.path.join(self.tmp.name, 'Dataset1.xlsx')
+        self.write_workbook(3)
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def write_workbook(self, rows):
+        pd.DataFrame({
+            'Age': [30] * rows,
+            'Income': [50000.0] * rows,
+            'Loan_Amount': ['1000$'] * rows,
+        }).to_excel(self.path, index=False)
+
+    def test_loads_once_and_reloads_when_file_changes(self):
+        store = TrainingStore([self.path])
+        with mock.patch.object(store, '_load', wraps=store._load) as load:
+            self.assertEqual(len(store.training_data()), 3)
+            store.params()
+            self.assertEqual(load.call_count, 1)
+
+            self.write_workbook(5)
+            os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 1))
+            self.assertEqual(len(store.training_data()), 5)
+            self.assertEqual(load.call_count, 2)
+
+    def test_uses_model_only_when_it_beats_the_formula(self):
+        model_path = os.path.join(self.tmp.name, 'risk_model.json')
+        for metadata, used in [({'holdout_accuracy': 0.293, 'formula_holdout_accuracy': 0.35}, False),
+                               ({'holdout_accuracy': 0.6}, False),
+                               ({'holdout_accuracy': 0.6, 'formula_holdout_accuracy': 0.35}, True)]:
+            RiskModel([0, 1, 2], np.zeros(5), np.ones(5), {'Education_Level': [], 'Loan_Purpose': []},
+                      np.zeros((5, 3)), np.zeros(3), metadata).save(model_path)
+            model = TrainingStore([self.path], model_path=model_path).params()['model']
+            self.assertEqual(model is not None, used, metadata)
+
+    def test_works_without_a_model_path(self):
+        store = TrainingStore([self.path], model_path=None)
+        self.assertIsNone(store.params()['model'])
+        self.assertEqual(len(store.training_data()), 3)
+
+    def test_training_script_merges_applicants_like_the_store(self):
+        paths = [self.path, os.path.join(self.tmp.name, 'Dataset2.xlsx')]
+        # The first applicant is in both workbooks
+        for path, ages in zip(paths, ([30, 35], [30, 45])):
+            pd.DataFrame({
+                'Age': ages,
+                'Gender': 'Male',
+                'Education_Level': 'Bachelor',
+                'Marital_Status': 'Single',
+                'Income': [50000.0, 60000.0],
+                'Credit_Score': 700,
+                'Loan_Amount': ['1000$', '2000$'],
+            }).to_excel(path, index=False)
+
+        expected = TrainingStore(paths, model_path=None).training_data()
+        pd.testing.assert_frame_equal(load_training_data(paths), expected)
+        self.assertEqual(expected['Age'].tolist(), [30, 35, 45])
+
+if __name__ == "__main__":
+    unittest.main()
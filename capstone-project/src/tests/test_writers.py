@@ -0,0 +1,75 @@
+import gzip
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from utils.ingest import write_chunks
+from utils.writers import frame_chunks, get_writer, output_stem, read_partitioned_parquet
+
+class TestWriters(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame({
+            'ID': range(1, 11),
+            'Loan_Purpose': ['Car', 'Home'] * 5,
+            'Risk Rating': [0.0, 1.0, 2.0, 1.0, 0.0] * 2,
+            'Loan_Amount': [1000.5 + i for i in range(10)],
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compressed_csv_matches_plain_csv(self):
+        csv_path = os.path.join(self.tmp.name, 'out.csv')
+        gz_path = os.path.join(self.tmp.name, 'out.csv.gz')
+        write_chunks(frame_chunks(self.df, 3), csv_path)
+        rows_written = get_writer('csv.gz')(frame_chunks(self.df, 3), gz_path)
+
+        self.assertEqual(rows_written, 10)
+        with open(csv_path, encoding='utf-8') as csv_file, gzip.open(gz_path, 'rt', encoding='utf-8') as gz_file:
+            self.assertEqual(gz_file.read(), csv_file.read())
+        with open(csv_path, encoding='utf-8') as csv_file:
+            self.assertEqual(csv_file.read(), self.df.to_csv(index=False))
+
+    def test_partitioned_parquet(self):
+        path = os.path.join(self.tmp.name, 'out.parquet')
+        rows_written = get_writer('parquet')(frame_chunks(self.df, 4), path)
+
+        self.assertEqual(rows_written, 10)
+        self.assertEqual(sorted(os.listdir(path)), ['Loan_Purpose=Car', 'Loan_Purpose=Home'])
+        loaded = pd.read_parquet(path).sort_values('ID').reset_index(drop=True)
+        self.assertEqual(loaded['ID'].tolist(), list(range(1, 11)))
+        self.assertEqual(loaded['Loan_Purpose'].astype(str).tolist(), self.df['Loan_Purpose'].tolist())
+
+        # Missing partition values are read back as NaN, in the written column order
+        with_missing = self.df.assign(**{'Risk Rating': self.df['Risk Rating'].where(self.df['ID'] != 3)})
+        get_writer('parquet')(frame_chunks(with_missing, 4), path)
+        loaded = read_partitioned_parquet(path).sort_values('ID').reset_index(drop=True)
+        self.assertEqual(list(loaded.columns), list(self.df.columns))
+        pd.testing.assert_series_equal(loaded['Risk Rating'].astype(float), with_missing['Risk Rating'])
+
+        # Writing again replaces the dataset instead of adding to it
+        get_writer('parquet')(frame_chunks(self.df.head(2)), path)
+        self.assertEqual(len(pd.read_parquet(path)), 2)
+
+    def test_parquet_columns_empty_in_the_first_chunk(self):
+        path = os.path.join(self.tmp.name, 'out.parquet')
+        df = self.df.assign(Marital_Status=[None] * 4 + ['Married'] * 6,
+                            Credit_Score=[np.nan] * 4 + [700.0] * 6,
+                            Age=[np.nan] * 4 + list(range(30, 36)))
+        get_writer('parquet')(frame_chunks(df, 4), path)
+
+        loaded = read_partitioned_parquet(path).sort_values('ID').reset_index(drop=True)
+        self.assertEqual(loaded['Marital_Status'].tolist(), df['Marital_Status'].tolist())
+        pd.testing.assert_series_equal(loaded['Credit_Score'], df['Credit_Score'])
+        pd.testing.assert_series_equal(loaded['Age'], df['Age'])
+
+    def test_unknown_format_and_stems(self):
+        with self.assertRaises(ValueError):
+            get_writer('xlsx')
+        self.assertEqual(output_stem('out/processed_data.csv.gz'), 'out/processed_data')
+        self.assertEqual(output_stem('out/processed_data.parquet'), 'out/processed_data')
+
+if __name__ == "__main__":
+    unittest.main()
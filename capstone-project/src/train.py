@@ -0,0 +1,82 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from config.settings import get_training_files
+from utils.cache import file_hash, load_processed_workbook
+from utils.merge import merge_sources
+from utils.risk_model import DEFAULT_MODEL_PATH, TARGET, fit_risk_model
+from utils.scoring import score_batch
+
+def load_training_data(paths):
+    """
+    Loads and combines the processed training workbooks.
+
+    Applicants found in several workbooks are kept once, like in the
+    calculator's TrainingStore, so the model is trained on the same rows.
+
+    Args:
+        paths (list): Paths of the training workbooks.
+
+    Returns:
+        pd.DataFrame: Processed rows of every workbook.
+    """
+    frames = [load_processed_workbook(path) for path in paths]
+    if len(frames) > 1:
+        return merge_sources(frames)[0]
+    return frames[0] if frames else pd.DataFrame()
+
+def train(paths, model_path=DEFAULT_MODEL_PATH, holdout=0.2, seed=42, l2=1.0):
+    """
+    Fits the risk model, reports its holdout accuracy and saves the artifact.
+
+    The artifact is only saved when the model is more accurate than the
+    weighted formula on the holdout rows, otherwise the calculator keeps
+    using the formula.
+
+    Args:
+        paths (list): Paths of the training workbooks.
+        model_path (str): Where to write the model artifact.
+        holdout (float): Fraction of rows kept aside to measure accuracy.
+        seed (int): Seed of the train/holdout split.
+        l2 (float): L2 regularisation strength.
+
+    Returns:
+        RiskModel: The model fitted on all rows, or None if it was not saved.
+    """
+    df = load_training_data(paths).dropna(subset=[TARGET])
+
+    # Measure accuracy on rows the model has not seen
+    test_mask = np.random.default_rng(seed).random(len(df)) < holdout
+    train_df, test_df = df[~test_mask], df[test_mask]
+    holdout_model = fit_risk_model(train_df, l2=l2)
+    model_accuracy = round(float((holdout_model.predict(test_df) == test_df[TARGET]).mean()), 4)
+    formula_accuracy = round(float((score_batch(test_df) == test_df[TARGET]).mean()), 4)
+    print(f"Holdout accuracy: model {model_accuracy:.3f}, weighted formula {formula_accuracy:.3f} "
+          f"({len(test_df)} rows)")
+    if model_accuracy <= formula_accuracy:
+        print("Model not saved: it is not more accurate than the weighted formula")
+        return None
+
+    # Refit on every row for the saved artifact
+    model = fit_risk_model(df, l2=l2, metadata={
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'sources': {path.replace('\\', '/').split('/')[-1]: file_hash(path) for path in paths},
+        'holdout_accuracy': model_accuracy,
+        'formula_holdout_accuracy': formula_accuracy,
+    })
+    model.save(model_path)
+    print(f"Risk model trained on {len(df)} rows saved to: {model_path}")
+    return model
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the risk rating model on the processed datasets.")
+    parser.add_argument("inputs", nargs="*", help="Training workbooks (defaults to Dataset1 and Dataset2)")
+    parser.add_argument("--output", default=DEFAULT_MODEL_PATH, help="Model artifact path")
+    parser.add_argument("--l2", type=float, default=1.0, help="L2 regularisation strength")
+    args = parser.parse_args()
+
+    train(args.inputs or get_training_files(), args.output, l2=args.l2)
+
+if __name__ == "__main__":
+    main()
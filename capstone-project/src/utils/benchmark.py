@@ -0,0 +1,202 @@
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+from utils.cube import LoanCube
+from utils.helpers import process_dataframe_with_currency_conversion, read_excel_with_ids, remove_empty_entries
+from utils.render import box_stats
+from utils.risk_model import fit_risk_model
+from utils.scoring import rate_applicant, score_batch
+from utils.synthetic import generate_loans
+from utils.training_store import TrainingStore
+
+# Benchmark sizes by label, the ones stored in the baseline. Larger sizes such as
+# '10M' can be run by count, the whole frame is held in memory (about 8 GB at 10M)
+SIZES = {'10k': 10_000, '1M': 1_000_000}
+
+# Default location of the stored baseline
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     'benchmarks', 'baseline.json')
+
+# Reading is only benchmarked up to this size: writing the workbook dominates
+# the run above it, and xlsx files cannot exceed 1,048,576 rows anyway
+READ_MAX_ROWS = 100_000
+
+# The risk calculator scores one applicant per call, timed over this many calls
+CALCULATOR_CALLS = 1000
+
+# Rows and gradient steps of the model scored by the calculator benchmark,
+# its accuracy does not matter, only the cost of a prediction
+MODEL_TRAINING_ROWS = 10_000
+MODEL_ITERATIONS = 50
+
+def parse_size(label):
+    """
+    Returns the row count of a size label ('10k', '1M' or a plain number).
+
+    Raises:
+        ValueError: If the label is not a known size or a number.
+    """
+    if label in SIZES:
+        return SIZES[label]
+    multipliers = {'k': 1_000, 'M': 1_000_000}
+    if label[-1:] in multipliers and label[:-1].isdigit():
+        return int(label[:-1]) * multipliers[label[-1]]
+    if label.isdigit():
+        return int(label)
+    raise ValueError(f"Unknown benchmark size: {label}")
+
+def best_time(function, repeat):
+    """Returns the fastest of repeat runs of function, in seconds."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        # The helpers print progress, which is not what is being measured
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    return min(times)
+
+def calculator_calls(df, store):
+    """
+    Scores the first CALCULATOR_CALLS rows one at a time, like the risk calculator.
+
+    Args:
+        df (pd.DataFrame): Processed loan data.
+        store (TrainingStore): Store the parameters are read from on every call, as in the app.
+    """
+    for row in df.head(CALCULATOR_CALLS).itertuples(index=False):
+        rate_applicant(row.Age, row.Income, row.Credit_Score, row.Debt_to_Income_Ratio, row.Education_Level,
+                       row.Loan_Purpose, row.Loan_Amount, store.params())
+
+def save_benchmark_model(df, path):
+    """
+    Fits a risk model on the head of df and saves it where a TrainingStore will use it.
+
+    The artifact is marked as beating the formula so the store serves it.
+    """
+    model = fit_risk_model(df.head(MODEL_TRAINING_ROWS), iterations=MODEL_ITERATIONS,
+                           metadata={'holdout_accuracy': 1.0, 'formula_holdout_accuracy': 0.0})
+    model.save(path)
+
+def dashboard_aggregations(cube):
+    """Runs the cube queries behind one dashboard render."""
+    for filters in [(None, None, None), (['26-35', '36-45'], ['Master'], ['Home', 'Car'])]:
+        cells = cube.select(*filters)
+        cube.mean(cells, 'Loan_Amount')
+        cube.mean(cells, 'Income')
+        cube.count(cells)
+        cube.group_mean(cells, 'Education_Level', 'Income')
+        cube.group_count(cells, ['Risk Rating', 'Education_Level'])
+        cube.group_mean(cells, 'Risk Rating', 'Loan_Amount')
+        cube.group_mean(cells, 'Loan_Purpose', 'Loan_Amount')
+        cube.corr(cells)
+
+def run_size(rows, repeat=3, seed=0, workdir=None, read_max_rows=READ_MAX_ROWS):
+    """
+    Times every benchmark case on a synthetic frame of the given size.
+
+    Args:
+        rows (int): Number of synthetic rows.
+        repeat (int): Runs per case, the fastest is kept.
+        seed (int): Seed of the synthetic data.
+        workdir (str, optional): Where the benchmark workbook is written. Defaults to a temp folder.
+        read_max_rows (int): Largest size for which reading a workbook is timed.
+
+    Returns:
+        dict: Seconds per case.
+    """
+    raw = generate_loans(rows, seed=seed)
+    results = {}
+
+    if rows <= read_max_rows:
+        with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+            path = os.path.join(tmp, f"loans-{rows}.xlsx")
+            raw.to_excel(path, index=False)
+            results['read_excel_with_ids'] = best_time(lambda: read_excel_with_ids(path), repeat)
+
+    results['remove_empty_entries'] = best_time(lambda: remove_empty_entries(raw), repeat)
+    cleaned = remove_empty_entries(raw)
+    results['currency_conversion'] = best_time(lambda: process_dataframe_with_currency_conversion(cleaned), repeat)
+    with contextlib.redirect_stdout(io.StringIO()):
+        processed = process_dataframe_with_currency_conversion(cleaned)
+
+    # The calculator's path without and with a trained model, training data is not loaded
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        model_path = os.path.join(tmp, 'risk_model.json')
+        formula_store = TrainingStore(paths=[], model_path=model_path)
+        results['calculate_risk_rating'] = best_time(lambda: calculator_calls(processed, formula_store), repeat)
+        save_benchmark_model(processed, model_path)
+        model_store = TrainingStore(paths=[], model_path=model_path)
+        results['calculate_risk_rating_model'] = best_time(lambda: calculator_calls(processed, model_store),
+                                                           repeat)
+    results['score_batch'] = best_time(lambda: score_batch(processed), repeat)
+    results['build_cube'] = best_time(lambda: LoanCube(processed), repeat)
+    cube = LoanCube(processed)
+    results['dashboard_aggregations'] = best_time(lambda: dashboard_aggregations(cube), repeat)
+    results['box_stats'] = best_time(lambda: box_stats(processed, 'Education_Level', 'Loan_Amount'), repeat)
+    return results
+
+def run_benchmarks(sizes, repeat=3, seed=0, workdir=None):
+    """
+    Runs the benchmark cases for every size label.
+
+    Returns:
+        dict: {size label: {case: seconds}}.
+    """
+    return {label: run_size(parse_size(label), repeat, seed, workdir) for label in sizes}
+
+def load_baseline(path=DEFAULT_BASELINE_PATH):
+    """Returns the stored baseline results, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+def save_baseline(results, path=DEFAULT_BASELINE_PATH, merge=True):
+    """
+    Stores results as the baseline, with the machine they were measured on.
+
+    Sizes that were not run keep their previous baseline when merge is set.
+    """
+    baseline = (load_baseline(path) if merge else None) or {'results': {}}
+    baseline['results'].update(results)
+    baseline['machine'] = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+    baseline['saved_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(baseline, baseline_file, indent=1, sort_keys=True)
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Compares results with a baseline.
+
+    Args:
+        results (dict): {size label: {case: seconds}} of the current run.
+        baseline (dict): Stored baseline, as returned by load_baseline.
+        threshold (float): Allowed slowdown, 0.25 flags cases more than 25% slower.
+
+    Returns:
+        list: One dict per case measured in both runs with 'size', 'case',
+        'baseline', 'current', 'ratio' and 'regression'.
+    """
+    rows = []
+    for label, cases in results.items():
+        previous = baseline.get('results', {}).get(label, {})
+        for case, seconds in cases.items():
+            if case not in previous:
+                continue
+            ratio = seconds / previous[case] if previous[case] > 0 else float('inf')
+            rows.append({'size': label, 'case': case, 'baseline': previous[case], 'current': seconds,
+                         'ratio': ratio, 'regression': ratio > 1 + threshold})
+    return rows
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from utils.cube import age_bands
+
+# Number of set bits of every byte value, to count rows without unpacking
+_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int64)
+
+class BitmapIndex:
+    """
+    Packed bitsets of the rows holding each value of the filter columns.
+
+    Built once per dataset. A filter selecting some values of several columns
+    is then resolved by OR-ing the bitsets of the selected values of each
+    column and AND-ing the columns, at 1 bit per row and value, without
+    comparing any row values again.
+    """
+
+    def __init__(self, columns):
+        """
+        Args:
+            columns (dict): Column name -> pd.Series of the row values, all of the same length.
+        """
+        self.rows = len(next(iter(columns.values()))) if columns else 0
+        self.bitmaps = {}
+        for name, series in columns.items():
+            codes, uniques = pd.factorize(series)
+            self.bitmaps[name] = {value: np.packbits(codes == code) for code, value in enumerate(uniques)}
+
+    @property
+    def nbytes(self):
+        """Memory held by the bitsets."""
+        return sum(bitmap.nbytes for bitmaps in self.bitmaps.values() for bitmap in bitmaps.values())
+
+    def _empty(self):
+        return np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+
+    def select(self, filters):
+        """
+        Returns the bitset of the rows matching every filter.
+
+        Empty or missing selections do not filter, like the dashboard multiselects.
+
+        Args:
+            filters (dict): Column name -> selected values.
+
+        Returns:
+            np.ndarray or None: Packed bitset, or None when nothing is filtered.
+        """
+        selected = None
+        for name, values in filters.items():
+            if not values:
+                continue
+            bitmaps = self.bitmaps[name]
+            column = self._empty()
+            for value in values:
+                if value in bitmaps:
+                    np.bitwise_or(column, bitmaps[value], out=column)
+            selected = column if selected is None else np.bitwise_and(selected, column, out=selected)
+        return selected
+
+    def count(self, bitmap):
+        """Number of rows in a bitset returned by select."""
+        return self.rows if bitmap is None else int(_POPCOUNT[bitmap].sum())
+
+    def positions(self, bitmap):
+        """Row positions of a bitset returned by select, or None for every row."""
+        if bitmap is None:
+            return None
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.rows))
+
+def dashboard_index(df):
+    """Bitmap index of the dashboard filters: age band, Education_Level and Loan_Purpose."""
+    return BitmapIndex({
+        'Age_Band': age_bands(df['Age']),
+        'Education_Level': df['Education_Level'],
+        'Loan_Purpose': df['Loan_Purpose'],
+    })
+
+def take_rows(df, positions, columns):
+    """
+    Gathers only the given columns of the selected rows.
+
+    Args:
+        df (pd.DataFrame): All rows.
+        positions (np.ndarray or None): Row positions from BitmapIndex.positions, None for every row.
+        columns (list): Columns needed downstream.
+
+    Returns:
+        pd.DataFrame: The columns of the selected rows, in row order.
+    """
+    if positions is None:
+        return df[columns]
+    return pd.DataFrame({column: df[column].take(positions) for column in columns})
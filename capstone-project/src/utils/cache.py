@@ -0,0 +1,312 @@
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from utils.helpers import process_dataframe_with_currency_conversion, read_excel_with_ids, remove_empty_entries
+from utils.rate_fetcher import get_rate_source
+
+# Default cache location, can be overridden with LOAN_CACHE_DIR
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                 '.cache')
+
+# Bump when the cached frame layout changes so old entries are ignored
+CACHE_VERSION = 2
+
+# Content hashes memoised by (path, size, mtime) to avoid rehashing unchanged files,
+# the least recently used are dropped beyond HASH_MEMO_MAX_ENTRIES
+HASH_MEMO_MAX_ENTRIES = 1024
+_hash_memo = OrderedDict()
+_hash_memo_lock = threading.Lock()
+
+def get_cache_dir(cache_dir=None):
+    """Returns the cache directory, creating it if needed."""
+    cache_dir = cache_dir or os.getenv('LOAN_CACHE_DIR', DEFAULT_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def file_hash(file_path, block_size=1 << 20):
+    """
+    Computes the SHA-256 hash of a file's contents.
+
+    Args:
+        file_path (str): Path to the file.
+        block_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _hash_memo_lock:
+        if memo_key in _hash_memo:
+            _hash_memo.move_to_end(memo_key)
+            return _hash_memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as source_file:
+        for block in iter(lambda: source_file.read(block_size), b''):
+            digest.update(block)
+    with _hash_memo_lock:
+        _hash_memo[memo_key] = digest.hexdigest()
+        while len(_hash_memo) > HASH_MEMO_MAX_ENTRIES:
+            _hash_memo.popitem(last=False)
+    return digest.hexdigest()
+
+def _cache_prefix(file_path, stage):
+    """Returns the cache file prefix shared by every version of a source file and stage."""
+    path_hash = hashlib.sha256(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:8]
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return f"{name}-{path_hash}-{stage}-v{CACHE_VERSION}"
+
+def _read_arrow(cache_path):
+    """Loads a cached frame by memory-mapping its Arrow IPC file."""
+    import pyarrow as pa
+
+    with pa.memory_map(cache_path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+def _write_arrow(df, cache_path):
+    """
+    Writes a frame to an Arrow IPC file, returning False if its columns cannot be typed.
+    """
+    import pyarrow as pa
+
+    try:
+        table = pa.Table.from_pandas(df)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columns mixing strings and numbers (e.g. failed conversions) are not cached
+        return False
+
+    # Write to a temporary file first so readers never see a partial cache entry
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with pa.OSFile(temp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(temp_path, cache_path)
+    return True
+
+def cached_frame(file_path, stage, build, cache_dir=None, key=None):
+    """
+    Returns the frame built from a source file, reusing a cached copy when the file is unchanged.
+
+    Entries are keyed by the SHA-256 of the file contents, so editing the file
+    invalidates its cache automatically and the stale entry is removed.
+
+    Args:
+        file_path (str): Path to the source file.
+        stage (str): Name of the processing stage being cached.
+        build (callable): Function taking file_path and returning the DataFrame.
+        cache_dir (str, optional): Cache directory to use.
+        key (str, optional): Fingerprint of any other input of build, e.g. the
+            exchange rates, a different key invalidates the entry too.
+
+    Returns:
+        pd.DataFrame: The cached or freshly built DataFrame.
+    """
+    cache_dir = get_cache_dir(cache_dir)
+    prefix = _cache_prefix(file_path, stage)
+    entry = file_hash(file_path)[:16] if key is None else f"{file_hash(file_path)[:16]}-{key}"
+    cache_path = os.path.join(cache_dir, f"{prefix}-{entry}.arrow")
+
+    if os.path.exists(cache_path):
+        return _read_arrow(cache_path)
+
+    df = build(file_path)
+    if _write_arrow(df, cache_path):
+        for stale_path in glob.glob(os.path.join(glob.escape(cache_dir), f"{glob.escape(prefix)}-*.arrow")):
+            if stale_path != cache_path:
+                os.remove(stale_path)
+    return df
+
+def cached_files(file_path, stage, build, cache_dir=None, key=None):
+    """
+    Returns the folder of files built from a source file, reusing a cached copy when the file is unchanged.
+
+    The counterpart of cached_frame for stages whose outputs are files, e.g.
+    the part file of the runner and its sidecars. Entries are keyed the same
+    way and the stale entry of the source is removed when a new one is built.
+
+    Args:
+        file_path (str): Path to the source file.
+        stage (str): Name of the processing stage being cached.
+        build (callable): Function taking an empty folder and writing the files into it.
+        cache_dir (str, optional): Cache directory to use.
+        key (str, optional): Fingerprint of any other input of build.
+
+    Returns:
+        str: Path of the cached folder. Its files must not be modified.
+    """
+    cache_dir = get_cache_dir(cache_dir)
+    prefix = _cache_prefix(file_path, stage)
+    entry = file_hash(file_path)[:16] if key is None else f"{file_hash(file_path)[:16]}-{key}"
+    folder = os.path.join(cache_dir, f"{prefix}-{entry}")
+
+    if os.path.isdir(folder):
+        return folder
+
+    # Build in a temporary folder first so readers never see a partial cache entry
+    temp_folder = tempfile.mkdtemp(prefix=f"{prefix}-", suffix='.tmp', dir=cache_dir)
+    try:
+        build(temp_folder)
+        os.replace(temp_folder, folder)
+    except OSError:
+        # Another process stored the same entry meanwhile
+        if not os.path.isdir(folder):
+            raise
+    finally:
+        shutil.rmtree(temp_folder, ignore_errors=True)
+
+    for stale_path in glob.glob(os.path.join(glob.escape(cache_dir), f"{glob.escape(prefix)}-*")):
+        if stale_path != folder and os.path.isdir(stale_path) and not stale_path.endswith('.tmp'):
+            shutil.rmtree(stale_path, ignore_errors=True)
+    return folder
+
+def _build_processed(file_path):
+    """Reads, cleans and converts a workbook."""
+    df = remove_empty_entries(read_excel_with_ids(file_path))
+    return process_dataframe_with_currency_conversion(df)
+
+def read_excel_with_ids_cached(file_path, cache_dir=None):
+    """
+    Cached version of read_excel_with_ids.
+
+    Args:
+        file_path (str): Path to the Excel file.
+        cache_dir (str, optional): Cache directory to use.
+
+    Returns:
+        pd.DataFrame: DataFrame with an added 'ID' column.
+    """
+    return cached_frame(file_path, 'raw', read_excel_with_ids, cache_dir)
+
+def load_processed_workbook(file_path, cache_dir=None):
+    """
+    Reads a workbook, removes empty entries and converts currencies, using the cache.
+
+    Entries are keyed on the exchange rates as well as the workbook, so
+    changing the rate table or source rebuilds them.
+
+    Args:
+        file_path (str): Path to the Excel file.
+        cache_dir (str, optional): Cache directory to use.
+
+    Returns:
+        pd.DataFrame: The processed DataFrame.
+    """
+    return cached_frame(file_path, 'processed', _build_processed, cache_dir, key=get_rate_source().fingerprint())
+
+def path_size(path):
+    """Size in bytes of a file, or of every file under a folder."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(folder, name)) for folder, _, names in os.walk(path) for name in names)
+
+def evict_lru_paths(directory, max_bytes, keep=None):
+    """
+    Removes the least recently used files and folders of a directory until the rest fits in max_bytes.
+
+    Entries are ordered by modification time, so users of an entry mark it
+    recently used by touching it (os.utime). Partial files (*.tmp) being
+    written and keep are never removed.
+
+    Args:
+        directory (str): Directory whose entries are evicted.
+        max_bytes (int): Maximum total size of the entries.
+        keep (str, optional): Path that must stay, e.g. the entry just written.
+
+    Returns:
+        list: Paths removed.
+    """
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            entries.append((os.stat(path).st_mtime_ns, path, path_size(path)))
+        except OSError:
+            # Removed by another process meanwhile
+            continue
+    total_bytes = sum(size for _, _, size in entries)
+
+    removed = []
+    for _, path, size in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        if path.endswith('.tmp') or (keep is not None and os.path.abspath(path) == os.path.abspath(keep)):
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+        total_bytes -= size
+        removed.append(path)
+    return removed
+
+def clear_cache(cache_dir=None):
+    """Removes every cached frame and folder from the cache directory."""
+    cache_dir = get_cache_dir(cache_dir)
+    for cache_path in glob.glob(os.path.join(glob.escape(cache_dir), '*.arrow')):
+        os.remove(cache_path)
+    for name in os.listdir(cache_dir):
+        if os.path.isdir(os.path.join(cache_dir, name)):
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+class ByteLRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by the total size of its entries.
+
+    Used to share processed uploads between Streamlit sessions. When adding an
+    entry would exceed max_bytes, the least recently used entries are evicted.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        Args:
+            max_bytes (int): Maximum total size of the cached entries.
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """Returns the cached value for key (marking it recently used), or None."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value, size):
+        """
+        Adds or replaces an entry, evicting old entries to stay under max_bytes.
+
+        Values larger than max_bytes are not cached.
+
+        Args:
+            key (hashable): Cache key, e.g. the content hash of an upload.
+            value (object): Value to cache.
+            size (int): Size of the value in bytes.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            while self._entries and self.total_bytes + size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+            self._entries[key] = (value, size)
+            self.total_bytes += size
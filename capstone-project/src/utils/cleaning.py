@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from utils.helpers import CURRENCY_COLUMNS, usd_amounts
+
+# Imputation strategies a column rule can use
+STRATEGIES = ['median', 'constant', 'ffill']
+
+# Reason codes of rejected rows
+REASON_MISSING_REQUIRED = 'missing_required'
+REASON_IMPUTE_FAILED = 'impute_failed'
+
+# Columns added to the rejected rows
+REJECTED_COLUMNS = ['reason', 'missing_columns']
+
+# Keys accepted in a column rule
+RULE_KEYS = {'required', 'impute', 'by', 'value'}
+
+class CleaningRules:
+    """
+    Per-column rules deciding which incomplete rows are kept, filled or rejected.
+
+    Every column is either required or optional. Missing values of a column
+    with an imputation strategy are filled first: 'median' (optionally per
+    group of another column, falling back to the overall median), 'constant'
+    or 'ffill'. Rows still missing a required column are rejected with a
+    reason code. Optional columns may stay empty.
+
+    Medians are taken over the frame being cleaned. When a file is cleaned
+    chunk by chunk, fit computes them over the whole file first so the result
+    does not depend on the chunk size. Currency columns hold amounts in mixed
+    currencies before conversion, so their medians are taken over the USD
+    amounts and filled by apply_converted once the rows are converted.
+
+    With the default settings (every column required, no imputation) the
+    result is the same as remove_empty_entries.
+    """
+
+    def __init__(self, columns=None, default='required'):
+        """
+        Args:
+            columns (dict, optional): Rule per column, e.g.
+                {'Income': {'impute': 'median', 'by': 'Education_Level'},
+                 'Marital_Status': {'required': False}}.
+            default (str): 'required' or 'optional', for columns without a rule.
+
+        Raises:
+            ValueError: If a rule is not valid.
+        """
+        if default not in ('required', 'optional'):
+            raise ValueError(f"Unknown default rule: {default} (expected 'required' or 'optional')")
+        self.default = default
+        self.columns = {}
+        for column, rule in (columns or {}).items():
+            unknown = set(rule) - RULE_KEYS
+            if unknown:
+                raise ValueError(f"Unknown keys in the rule of {column}: {', '.join(sorted(unknown))}")
+            if rule.get('impute') is not None and rule['impute'] not in STRATEGIES:
+                raise ValueError(f"Unknown imputation strategy for {column}: {rule['impute']} "
+                                 f"(expected one of {', '.join(STRATEGIES)})")
+            if rule.get('impute') == 'constant' and 'value' not in rule:
+                raise ValueError(f"The constant imputation of {column} needs a 'value'")
+            if 'by' in rule and rule.get('impute') != 'median':
+                raise ValueError(f"'by' is only supported by the median imputation ({column})")
+            self.columns[column] = dict(rule)
+
+    @classmethod
+    def load(cls, path):
+        """Loads rules from a JSON file with optional 'default' and 'columns' keys."""
+        with open(path, encoding='utf-8') as rules_file:
+            config = json.load(rules_file)
+        return cls(config.get('columns'), config.get('default', 'required'))
+
+    def fingerprint(self):
+        """
+        Returns a short hash of the rules, so results cleaned with them can be
+        told apart from results cleaned with other rules.
+
+        Returns:
+            str: Hex digest identifying the rules.
+        """
+        config = json.dumps({'default': self.default, 'columns': self.columns}, sort_keys=True, default=str)
+        return hashlib.sha256(config.encode('utf-8')).hexdigest()[:16]
+
+    def is_required(self, column):
+        """Whether rows missing this column are rejected."""
+        return self.columns.get(column, {}).get('required', self.default == 'required')
+
+    def median_columns(self):
+        """Columns imputed with their median, which need a pass over the whole source."""
+        return [column for column, rule in self.columns.items() if rule.get('impute') == 'median']
+
+    def converted_columns(self):
+        """Currency columns imputed with their median, filled after the currency conversion."""
+        return [column for column in self.median_columns() if column in CURRENCY_COLUMNS]
+
+    def fit(self, chunks):
+        """
+        Computes the medians of the median-imputed columns over a whole stream.
+
+        Only the present values of those columns (and their group column) are
+        kept while reading. Currency columns are converted to USD first, cells
+        that cannot be converted are left out.
+
+        Args:
+            chunks (iterable): Stream of raw DataFrames, e.g. iter_chunks of the source.
+
+        Returns:
+            dict: State to pass to apply for every chunk of the same source.
+        """
+        columns = self.median_columns()
+        values = {column: [] for column in columns}
+        for chunk in chunks:
+            for column in columns:
+                if column not in chunk.columns:
+                    continue
+                by = self.columns[column].get('by')
+                kept = chunk[[column] + ([by] if by and by in chunk.columns else [])]
+                if column in CURRENCY_COLUMNS:
+                    kept = kept.assign(**{column: usd_amounts(kept[column], column)})
+                values[column].append(kept[kept[column].notna()])
+
+        medians = {}
+        for column in columns:
+            if not values[column]:
+                continue
+            present = pd.concat(values[column], ignore_index=True)
+            if not pd.api.types.is_numeric_dtype(present[column]):
+                raise ValueError(f"The median imputation of {column} needs a numeric column, "
+                                 f"got {present[column].dtype}")
+            by = self.columns[column].get('by')
+            groups = present.groupby(by)[column].median().to_dict() if by in present.columns else {}
+            medians[column] = (present[column].median(), groups)
+        return {'medians': medians}
+
+    def _impute(self, df, column, rule, state):
+        """Returns the column with its missing values filled by the rule's strategy."""
+        series = df[column]
+        strategy = rule['impute']
+        if strategy == 'constant':
+            return series.fillna(rule['value'])
+
+        if strategy == 'ffill':
+            filled = series.ffill()
+            # Continue from the last value of the previous chunk of the same stream
+            if column in state:
+                filled = filled.fillna(state[column])
+            last = filled.last_valid_index()
+            if last is not None:
+                state[column] = filled.loc[last]
+            return filled
+
+        if column in state.get('medians', {}):
+            # Medians of the whole source, see fit
+            median, group_medians = state['medians'][column]
+            filled = series
+            if rule.get('by') and group_medians:
+                filled = filled.fillna(df[rule['by']].map(group_medians))
+            return filled.fillna(median)
+
+        if not pd.api.types.is_numeric_dtype(series):
+            raise ValueError(f"The median imputation of {column} needs a numeric column, got {series.dtype}")
+        filled = series
+        if rule.get('by'):
+            filled = filled.fillna(series.groupby(df[rule['by']]).transform('median'))
+        return filled.fillna(series.median())
+
+    def apply(self, df, state=None):
+        """
+        Cleans a DataFrame in one pass over its missing values.
+
+        Currency columns imputed with their median are left empty here and
+        filled by apply_converted after the currency conversion.
+
+        Args:
+            df (pd.DataFrame): Raw rows.
+            state (dict, optional): Carried between the chunks of one stream so
+                forward-fill continues across chunk boundaries. Start it with
+                fit to impute medians of the whole stream.
+
+        Returns:
+            tuple: (cleaned, rejected) where rejected holds the original rows that
+            were dropped plus 'reason' and 'missing_columns' (';'-separated).
+        """
+        state = {} if state is None else state
+        missing = df.isna()
+
+        cleaned = df.copy()
+        deferred = self.converted_columns()
+        imputed = [column for column in df.columns if self.columns.get(column, {}).get('impute')]
+        for column in imputed:
+            if column not in deferred and (missing[column].any() or self.columns[column]['impute'] == 'ffill'):
+                cleaned[column] = self._impute(df, column, self.columns[column], state)
+                missing[column] = cleaned[column].isna()
+
+        required = [column for column in df.columns if self.is_required(column) and column not in deferred]
+        return self._split(df, cleaned, missing, required, imputed)
+
+    def apply_converted(self, df, state=None):
+        """
+        Fills the currency columns imputed with their median, once converted to USD.
+
+        Args:
+            df (pd.DataFrame): Rows cleaned by apply and converted to USD.
+            state (dict, optional): The state passed to apply. Without medians
+                from fit, the medians of df are used.
+
+        Returns:
+            tuple: (cleaned, rejected) like apply, rejected holding the converted
+            rows a required column could not be filled in.
+        """
+        state = {} if state is None else state
+        missing = df.isna()
+        cleaned = df.copy()
+        imputed = [column for column in self.converted_columns() if column in df.columns]
+        for column in imputed:
+            if missing[column].any():
+                cleaned[column] = self._impute(df, column, self.columns[column], state)
+                missing[column] = cleaned[column].isna()
+
+        required = [column for column in imputed if self.is_required(column)]
+        return self._split(df, cleaned, missing, required, imputed)
+
+    def _split(self, df, cleaned, missing, required, imputed):
+        """Separates the rows missing a required column from the cleaned rows, see apply."""
+        required_missing = missing[required].to_numpy()
+        rejected_mask = required_missing.any(axis=1)
+
+        rejected = df[rejected_mask].copy()
+        if len(rejected):
+            # Name the missing columns once per distinct pattern instead of once per row
+            patterns = required_missing[rejected_mask]
+            codes = patterns @ (1 << np.arange(len(required), dtype=np.int64))
+            unique_codes, first = np.unique(codes, return_index=True)
+            names = {code: ';'.join(np.array(required)[patterns[row]])
+                     for code, row in zip(unique_codes, first)}
+            was_imputed = np.isin(required, imputed)
+            rejected['reason'] = np.where((patterns & was_imputed).any(axis=1),
+                                          REASON_IMPUTE_FAILED, REASON_MISSING_REQUIRED)
+            rejected['missing_columns'] = pd.Series(codes, index=rejected.index).map(names)
+        else:
+            rejected = rejected.assign(reason=pd.Series(dtype=object), missing_columns=pd.Series(dtype=object))
+        return cleaned[~rejected_mask], rejected
+
+def load_cleaning_rules(path=None):
+    """
+    Returns the cleaning rules at path or LOAN_CLEANING_RULES, or None to keep
+    remove_empty_entries (drop every incomplete row).
+    """
+    path = path or os.getenv('LOAN_CLEANING_RULES')
+    return CleaningRules.load(path) if path else None
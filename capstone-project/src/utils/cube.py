@@ -0,0 +1,157 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+# Age bands used by the dashboard filters
+AGE_BINS = [0, 25, 35, 45, 55, 100]
+AGE_LABELS = ['18-25', '26-35', '36-45', '46-55', '55+']
+
+# Cube dimensions and the numeric measures aggregated in every cell
+DIMENSIONS = ['Age_Band', 'Education_Level', 'Loan_Purpose', 'Risk Rating']
+MEASURES = ['Age', 'Income', 'Credit_Score', 'Debt_to_Income_Ratio', 'Loan_Amount', 'Risk Rating']
+
+def age_bands(ages):
+    """Bins ages into the dashboard's age ranges."""
+    return pd.cut(ages, bins=AGE_BINS, labels=AGE_LABELS)
+
+class LoanCube:
+    """
+    Pre-aggregated cube over (age band, Education_Level, Loan_Purpose, Risk Rating).
+
+    Every cell holds the row count and, for each measure, the non-null count,
+    sum and the sums of cross products with every other measure. Sums are taken
+    around the dataset mean of each measure so variances stay accurate for
+    large incomes. Filtered means, counts and correlation matrices are then
+    obtained by adding up cells instead of scanning the rows again.
+    """
+
+    def __init__(self, df):
+        """
+        Args:
+            df (pd.DataFrame): Processed loan data.
+        """
+        self.measures = [column for column in MEASURES if column in df.columns]
+        self.options = {
+            'Age_Band': age_bands(df['Age']).dropna().unique().tolist(),
+            'Education_Level': df['Education_Level'].dropna().unique().tolist(),
+            'Loan_Purpose': df['Loan_Purpose'].dropna().unique().tolist(),
+        }
+
+        values = df[self.measures].apply(pd.to_numeric, errors='coerce').astype(np.float64)
+        self.shift = values.mean()
+        centred = values - self.shift
+        complete = centred.notna().all(axis=1)
+
+        cells = pd.DataFrame({
+            'Age_Band': age_bands(df['Age']).astype(object),
+            'Education_Level': df['Education_Level'],
+            'Loan_Purpose': df['Loan_Purpose'],
+            'Risk Rating': df['Risk Rating'],
+            'count': 1,
+            'n_complete': complete.astype(np.int64),
+        }, index=df.index)
+        for column in self.measures:
+            cells[f"n|{column}"] = centred[column].notna().astype(np.int64)
+            cells[f"sum|{column}"] = centred[column].fillna(0)
+            # Sums used by the correlation only include rows where every measure is present
+            cells[f"csum|{column}"] = centred[column].where(complete, 0)
+        for first, second in itertools.combinations_with_replacement(self.measures, 2):
+            cells[f"xp|{first}|{second}"] = (centred[first] * centred[second]).where(complete, 0)
+
+        cells = cells.groupby(DIMENSIONS, dropna=False, observed=True, sort=False).sum().reset_index()
+        # Compact frames have categorical dimensions, the few cells are kept as plain values
+        for column in ['Education_Level', 'Loan_Purpose']:
+            if isinstance(cells[column].dtype, pd.CategoricalDtype):
+                cells[column] = cells[column].astype(object)
+        self.cells = cells
+        self.rows = len(df)
+
+    def select(self, age_bands=None, education_levels=None, loan_purposes=None):
+        """
+        Returns the cells matching the dashboard filters.
+
+        Empty or missing selections do not filter, like the dashboard multiselects.
+
+        Returns:
+            pd.DataFrame: Matching cube cells.
+        """
+        mask = np.ones(len(self.cells), dtype=bool)
+        for column, selected in [('Age_Band', age_bands), ('Education_Level', education_levels),
+                                 ('Loan_Purpose', loan_purposes)]:
+            if selected:
+                mask &= self.cells[column].isin(selected).to_numpy()
+        return self.cells[mask]
+
+    def count(self, cells):
+        """Number of rows in the selected cells."""
+        return int(cells['count'].sum())
+
+    def mean(self, cells, column):
+        """Mean of a measure over the selected cells, NaN if there are no values."""
+        n = cells[f"n|{column}"].sum()
+        return cells[f"sum|{column}"].sum() / n + self.shift[column] if n else np.nan
+
+    def group_mean(self, cells, by, column):
+        """
+        Mean of a measure grouped by a dimension, like df.groupby(by)[column].mean().
+
+        Returns:
+            pd.DataFrame: Columns [by, column] sorted by the group key.
+        """
+        grouped = cells.groupby(by, observed=True)[[f"n|{column}", f"sum|{column}"]].sum()
+        grouped = grouped[grouped[f"n|{column}"] > 0]
+        means = grouped[f"sum|{column}"] / grouped[f"n|{column}"] + self.shift[column]
+        return means.rename(column).reset_index()
+
+    def group_count(self, cells, by):
+        """
+        Row counts grouped by one or more dimensions.
+
+        Returns:
+            pd.DataFrame: Columns by + ['count'] for non-empty groups.
+        """
+        grouped = cells.groupby(by, observed=True)['count'].sum()
+        return grouped[grouped > 0].reset_index()
+
+    def count_where(self, cells, column, condition):
+        """Number of rows whose dimension value satisfies condition (a vectorized predicate)."""
+        return int(cells.loc[condition(cells[column]).fillna(False).to_numpy(dtype=bool), 'count'].sum())
+
+    def mode(self, cells, column):
+        """Most common value of a dimension, the smallest one on ties like Series.mode()[0]."""
+        counts = self.group_count(cells, column)
+        if counts.empty:
+            raise IndexError("No rows selected")
+        top = counts[counts['count'] == counts['count'].max()]
+        return sorted(top[column])[0]
+
+    def corr(self, cells, columns=None):
+        """
+        Pearson correlation matrix of the measures over the selected cells.
+
+        Uses the rows where every measure is present.
+
+        Args:
+            cells (pd.DataFrame): Selected cube cells.
+            columns (list, optional): Measures to include, in order. Defaults to all.
+
+        Returns:
+            pd.DataFrame: Correlation matrix like DataFrame.corr().
+        """
+        columns = list(self.measures if columns is None else columns)
+        n = cells['n_complete'].sum()
+        sums = np.array([cells[f"csum|{column}"].sum() for column in columns])
+        cross = np.empty((len(columns), len(columns)))
+        for i, first in enumerate(columns):
+            for j, second in enumerate(columns):
+                a, b = sorted([first, second], key=self.measures.index)
+                cross[i, j] = cells[f"xp|{a}|{b}"].sum()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = cross - np.outer(sums, sums) / n
+            std = np.sqrt(np.diag(covariance))
+            corr = np.clip(covariance / np.outer(std, std), -1, 1)
+        np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+        if n < 2:
+            corr[:] = np.nan
+        return pd.DataFrame(corr, index=columns, columns=columns)
@@ -1,5 +1,30 @@
+import re
+import numpy as np
 import pandas as pd
-import requests
+from utils.rate_fetcher import get_rate_source
+from utils.rates import rate_key
+
+# Columns holding monetary amounts that need to be normalised to USD
+CURRENCY_COLUMNS = ['Loan_Amount', 'Income']
+
+# Currency columns in which '$' marks USD, in the others it is not a currency marker
+USD_MARKED_COLUMNS = ['Loan_Amount']
+
+# Markers of the currencies recognised in a cell, unmarked amounts are in EUR.
+# Longer markers come first so 'R$' is read as BRL and not as USD.
+CURRENCY_MARKERS = {
+    'R$': 'BRL', 'BRL': 'BRL',
+    'C$': 'CAD', 'CAD': 'CAD',
+    '£': 'GBP', 'GBP': 'GBP',
+    'CHF': 'CHF',
+    '¥': 'JPY', 'JPY': 'JPY',
+    '€': 'EUR', 'EUR': 'EUR',
+}
+
+# Patterns used by the vectorized currency parser
+_NON_NUMERIC_PATTERN = r'[^\d.]'
+_DIGITS_PATTERN = r'^(?:\d+\.?\d*|\.\d+)$'
+_FLOAT_PATTERN = r'^[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$'
 
 # Utility functions for the capstone project
 def sample_helper():
@@ -35,63 +60,264 @@ def remove_empty_entries(df):
     """
     return df.dropna()
 
-def convert_to_usd(amount, from_currency):
+def convert_to_usd(amount, from_currency, date=None):
     """
-    Converts a given amount from a specified currency to USD using a fixed exchange rate.
+    Converts a given amount from a specified currency to USD using the exchange rate table.
 
     Args:
         amount (float): The amount to convert.
         from_currency (str): The currency code of the amount (e.g., 'EUR', 'GBP').
+        date (optional): Date the rate should apply to. Uses the latest rate if omitted.
 
     Returns:
         float: The equivalent amount in USD.
     """
-    # Fixed exchange rate: 1 EUR = 1.137300 USD
-    exchange_rate = 1.137
-
     try:
-        if from_currency == 'EUR':
-            return amount * exchange_rate
-        else:
-            raise ValueError(f"Unsupported currency: {from_currency}")
+        return amount * get_rate_source().get_rate(from_currency, date)
     except Exception as e:
         print(f"Error during currency conversion: {e}")
         return None
 
+def round_half_even(values, ndigits=2):
+    """
+    Rounds an array of floats exactly like Python's built-in round().
+
+    np.round scales by 10**ndigits before rounding, which is off by one cent for
+    values such as 122487.925. Here the scaled value is kept as an exact
+    (high, low) pair so halfway cases are decided on the true binary value.
+
+    Args:
+        values (array-like): Values to round.
+        ndigits (int): Number of decimal places.
+
+    Returns:
+        np.ndarray: Rounded float64 values.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    scale = float(10 ** ndigits)
+
+    # Split x into two halves so that each product with scale is exact
+    split = 134217729.0 * x
+    x_high = split - (split - x)
+    x_low = x - x_high
+    high = x_high * scale
+    low = x_low * scale
+
+    # Sum the halves keeping the rounding error
+    scaled = high + low
+    virtual = scaled - high
+    error = (high - (scaled - virtual)) + (low - virtual)
+
+    # Round to nearest, ties to even
+    floor = np.floor(scaled)
+    distance = ((scaled - floor) - 0.5) + error
+    round_up = (distance > 0) | ((distance == 0) & (np.fmod(floor, 2) != 0))
+    rounded = np.where(round_up, floor + 1, floor) / scale
+
+    with np.errstate(invalid='ignore'):
+        return np.where(np.isfinite(x), np.copysign(rounded, x), x)
+
+def _cell_currencies(series, dollar_aware):
+    """Returns the currency code of every cell from its first marker, EUR when unmarked."""
+    if pd.api.types.is_numeric_dtype(series):
+        # Plain numbers carry no marker
+        return np.full(len(series), 'EUR', dtype=object)
+    currencies = np.full(len(series), 'EUR', dtype=object)
+    # Only text cells can carry a marker, columns mixing numbers and text are mostly numbers
+    is_text = np.fromiter((isinstance(value, str) for value in series.to_numpy()), dtype=bool, count=len(series))
+    if is_text.any():
+        markers = list(CURRENCY_MARKERS) + (['$'] if dollar_aware else [])
+        pattern = '(' + '|'.join(re.escape(marker) for marker in markers) + ')'
+        found = series[is_text].str.extract(pattern, expand=False)
+        currencies[is_text] = found.map(dict(CURRENCY_MARKERS, **{'$': 'USD'})).fillna('EUR').to_numpy(dtype=object)
+    return currencies
+
+def _parse_currency_column(series, dollar_aware):
+    """
+    Parses a column of currency strings into rounded amounts in their own currency.
+
+    Args:
+        series (pd.Series): Raw column values (strings or numbers).
+        dollar_aware (bool): Whether values marked with '$' are already in USD.
+
+    Returns:
+        tuple: (amounts, valid, currencies) where amounts is a float64 array, valid
+        is a boolean mask of the cells that could be parsed and currencies holds
+        the currency code of every parsed cell (None elsewhere).
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        # Plain numbers are unmarked amounts, rounded directly instead of parsed as text
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = np.isfinite(values)
+        amounts = np.full(len(values), np.nan)
+        amounts[valid] = round_half_even(values[valid])
+        currencies = np.where(valid, 'EUR', None).astype(object)
+        return amounts, valid, currencies
+
+    text = series.astype(str)
+    amounts = np.full(len(text), np.nan)
+    valid = np.zeros(len(text), dtype=bool)
+
+    currencies = _cell_currencies(series, dollar_aware)
+    is_usd = currencies == 'USD'
+
+    # USD values: strip the marker and parse as a plain float
+    if is_usd.any():
+        usd_text = text[is_usd].str.replace('$', '', regex=False).str.strip()
+        usd_ok = usd_text.str.match(_FLOAT_PATTERN).to_numpy()
+        usd_idx = np.flatnonzero(is_usd)[usd_ok]
+        amounts[usd_idx] = round_half_even(usd_text[usd_ok].astype(np.float64).to_numpy())
+        valid[usd_idx] = True
+
+    # Other currencies: keep digits and dots only, converted with a single multiply later
+    other = ~is_usd
+    if other.any():
+        other_text = text[other].str.replace(_NON_NUMERIC_PATTERN, '', regex=True)
+        other_ok = other_text.str.match(_DIGITS_PATTERN).to_numpy()
+        other_idx = np.flatnonzero(other)[other_ok]
+        amounts[other_idx] = round_half_even(other_text[other_ok].astype(np.float64).to_numpy())
+        valid[other_idx] = True
+
+    currencies[~valid] = None
+    return amounts, valid, currencies
+
+def _currency_rates(currencies, dates, rates):
+    """
+    Returns the USD rate of every row, looking every distinct (currency, date) pair up in one call.
+
+    Args:
+        currencies (np.ndarray): Currency code of each row.
+        dates (pd.Series or None): Date of each row, None uses the latest rates.
+        rates: Rate source with a get_rates(pairs, skip_missing) method, see get_rate_source.
+
+    Returns:
+        np.ndarray: Rate per row, NaN where the source has no rate for the currency.
+    """
+    if dates is None:
+        codes, distinct = pd.factorize(currencies)
+        pairs = [(currency, None) for currency in distinct]
+    else:
+        days = pd.Series(pd.to_datetime(dates).dt.normalize().to_numpy())
+        codes, distinct = pd.MultiIndex.from_arrays([currencies, days]).factorize()
+        pairs = list(distinct)
+    looked_up = rates.get_rates(pairs, skip_missing=True)
+    # Pairs unknown to the rate source are NaN, their rows are quarantined
+    distinct_rates = np.array([looked_up.get(rate_key(*pair), np.nan) for pair in pairs], dtype=np.float64)
+    return distinct_rates[codes]
+
+def usd_amounts(series, column, rates=None):
+    """
+    Converts the cells of one currency column to USD, each from its marked currency.
+
+    Unlike convert_currency_columns nothing is quarantined: cells that cannot be
+    parsed or have no exchange rate are NaN.
+
+    Args:
+        series (pd.Series): Raw values of the column.
+        column (str): One of CURRENCY_COLUMNS, decides whether '$' marks USD.
+        rates (optional): Rate source with a get_rates(pairs) method. Defaults to get_rate_source().
+
+    Returns:
+        np.ndarray: Float64 amounts in USD.
+    """
+    amounts, ok, currencies = _parse_currency_column(series, column in USD_MARKED_COLUMNS)
+    foreign = ok & (currencies != 'USD')
+    if foreign.any():
+        row_rates = _currency_rates(currencies[foreign], None, rates or get_rate_source())
+        amounts[foreign] = round_half_even(amounts[foreign] * row_rates)
+    return amounts
+
+def convert_currency_columns(df, rates=None, date_column=None):
+    """
+    Converts the 'Loan_Amount' and 'Income' columns to USD, all or nothing per row.
+
+    The currency of each cell is read from its marker (see CURRENCY_MARKERS):
+    values marked with '$' in 'Loan_Amount' are kept in USD, '£' or 'GBP' are
+    converted from GBP and so on; unmarked values are treated as EUR. Empty
+    cells stay empty. A row is only converted if every currency cell in it can
+    be parsed and has a rate; otherwise the whole row goes to the quarantine
+    with its original values, so no row is ever half converted.
+
+    Exchange rates are looked up once per distinct (currency, date) pair.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame with 'Loan_Amount' and 'Income' columns.
+        rates (optional): Rate source with a get_rates(pairs) method. Defaults to get_rate_source().
+        date_column (str, optional): Column with the date each row's rates apply to.
+            Uses the latest rates if omitted.
+
+    Returns:
+        tuple: (processed_df, quarantine_df) where processed_df holds the converted
+        rows (currency columns as float64) and quarantine_df the raw rows that
+        failed, plus 'error' and 'failed_columns' (';'-separated).
+    """
+    failed = {}
+    amounts = {}
+    currencies = {}
+    foreign = {}
+    for column in CURRENCY_COLUMNS:
+        amounts[column], ok, currencies[column] = _parse_currency_column(df[column], column in USD_MARKED_COLUMNS)
+        failed[column] = ~ok & df[column].notna().to_numpy()
+        foreign[column] = ok & (currencies[column] != 'USD')
+
+    # Amounts of both columns not already in USD are converted with one lookup per pair
+    no_rate = {column: np.zeros(len(df), dtype=bool) for column in CURRENCY_COLUMNS}
+    if any(mask.any() for mask in foreign.values()):
+        dates = None if date_column is None else df[date_column].reset_index(drop=True)
+        row_rates = _currency_rates(
+            np.concatenate([currencies[column][foreign[column]] for column in CURRENCY_COLUMNS]),
+            None if dates is None else pd.concat([dates[foreign[column]] for column in CURRENCY_COLUMNS]),
+            rates or get_rate_source())
+        start = 0
+        for column in CURRENCY_COLUMNS:
+            mask = foreign[column]
+            rate = row_rates[start:start + mask.sum()]
+            start += mask.sum()
+            amounts[column][mask] = round_half_even(amounts[column][mask] * rate)
+            no_rate[column][mask] = np.isnan(rate)
+
+    row_failed = np.zeros(len(df), dtype=bool)
+    for column in CURRENCY_COLUMNS:
+        row_failed |= failed[column] | no_rate[column]
+    processed_df = df[~row_failed].copy()
+    for column in CURRENCY_COLUMNS:
+        processed_df[column] = amounts[column][~row_failed]
+
+    quarantine_df = df[row_failed].copy()
+    if len(quarantine_df):
+        def failed_in(masks):
+            columns = pd.Series('', index=df.index[row_failed])
+            for column in CURRENCY_COLUMNS:
+                columns[masks[column][row_failed]] += f";{column}"
+            return columns.str.lstrip(';')
+
+        unparsed, unrated = failed_in(failed), failed_in(no_rate)
+        parse_error = ("Could not parse " + unparsed.str.replace(';', ', ')).where(unparsed != '', '')
+        rate_error = ("No exchange rate for " + unrated.str.replace(';', ', ')).where(unrated != '', '')
+        quarantine_df['error'] = (parse_error + '; ' + rate_error).str.strip('; ')
+        quarantine_df['failed_columns'] = failed_in({column: failed[column] | no_rate[column]
+                                                     for column in CURRENCY_COLUMNS})
+    else:
+        quarantine_df = quarantine_df.assign(error=pd.Series(dtype=object), failed_columns=pd.Series(dtype=object))
+
+    return processed_df, quarantine_df
+
 def process_dataframe_with_currency_conversion(df):
     """
     Processes a DataFrame to convert the 'Loan_Amount' and 'Income' columns to USD.
 
+    Rows that cannot be fully converted are left out (see convert_currency_columns
+    to get them back).
+
     Args:
         df (pd.DataFrame): The input DataFrame with 'Loan_Amount' and 'Income' columns.
 
     Returns:
         pd.DataFrame: The processed DataFrame with converted values.
     """
-    for index, row in df.iterrows():
-        try:
-            # Process 'Loan_Amount'
-            loan_str = str(row['Loan_Amount'])
-            if '$' in loan_str:
-                # Handle USD values
-                loan_amount = float(loan_str.replace('$', '').strip())
-                df.at[index, 'Loan_Amount'] = round(loan_amount, 2)
-            else:
-                # Handle EUR values
-                # Remove € symbol and any other non-numeric characters except dot
-                loan_str = ''.join(c for c in loan_str if c.isdigit() or c == '.')
-                # Convert to float and round to 2 decimal places
-                loan_amount = round(float(loan_str), 2)
-                df.at[index, 'Loan_Amount'] = round(convert_to_usd(loan_amount, 'EUR'), 2)
-
-            # Process 'Income'
-            income_str = str(row['Income'])
-            # Remove € symbol and any other non-numeric characters except dot
-            income_str = ''.join(c for c in income_str if c.isdigit() or c == '.')
-            income = round(float(income_str), 2)
-            df.at[index, 'Income'] = round(convert_to_usd(income, 'EUR'), 2)
-            
-        except Exception as e:
-            print(f"Error processing row {index}: {e}")
+    processed_df, quarantine_df = convert_currency_columns(df)
 
-    return df
+    if not quarantine_df.empty:
+        print(f"Quarantined {len(quarantine_df)} row(s) whose currency values could not be converted")
+
+    return processed_df
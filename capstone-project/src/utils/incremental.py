@@ -0,0 +1,369 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from utils.cache import file_hash
+from utils.helpers import convert_currency_columns, remove_empty_entries
+from utils.ingest import DEFAULT_CHUNKSIZE, iter_chunks
+from utils.rate_fetcher import get_rate_source
+from utils.runner import discover_input_files
+
+# Bump when the manifest or store layout changes, older state is then rebuilt
+MANIFEST_VERSION = 2
+
+# Column holding the content hash of each raw row in the store
+HASH_COLUMN = '_row_hash'
+
+def row_hashes(df):
+    """
+    Computes a 64-bit content hash for every row of a DataFrame.
+
+    Args:
+        df (pd.DataFrame): Raw rows, without the positional 'ID' column.
+
+    Returns:
+        np.ndarray: uint64 hash per row.
+    """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+def partition_key(hashes, start, rates):
+    """
+    Identifies a partition of a source by its rows, its position and the exchange rates used.
+
+    Args:
+        hashes (np.ndarray): Content hash of every row, see row_hashes.
+        start (int): Position of the partition's first row in the source.
+        rates (str): Fingerprint of the exchange rates.
+
+    Returns:
+        str: Hex digest, equal only for partitions that give the same output.
+    """
+    digest = hashlib.sha256(np.ascontiguousarray(hashes, dtype=np.uint64).tobytes())
+    digest.update(f"|{start}|{rates}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def _store_dir(state_dir, source):
+    """Returns the folder holding the processed partitions of a source file."""
+    path_hash = hashlib.sha256(os.path.abspath(source).encode('utf-8')).hexdigest()[:8]
+    name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(state_dir, 'store', f"{name}-{path_hash}")
+
+def _partition_path(store_dir, index):
+    return os.path.join(store_dir, f"{index:05d}.pkl")
+
+def load_manifest(state_dir):
+    """Loads the manifest, returning an empty one if missing or outdated."""
+    path = os.path.join(state_dir, 'manifest.json')
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    return {'version': MANIFEST_VERSION, 'rates': None, 'sources': {}, 'output': None}
+
+def save_manifest(state_dir, manifest):
+    """Writes the manifest atomically."""
+    path = os.path.join(state_dir, 'manifest.json')
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1)
+    os.replace(f"{path}.tmp", path)
+
+def load_partition(store_dir, index):
+    """
+    Loads one stored partition.
+
+    Returns:
+        dict: 'rows' (processed rows with their hash), 'quarantine' (raw rows that
+        could not be converted, with their hash and error) and 'dropped' (hashes
+        of the rows removed by remove_empty_entries).
+    """
+    return pd.read_pickle(_partition_path(store_dir, index))
+
+def _save_partition(store_dir, index, partition):
+    path = _partition_path(store_dir, index)
+    pd.to_pickle(partition, f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+
+def _previous_results(store_dir, count, reuse):
+    """
+    Indexes the stored results of a source by row hash.
+
+    Args:
+        store_dir (str): Folder of the source's partitions.
+        count (int): Number of stored partitions.
+        reuse (bool): Whether the stored results may be reused, False when the
+            exchange rates changed since they were converted.
+
+    Returns:
+        tuple: (rows, quarantine, dropped, hashes) where rows and quarantine are
+        indexed by hash, dropped is a set of hashes and hashes holds every hash stored.
+    """
+    rows, quarantine, dropped = [], [], set()
+    for index in range(count):
+        if os.path.exists(_partition_path(store_dir, index)):
+            partition = load_partition(store_dir, index)
+            rows.append(partition['rows'])
+            quarantine.append(partition['quarantine'])
+            dropped.update(partition['dropped'])
+    rows = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=[HASH_COLUMN, 'ID'])
+    quarantine = (pd.concat(quarantine, ignore_index=True) if quarantine
+                  else pd.DataFrame(columns=[HASH_COLUMN, 'ID']))
+    hashes = set(rows[HASH_COLUMN]) | set(quarantine[HASH_COLUMN]) | dropped
+    if not reuse:
+        return rows.iloc[0:0].set_index(HASH_COLUMN), quarantine.iloc[0:0].set_index(HASH_COLUMN), set(), hashes
+    # Identical rows share the same result
+    return (rows.drop_duplicates(HASH_COLUMN).set_index(HASH_COLUMN),
+            quarantine.drop_duplicates(HASH_COLUMN).set_index(HASH_COLUMN), dropped, hashes)
+
+def _reuse(previous, hashes, ids):
+    """Returns the stored results of hashes with the rows' current IDs."""
+    reused = previous.loc[hashes].reset_index()
+    reused['ID'] = ids
+    return reused
+
+def update_source(source, store_dir, partitions=None, previous_rows=0, rates=None, reuse=True,
+                  chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Brings the processed partitions of one source file up to date.
+
+    The source is read in partitions of chunksize rows. Partitions whose rows
+    and exchange rates are unchanged are left as they are. In the others, rows
+    whose content hash is already stored reuse their result and only get their
+    'ID' refreshed; only rows with a new hash go through remove_empty_entries
+    and the currency conversion. Rows that cannot be converted are kept in the
+    partition's quarantine and retried once they change.
+
+    Args:
+        source (str): Input file path.
+        store_dir (str): Folder of the source's processed partitions.
+        partitions (list, optional): Manifest entries of the stored partitions.
+        previous_rows (int): Rows read from the source on the previous run. New
+            rows after that position count as appended, the others as changed.
+        rates (optional): Rate source with get_rates and fingerprint methods. Defaults to get_rate_source().
+        reuse (bool): Whether stored results may be reused, False when they were
+            converted with other exchange rates.
+        chunksize (int): Maximum number of rows per partition.
+
+    Returns:
+        tuple: (partitions, stats) where partitions are the new manifest entries,
+        each with its 'key', 'rows' and 'quarantined' counts, and stats holds the row
+        counts 'rows_read', 'rows_stored', 'appended', 'changed', 'deleted',
+        'converted' and 'quarantined'.
+    """
+    rates = rates or get_rate_source()
+    fingerprint = rates.fingerprint()
+    partitions = partitions or []
+    os.makedirs(store_dir, exist_ok=True)
+
+    previous = None
+    new_partitions = []
+    seen_hashes = set()
+    stats = {'rows_read': 0, 'appended': 0, 'changed': 0, 'converted': 0}
+    for index, chunk in enumerate(iter_chunks(source, chunksize)):
+        hashes = pd.Series(row_hashes(chunk), index=chunk.index)
+        key = partition_key(hashes.to_numpy(), stats['rows_read'], fingerprint)
+        seen_hashes.update(hashes.tolist())
+        stats['rows_read'] += len(chunk)
+        if (index < len(partitions) and partitions[index]['key'] == key
+                and os.path.exists(_partition_path(store_dir, index))):
+            new_partitions.append(partitions[index])
+            continue
+
+        if previous is None:
+            previous = _previous_results(store_dir, len(partitions), reuse)
+        rows, quarantine, dropped, _ = previous
+        ids = chunk.index.to_numpy() + 1
+        chunk['ID'] = ids
+
+        # Unchanged rows: reuse the stored result with the row's current ID
+        stored_rows = hashes.isin(rows.index).to_numpy()
+        stored_quarantine = hashes.isin(quarantine.index).to_numpy() & ~stored_rows
+        known = stored_rows | stored_quarantine | hashes.isin(dropped).to_numpy()
+        parts = [_reuse(rows, hashes[stored_rows].to_numpy(), ids[stored_rows])] if stored_rows.any() else []
+        quarantined = ([_reuse(quarantine, hashes[stored_quarantine].to_numpy(), ids[stored_quarantine])]
+                       if stored_quarantine.any() else [])
+        partition_dropped = set(hashes[known & ~stored_rows & ~stored_quarantine].tolist())
+
+        # New or changed rows: clean and convert only these
+        delta = chunk[~known]
+        if len(delta):
+            stats['appended'] += int((delta['ID'] > previous_rows).sum())
+            stats['changed'] += int((delta['ID'] <= previous_rows).sum())
+            cleaned = remove_empty_entries(delta)
+            partition_dropped.update(hashes[delta.index.difference(cleaned.index)].tolist())
+            if len(cleaned):
+                converted, failed = convert_currency_columns(cleaned, rates)
+                converted.insert(0, HASH_COLUMN, hashes.loc[converted.index].to_numpy())
+                parts.append(converted.reset_index(drop=True))
+                failed.insert(0, HASH_COLUMN, hashes.loc[failed.index].to_numpy())
+                quarantined.append(failed.reset_index(drop=True))
+                stats['converted'] += len(converted)
+
+        partition = {
+            'rows': _sorted_by_id(parts, rows),
+            'quarantine': _sorted_by_id(quarantined, quarantine),
+            'dropped': sorted(partition_dropped),
+        }
+        _save_partition(store_dir, index, partition)
+        new_partitions.append({'key': key, 'rows': len(partition['rows']),
+                               'quarantined': len(partition['quarantine'])})
+
+    # Partitions past the end of the source were deleted
+    if len(new_partitions) < len(partitions) and previous is None:
+        previous = _previous_results(store_dir, len(partitions), reuse)
+    for index in range(len(new_partitions), len(partitions)):
+        if os.path.exists(_partition_path(store_dir, index)):
+            os.remove(_partition_path(store_dir, index))
+
+    stats['deleted'] = len(previous[3] - seen_hashes) if previous is not None else 0
+    stats['rows_stored'] = sum(partition['rows'] for partition in new_partitions)
+    stats['quarantined'] = sum(partition['quarantined'] for partition in new_partitions)
+    return new_partitions, stats
+
+def _sorted_by_id(parts, template):
+    """Concatenates result parts in ID order, or returns an empty frame like template."""
+    if not parts:
+        return template.iloc[0:0].reset_index()
+    return pd.concat(parts, ignore_index=True).sort_values('ID', kind='stable').reset_index(drop=True)
+
+def _segments(sources, manifest):
+    """Lists the output segments, one per partition, as [source, index, key, ID offset]."""
+    segments = []
+    offset = 0
+    for source in sources:
+        entry = manifest['sources'][source]
+        segments.extend([source, index, partition['key'], offset] for index, partition in
+                        enumerate(entry['partitions']))
+        offset += entry['rows_read']
+    return segments
+
+def export_store(sources, manifest, output_path):
+    """
+    Brings the merged CSV up to date, rewriting it only from the first changed partition on.
+
+    The manifest records where every partition ends in the file. Partitions
+    before the first one that changed (or moved to another ID offset) are kept
+    as they are; the file is truncated there and the remaining partitions are
+    appended, with IDs offset by the rows read from the previous files like
+    run_pipeline does.
+
+    Args:
+        sources (list): Input files in output order.
+        manifest (dict): Manifest holding the partitions of every source, updated
+            with the new layout of the output under 'output'.
+        output_path (str): Path of the merged CSV file.
+
+    Returns:
+        int: Number of rows written by this call.
+    """
+    segments = _segments(sources, manifest)
+    written = (manifest.get('output') or {}).get('segments', [])
+    keep = 0
+    if os.path.exists(output_path) and written and os.path.getsize(output_path) == written[-1][-1]:
+        while keep < min(len(segments), len(written)) and written[keep][:4] == segments[keep]:
+            keep += 1
+    end = written[keep - 1][-1] if keep else 0
+
+    rows_written = 0
+    with open(output_path, 'r+b' if end else 'wb') as output_file:
+        output_file.truncate(end)
+        output_file.seek(end)
+        for segment in segments[keep:]:
+            source, index, _, offset = segment
+            rows = load_partition(manifest['sources'][source]['store'], index)['rows']
+            if len(rows):
+                rows = rows.drop(columns=[HASH_COLUMN])
+                rows['ID'] += offset
+                output_file.write(rows.to_csv(index=False, header=output_file.tell() == 0).encode('utf-8'))
+                rows_written += len(rows)
+            segment.append(output_file.tell())
+    manifest['output'] = {'segments': written[:keep] + segments[keep:]}
+    return rows_written
+
+def export_quarantine(sources, manifest, quarantine_path):
+    """
+    Writes the rows of every source that could not be converted, with global IDs.
+
+    The file is removed when no row is quarantined.
+
+    Returns:
+        int: Number of rows written.
+    """
+    chunks = []
+    for source, index, _, offset in _segments(sources, manifest):
+        entry = manifest['sources'][source]
+        if entry['partitions'][index]['quarantined']:
+            quarantine = load_partition(entry['store'], index)['quarantine'].drop(columns=[HASH_COLUMN])
+            quarantine['ID'] += offset
+            chunks.append(quarantine)
+    if not chunks:
+        if os.path.exists(quarantine_path):
+            os.remove(quarantine_path)
+        return 0
+    pd.concat(chunks, ignore_index=True).to_csv(quarantine_path, index=False, encoding='utf-8')
+    return sum(len(chunk) for chunk in chunks)
+
+def run_incremental(input_dir, output_path, state_dir=None, chunksize=DEFAULT_CHUNKSIZE, quarantine_path=None,
+                    rates=None):
+    """
+    Updates output_path with only the rows that changed since the previous run.
+
+    A manifest in state_dir records the hash of every source file, the
+    fingerprint of the exchange rates and the partitions each file's processed
+    rows are stored in. Unchanged files are skipped without being read,
+    changed files only convert their new or modified rows, and files that
+    disappeared are dropped from the output. When the exchange rates change,
+    every row is converted again.
+
+    Args:
+        input_dir (str): Directory containing the loan files.
+        output_path (str): Path of the merged CSV file.
+        state_dir (str, optional): Where the manifest and store live. Defaults to
+            a '.incremental' folder next to output_path.
+        chunksize (int): Maximum number of rows per partition.
+        quarantine_path (str, optional): CSV file receiving the rows that could not
+            be converted, only written when there are some.
+        rates (optional): Rate source with get_rates and fingerprint methods. Defaults to get_rate_source().
+
+    Returns:
+        dict: Per-source status and row counts.
+    """
+    state_dir = state_dir or os.path.join(os.path.dirname(os.path.abspath(output_path)), '.incremental')
+    os.makedirs(state_dir, exist_ok=True)
+    manifest = load_manifest(state_dir)
+    rates = rates or get_rate_source()
+    fingerprint = rates.fingerprint()
+    sources = [os.path.abspath(source) for source in discover_input_files(input_dir)]
+    summary = {}
+
+    for source in sources:
+        content_hash = file_hash(source)
+        entry = manifest['sources'].get(source)
+        if (entry and entry['hash'] == content_hash and manifest['rates'] == fingerprint
+                and os.path.isdir(entry['store'])):
+            summary[source] = {'status': 'unchanged', 'rows_read': entry['rows_read']}
+            continue
+
+        store_dir = entry['store'] if entry else _store_dir(state_dir, source)
+        partitions, stats = update_source(source, store_dir, entry['partitions'] if entry else None,
+                                          entry['rows_read'] if entry else 0, rates,
+                                          manifest['rates'] == fingerprint, chunksize)
+        manifest['sources'][source] = {'hash': content_hash, 'rows_read': stats['rows_read'], 'store': store_dir,
+                                       'partitions': partitions}
+        summary[source] = dict(stats, status='updated' if entry else 'new')
+    manifest['rates'] = fingerprint
+
+    for source in sorted(set(manifest['sources']) - set(sources)):
+        entry = manifest['sources'].pop(source)
+        shutil.rmtree(entry['store'], ignore_errors=True)
+        summary[source] = {'status': 'removed'}
+
+    changed = any(result['status'] != 'unchanged' for result in summary.values())
+    if changed or not os.path.exists(output_path):
+        export_store(sources, manifest, output_path)
+        if quarantine_path is not None:
+            export_quarantine(sources, manifest, quarantine_path)
+    save_manifest(state_dir, manifest)
+    return summary
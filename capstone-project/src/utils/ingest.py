@@ -0,0 +1,352 @@
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+from utils.helpers import convert_currency_columns, remove_empty_entries
+from utils.profiling import timed, timed_stage
+
+# Number of rows held in memory at a time by the streaming reader
+DEFAULT_CHUNKSIZE = 50000
+
+# Numeric columns that may contain empty cells. They are always read as float64
+# so every chunk has the same types as a full pd.read_excel of the file.
+FLOAT_COLUMNS = ['Credit_Score', 'Debt_to_Income_Ratio', 'Risk Rating']
+
+def _file_type(source, file_type=None):
+    """Returns the lower-case file extension of a path or uploaded file."""
+    if file_type:
+        return file_type.lower().lstrip('.')
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+    return os.path.splitext(str(name))[1].lower().lstrip('.')
+
+def _normalise_chunk(chunk):
+    """Casts the nullable numeric columns so that dtypes do not vary between chunks."""
+    columns = {column: 'float64' for column in FLOAT_COLUMNS if column in chunk.columns}
+    return chunk.astype(columns)
+
+def _iter_excel_chunks(source, chunksize):
+    """Yields row chunks from the first sheet of an xlsx file using openpyxl read-only mode."""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [f"Unnamed: {i}" if name is None else name for i, name in enumerate(header)]
+
+        buffer = []
+        empty_rows = 0
+        for row in rows:
+            # Blank rows are kept only if data follows them, like pd.read_excel does
+            if all(value is None for value in row):
+                empty_rows += 1
+                continue
+            buffer.extend([(None,) * len(header)] * empty_rows)
+            empty_rows = 0
+            buffer.append(row[:len(header)])
+            if len(buffer) >= chunksize:
+                yield pd.DataFrame.from_records(buffer[:chunksize], columns=header)
+                buffer = buffer[chunksize:]
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=header)
+    finally:
+        workbook.close()
+
+def _iter_parquet_chunks(source, chunksize):
+    """Yields row chunks from a Parquet file one record batch at a time."""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(source)
+    for batch in parquet_file.iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+def iter_chunks(source, chunksize=DEFAULT_CHUNKSIZE, file_type=None):
+    """
+    Reads an xlsx, CSV or Parquet file as a stream of fixed-size row chunks.
+
+    Args:
+        source (str or file-like): Path or open file to read.
+        chunksize (int): Maximum number of rows per chunk.
+        file_type (str, optional): 'xlsx', 'csv' or 'parquet'. Inferred from the name if omitted.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows.
+    """
+    kind = _file_type(source, file_type)
+    if kind in ('xlsx', 'xlsm'):
+        chunks = _iter_excel_chunks(source, chunksize)
+    elif kind == 'csv':
+        chunks = pd.read_csv(source, chunksize=chunksize)
+    elif kind == 'parquet':
+        chunks = _iter_parquet_chunks(source, chunksize)
+    else:
+        raise ValueError(f"Unsupported file type: {kind or source}")
+
+    # Keep a global row index so chunks can be concatenated like a full read
+    start = 0
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield _normalise_chunk(chunk)
+
+def iter_chunks_with_ids(source, chunksize=DEFAULT_CHUNKSIZE, file_type=None, start_id=1):
+    """
+    Reads a file in chunks and adds a sequential 'ID' that continues across chunks.
+
+    The IDs are the same as the ones read_excel_with_ids assigns to the whole file.
+
+    Args:
+        source (str or file-like): Path or open file to read.
+        chunksize (int): Maximum number of rows per chunk.
+        file_type (str, optional): 'xlsx', 'csv' or 'parquet'.
+        start_id (int): ID of the first row.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows with an 'ID' column.
+    """
+    next_id = start_id
+    for chunk in iter_chunks(source, chunksize, file_type):
+        chunk['ID'] = range(next_id, next_id + len(chunk))
+        next_id += len(chunk)
+        yield chunk
+
+def fit_rules(source, rules, chunksize=DEFAULT_CHUNKSIZE, file_type=None):
+    """
+    Reads a file once to compute the medians its cleaning rules impute.
+
+    Args:
+        source (str or file-like): Path or open file, rewound afterwards.
+        rules (CleaningRules, optional): Cleaning rules.
+        chunksize (int): Maximum number of rows per chunk.
+        file_type (str, optional): 'xlsx', 'csv' or 'parquet'.
+
+    Returns:
+        dict or None: Initial state for clean_chunks, None when the rules impute no median.
+    """
+    if rules is None or not rules.median_columns():
+        return None
+    state = rules.fit(iter_chunks(source, chunksize, file_type))
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return state
+
+def clean_chunks(chunks, rules=None, rejected_path=None, state=None):
+    """
+    Cleans each chunk of a stream.
+
+    Args:
+        chunks (iterable): Stream of raw DataFrames.
+        rules (CleaningRules, optional): Per-column rules. Without rules,
+            remove_empty_entries drops every incomplete row.
+        rejected_path (str, optional): CSV sidecar receiving the rows rejected by
+            the rules, with their reason codes.
+        state (dict, optional): Initial cleaning state, see fit_rules. Without it,
+            medians are imputed per chunk.
+
+    Yields:
+        pd.DataFrame: The cleaned chunks.
+    """
+    if rules is None:
+        for chunk in chunks:
+            yield remove_empty_entries(chunk)
+        return
+
+    state = dict(state or {})
+    header = True
+    for chunk in chunks:
+        cleaned, rejected = rules.apply(chunk, state)
+        if rejected_path is not None and (header or len(rejected)):
+            _append_csv(rejected, rejected_path, header)
+            header = False
+        yield cleaned
+
+def impute_converted(chunks, rules=None, rejected_path=None, state=None):
+    """
+    Fills the currency columns the cleaning rules impute, once each chunk is converted to USD.
+
+    Args:
+        chunks (iterable): Stream of converted DataFrames.
+        rules (CleaningRules, optional): The rules the chunks were cleaned with.
+        rejected_path (str, optional): The rejected rows sidecar of clean_chunks,
+            receiving the converted rows that could not be filled.
+        state (dict, optional): Initial cleaning state, see fit_rules. Without it,
+            medians are imputed per chunk.
+
+    Yields:
+        pd.DataFrame: The filled chunks.
+    """
+    if rules is None or not rules.converted_columns():
+        yield from chunks
+        return
+
+    state = dict(state or {})
+    for chunk in chunks:
+        filled, rejected = rules.apply_converted(chunk, state)
+        if rejected_path is not None and len(rejected):
+            # clean_chunks has written the header
+            _append_csv(rejected, rejected_path, False)
+        yield filled
+
+def _append_csv(df, path, header):
+    """Writes df to a CSV sidecar, creating it (with the header) on the first call."""
+    df.to_csv(path, mode='w' if header else 'a', index=False, header=header, encoding='utf-8')
+
+def _quarantine_chunk(chunk, error):
+    """Sends every row of a chunk to the quarantine."""
+    return chunk.iloc[0:0], chunk.assign(error=error, failed_columns='')
+
+def _convert_chunk(chunk):
+    """
+    Converts one chunk, quarantining it as a whole if the conversion raises.
+
+    Runs in worker processes, so it only uses its argument.
+
+    Returns:
+        tuple: (converted rows, quarantined rows) like convert_currency_columns.
+    """
+    try:
+        return convert_currency_columns(chunk)
+    except Exception as e:
+        return _quarantine_chunk(chunk, f"Conversion failed: {e}")
+
+def _convert_in_workers(chunks, workers):
+    """
+    Converts chunks in worker processes, yielding the results in input order.
+
+    At most 2 * workers chunks are in flight. A chunk whose worker dies is
+    quarantined and the pool is restarted for the remaining chunks.
+    """
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = collections.deque()
+    chunks = iter(chunks)
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < 2 * workers:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    pending.append((chunk, executor.submit(_convert_chunk, chunk)))
+            if not pending:
+                return
+
+            chunk, future = pending.popleft()
+            try:
+                result = future.result()
+            except Exception as e:
+                result = _quarantine_chunk(chunk, f"Conversion worker failed: {e!r}")
+                if isinstance(e, BrokenProcessPool):
+                    executor.shutdown(cancel_futures=True)
+                    executor = ProcessPoolExecutor(max_workers=workers)
+                    pending = collections.deque((waiting, executor.submit(_convert_chunk, waiting))
+                                                for waiting, _ in pending)
+            yield result
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def convert_chunks(chunks, quarantine_path=None, workers=None):
+    """
+    Applies the currency conversion to each chunk of a stream.
+
+    Rows that cannot be fully converted are left out of the stream. A failure
+    in one chunk never affects the others.
+
+    Args:
+        chunks (iterable): Stream of cleaned DataFrames.
+        quarantine_path (str, optional): CSV sidecar receiving the quarantined
+            rows with their original values, created on the first failure.
+        workers (int, optional): Convert chunks in this many worker processes.
+
+    Yields:
+        pd.DataFrame: The converted chunks.
+    """
+    results = map(_convert_chunk, chunks) if (workers or 1) == 1 else _convert_in_workers(chunks, workers)
+    columns = None
+    for converted, quarantine in results:
+        if len(quarantine):
+            print(f"Quarantined {len(quarantine)} row(s) whose currency values could not be converted")
+            if quarantine_path is not None:
+                # A malformed chunk may lack columns, keep the layout of the first rows written
+                _append_csv(quarantine if columns is None else quarantine.reindex(columns=columns),
+                            quarantine_path, columns is None)
+                columns = list(quarantine.columns) if columns is None else columns
+        yield converted
+
+def write_chunks(chunks, output_path):
+    """
+    Appends each chunk of a stream to a CSV file, writing the header once.
+
+    Args:
+        chunks (iterable): Stream of DataFrames.
+        output_path (str): Path of the CSV file to create.
+
+    Returns:
+        int: Number of rows written.
+    """
+    rows_written = 0
+    header = True
+    with open(output_path, 'w', newline='', encoding='utf-8') as output_file:
+        for chunk in chunks:
+            chunk.to_csv(output_file, index=False, header=header)
+            header = False
+            rows_written += len(chunk)
+    return rows_written
+
+def load_processed(source, chunksize=DEFAULT_CHUNKSIZE, file_type=None, recorder=None, rules=None, workers=None):
+    """
+    Reads, cleans and converts a file chunk by chunk and returns the processed rows.
+
+    Only the cleaned and converted rows are kept, the raw file is never held in
+    memory as a whole.
+
+    Args:
+        source (str or file-like): Input xlsx, CSV or Parquet file.
+        chunksize (int): Maximum number of rows per chunk.
+        file_type (str, optional): 'xlsx', 'csv' or 'parquet'.
+        recorder (StageRecorder, optional): Records the read, clean and convert stage metrics.
+        rules (CleaningRules, optional): Cleaning rules, every incomplete row is dropped without.
+        workers (int, optional): Convert chunks in this many worker processes.
+
+    Returns:
+        pd.DataFrame: The processed DataFrame.
+    """
+    state = fit_rules(source, rules, chunksize, file_type)
+    chunks = timed(recorder, 'read', iter_chunks(source, chunksize, file_type))
+    chunks = timed(recorder, 'clean', clean_chunks(chunks, rules, state=state))
+    chunks = timed(recorder, 'convert', convert_chunks(chunks, workers=workers))
+    chunks = list(impute_converted(chunks, rules, state=state))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks)
+
+def stream_pipeline(source, output_path, chunksize=DEFAULT_CHUNKSIZE, file_type=None, recorder=None, rules=None,
+                    rejected_path=None, quarantine_path=None, workers=None):
+    """
+    Runs read -> clean -> convert -> write over a file without loading it all in memory.
+
+    Args:
+        source (str or file-like): Input xlsx, CSV or Parquet file.
+        output_path (str): Path of the processed CSV file.
+        chunksize (int): Maximum number of rows per chunk.
+        file_type (str, optional): 'xlsx', 'csv' or 'parquet'.
+        recorder (StageRecorder, optional): Records the metrics of every stage.
+        rules (CleaningRules, optional): Cleaning rules, every incomplete row is dropped without.
+        rejected_path (str, optional): CSV sidecar for the rows rejected by the rules.
+        quarantine_path (str, optional): CSV sidecar for the rows that could not be converted.
+        workers (int, optional): Convert chunks in this many worker processes.
+
+    Returns:
+        int: Number of rows written.
+    """
+    state = fit_rules(source, rules, chunksize, file_type)
+    chunks = timed(recorder, 'read', iter_chunks_with_ids(source, chunksize, file_type))
+    chunks = timed(recorder, 'clean', clean_chunks(chunks, rules, rejected_path, state))
+    chunks = timed(recorder, 'convert', convert_chunks(chunks, quarantine_path, workers))
+    chunks = impute_converted(chunks, rules, rejected_path, state)
+    with timed_stage(recorder, 'write') as stage:
+        stage['rows_out'] = write_chunks(chunks, output_path)
+    return stage['rows_out']
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from utils.ingest import DEFAULT_CHUNKSIZE
+from utils.writers import frame_chunks
+
+# Columns identifying an applicant across extracts
+DEFAULT_KEY_COLUMNS = ['Age', 'Gender', 'Education_Level', 'Marital_Status', 'Income', 'Credit_Score']
+
+# How rows of the same applicant with different values are resolved
+CONFLICT_POLICIES = ['first', 'last', 'coalesce', 'error']
+
+# Never compared: IDs are positions within each extract
+IGNORED_COLUMNS = ['ID']
+
+def align_schemas(frames):
+    """
+    Reindexes DataFrames to the union of their columns, in order of first appearance.
+
+    Returns:
+        list: The aligned DataFrames, missing columns filled with NaN.
+    """
+    columns = list(dict.fromkeys(column for df in frames for column in df.columns))
+    return [df.reindex(columns=columns) for df in frames]
+
+def applicant_groups(df, key_columns):
+    """
+    Numbers the applicants of a DataFrame from a vectorized hash of the key columns.
+
+    Rows missing a key value are never considered the same applicant as another row.
+
+    Returns:
+        np.ndarray: Group number per row, equal for rows with the same keys.
+    """
+    hashes = pd.util.hash_pandas_object(df[key_columns], index=False).to_numpy()
+    groups = pd.factorize(hashes)[0]
+    incomplete = df[key_columns].isna().any(axis=1).to_numpy()
+    groups[incomplete] = groups.max(initial=-1) + 1 + np.arange(incomplete.sum())
+    return groups
+
+def merge_sources(frames, names=None, key_columns=None, policy='first', source_column=None):
+    """
+    Unions processed sources and keeps one row per applicant.
+
+    Every source is aligned to the union of the columns, then rows are grouped
+    by a hash of the key columns, so the cost grows linearly with the rows and
+    no pair of rows is ever compared directly. Rows of one applicant that are
+    identical (IDs aside) are plain duplicates; rows with different values are
+    conflicts, resolved by the policy:
+
+    - 'first': keep the row of the earliest source
+    - 'last': keep the row of the latest source
+    - 'coalesce': per column, the first non-missing value across the rows
+    - 'error': raise if there is any conflict
+
+    Args:
+        frames (list): Processed DataFrames, in source order.
+        names (list, optional): Name of each source, e.g. the file name.
+        key_columns (list, optional): Columns identifying an applicant. Defaults to DEFAULT_KEY_COLUMNS.
+        policy (str): One of CONFLICT_POLICIES.
+        source_column (str, optional): Add the name of the source each row was kept from.
+
+    Returns:
+        tuple: (merged DataFrame in order of first appearance, report) where report
+        has 'rows_in', 'rows_out', 'duplicates' and 'conflicts' (applicants with
+        differing rows).
+
+    Raises:
+        ValueError: If the policy is unknown, a key column is missing from every
+            source, or the policy is 'error' and rows conflict.
+    """
+    if policy not in CONFLICT_POLICIES:
+        raise ValueError(f"Unknown conflict policy: {policy} (expected one of {', '.join(CONFLICT_POLICIES)})")
+    frames = list(frames)
+    key_columns = list(key_columns or DEFAULT_KEY_COLUMNS)
+    if not frames:
+        return pd.DataFrame(), {'rows_in': 0, 'rows_out': 0, 'duplicates': 0, 'conflicts': 0}
+
+    combined = pd.concat(align_schemas(frames), ignore_index=True)
+    missing = [column for column in key_columns if column not in combined.columns]
+    if missing:
+        raise ValueError(f"Key columns missing from every source: {', '.join(missing)}")
+    if source_column is not None:
+        names = list(names) if names is not None else [str(i) for i in range(len(frames))]
+        combined[source_column] = np.repeat(names, [len(df) for df in frames])
+
+    groups = applicant_groups(combined, key_columns)
+    compared = [column for column in combined.columns
+                if column not in key_columns and column not in IGNORED_COLUMNS and column != source_column]
+    contents = pd.util.hash_pandas_object(combined[compared], index=False).to_numpy()
+    versions = pd.DataFrame({'group': groups, 'content': contents}).drop_duplicates()
+    version_counts = versions['group'].value_counts()
+    conflicts = int((version_counts > 1).sum())
+    if policy == 'error' and conflicts:
+        raise ValueError(f"{conflicts} applicant(s) have conflicting rows")
+
+    if policy == 'coalesce':
+        merged = combined.groupby(groups, sort=False).first()
+    else:
+        merged = combined[~pd.Series(groups).duplicated(keep='last' if policy == 'last' else 'first').to_numpy()]
+        if policy == 'last':
+            # Keep the order in which applicants first appeared
+            first_seen = pd.Series(np.arange(len(groups))).groupby(groups).min()
+            merged = merged.iloc[np.argsort(first_seen.loc[groups[merged.index]].to_numpy(), kind='stable')]
+    merged = merged.reset_index(drop=True)
+
+    report = {
+        'rows_in': len(combined),
+        'rows_out': len(merged),
+        'duplicates': len(combined) - len(versions),
+        'conflicts': conflicts,
+    }
+    return merged, report
+
+def deduplicating(writer, policy='first', key_columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Wraps an output writer so the rows it receives are merged per applicant first.
+
+    The stream is collected in memory, since the rows of one applicant can be
+    anywhere in it.
+
+    Returns:
+        callable: writer(chunks, output_path) returning the number of rows written.
+    """
+    def write(chunks, output_path):
+        chunks = list(chunks)
+        if not chunks:
+            return writer(iter(chunks), output_path)
+        merged, report = merge_sources([pd.concat(chunks, ignore_index=True)], key_columns=key_columns,
+                                       policy=policy)
+        print(f"Removed {report['rows_in'] - report['rows_out']} duplicate row(s), "
+              f"{report['conflicts']} conflicting applicant(s) resolved by '{policy}'")
+        return writer(frame_chunks(merged, chunksize), output_path)
+    return write
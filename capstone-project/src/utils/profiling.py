@@ -0,0 +1,318 @@
+import cProfile
+import collections
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is then not reported
+    resource = None
+
+# Optional per-stage profilers, selected with LOAN_PROFILE or --profile
+PROFILE_MODES = ['cprofile', 'tracemalloc']
+
+# Prefix of the Prometheus metric names
+METRIC_PREFIX = 'loan_stage'
+
+# Measured fields of a stage record, every other field is a label
+RECORD_FIELDS = ['seconds', 'rows_in', 'rows_out', 'rows_per_second', 'peak_rss_bytes',
+                 'traced_peak_bytes', 'timestamp']
+
+# Columns of StageRecorder.summary() besides the stage and labels
+SUMMARY_FIELDS = ['seconds', 'rows_in', 'rows_out', 'rows_per_second', 'peak_rss_bytes']
+
+def get_metrics_path(path=None):
+    """Returns where stage metrics are exported (LOAN_METRICS_PATH), or None."""
+    return path or os.getenv('LOAN_METRICS_PATH') or None
+
+def get_profile_mode(mode=None):
+    """
+    Returns the per-stage profiler to run (LOAN_PROFILE), or None.
+
+    Raises:
+        ValueError: If the mode is not one of PROFILE_MODES.
+    """
+    mode = mode or os.getenv('LOAN_PROFILE') or None
+    if mode is not None and mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {mode} (expected one of {', '.join(PROFILE_MODES)})")
+    return mode
+
+def peak_rss_bytes():
+    """Returns the peak resident set size of the process so far, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return int(peak if sys.platform == 'darwin' else peak * 1024)
+
+class StageRecorder:
+    """
+    Records wall time, rows in/out, rows/sec and peak RSS of pipeline stages.
+
+    Stages are timed either as a block (stage()) or as a stream of chunks
+    (iter()). When stages are nested, like chained chunk generators, the time
+    spent in an inner stage is only counted for that stage, and the rows it
+    yields become the rows_in of the stage consuming them.
+
+    Peak RSS is the process high-water mark when the stage ends. With the
+    'tracemalloc' profile mode, the peak traced Python allocation during the
+    stage (including nested stages) is recorded too. With 'cprofile', the
+    profile of each stage is written to profile_dir/<stage>.prof.
+    """
+
+    def __init__(self, labels=None, profile=None, profile_dir=None, max_records=None):
+        """
+        Args:
+            labels (dict, optional): Extra fields added to every record, e.g. the source file.
+            profile (str, optional): 'cprofile' or 'tracemalloc'.
+            profile_dir (str, optional): Where cProfile stats are written. Defaults to 'profiles'.
+            max_records (int, optional): Keep only the most recent records.
+        """
+        self.labels = dict(labels or {})
+        self.profile = get_profile_mode(profile)
+        self.profile_dir = profile_dir or 'profiles'
+        self.records = collections.deque(maxlen=max_records)
+        self._stack = []
+        self._profilers = {}
+
+    def _start(self, name):
+        """Opens a timing frame, pausing the profiler of the enclosing stage."""
+        parent = self._stack[-1] if self._stack else None
+        if parent is not None and parent['profiler'] is not None:
+            parent['profiler'].disable()
+        frame = {'child_seconds': 0.0, 'child_rows': 0, 'has_child': False, 'profiler': None, 'traced_peak': 0}
+        if self.profile == 'cprofile':
+            frame['profiler'] = self._profilers.setdefault(name, cProfile.Profile())
+            frame['profiler'].enable()
+        elif self.profile == 'tracemalloc':
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if parent is not None:
+                parent['traced_peak'] = max(parent['traced_peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+        frame['start'] = time.perf_counter()
+        return frame
+
+    def _finish(self, frame, rows):
+        """Closes a timing frame and returns its time excluding nested stages."""
+        elapsed = time.perf_counter() - frame['start']
+        if frame['profiler'] is not None:
+            frame['profiler'].disable()
+        if self.profile == 'tracemalloc':
+            frame['traced_peak'] = max(frame['traced_peak'], tracemalloc.get_traced_memory()[1])
+        self._stack.pop()
+
+        parent = self._stack[-1] if self._stack else None
+        if parent is not None:
+            parent['child_seconds'] += elapsed
+            parent['child_rows'] += rows or 0
+            parent['has_child'] = True
+            parent['traced_peak'] = max(parent['traced_peak'], frame['traced_peak'])
+            if parent['profiler'] is not None:
+                parent['profiler'].enable()
+        return elapsed - frame['child_seconds']
+
+    def _record(self, name, seconds, rows_in, rows_out, traced_peak=None):
+        """Stores the metrics of a finished stage."""
+        rows = rows_in if rows_in is not None else rows_out
+        record = dict(self.labels, stage=name, seconds=seconds, rows_in=rows_in, rows_out=rows_out,
+                      rows_per_second=rows / seconds if rows is not None and seconds > 0 else None,
+                      peak_rss_bytes=peak_rss_bytes(), timestamp=time.time())
+        if self.profile == 'tracemalloc':
+            record['traced_peak_bytes'] = traced_peak
+        elif self.profile == 'cprofile':
+            os.makedirs(self.profile_dir, exist_ok=True)
+            self._profilers[name].dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+        self.records.append(record)
+        return record
+
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Times a block of code as one stage.
+
+        Set 'rows_out' on the yielded dict to record the rows the stage produced.
+
+        Args:
+            name (str): Stage name, e.g. 'aggregate'.
+            rows_in (int, optional): Rows the stage received.
+        """
+        result = {'rows_out': None}
+        frame = self._start(name)
+        try:
+            yield result
+        finally:
+            seconds = self._finish(frame, result['rows_out'])
+            if rows_in is None and frame['has_child']:
+                rows_in = frame['child_rows']
+            self._record(name, seconds, rows_in, result['rows_out'], frame['traced_peak'])
+
+    def iter(self, name, chunks):
+        """
+        Times a stream of DataFrame chunks as one stage.
+
+        Only the time spent producing each chunk is counted, not the time the
+        consumer spends on it. The stage is recorded once the stream is exhausted.
+
+        Args:
+            name (str): Stage name, e.g. 'convert'.
+            chunks (iterable): Stream of DataFrames produced by the stage.
+
+        Yields:
+            pd.DataFrame: The chunks, unchanged.
+        """
+        chunks = iter(chunks)
+        seconds, rows_in, rows_out, has_input, traced_peak = 0.0, 0, 0, False, 0
+        while True:
+            frame = self._start(name)
+            chunk = None
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                seconds += self._finish(frame, len(chunk) if chunk is not None else None)
+                rows_in += frame['child_rows']
+                has_input = has_input or frame['has_child']
+                traced_peak = max(traced_peak, frame['traced_peak'])
+            rows_out += len(chunk)
+            yield chunk
+        self._record(name, seconds, rows_in if has_input else None, rows_out, traced_peak)
+
+    def extend(self, records):
+        """Adds records collected elsewhere, e.g. by a worker process."""
+        self.records.extend(records)
+
+    def summary(self):
+        """
+        Aggregates the records by stage and labels (e.g. the source file).
+
+        Returns:
+            pd.DataFrame: One row per stage and label values with the total
+            seconds and rows, the overall rows/sec and the highest peaks.
+        """
+        if not self.records:
+            return pd.DataFrame(columns=['stage'] + SUMMARY_FIELDS)
+        records = pd.DataFrame(list(self.records))
+        keys = ['stage'] + [column for column in records.columns
+                            if column not in RECORD_FIELDS and column != 'stage']
+        aggregations = {
+            'seconds': ('seconds', 'sum'),
+            'rows_in': ('rows_in', lambda rows: rows.sum(min_count=1)),
+            'rows_out': ('rows_out', lambda rows: rows.sum(min_count=1)),
+            'peak_rss_bytes': ('peak_rss_bytes', 'max'),
+        }
+        if 'traced_peak_bytes' in records.columns:
+            aggregations['traced_peak_bytes'] = ('traced_peak_bytes', 'max')
+        summary = records.groupby(keys, sort=False, dropna=False).agg(**aggregations).reset_index()
+        rows = summary['rows_in'].fillna(summary['rows_out'])
+        summary.insert(summary.columns.get_loc('peak_rss_bytes'), 'rows_per_second',
+                       (rows / summary['seconds']).where(summary['seconds'] > 0))
+        return summary
+
+    def export(self, path):
+        """
+        Writes the records to path.
+
+        A '.prom' file gets the per-stage summary in the Prometheus text format
+        (replaced atomically, as textfile collectors expect). Any other path
+        gets one JSON line appended per record.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if path.endswith('.prom'):
+            write_prometheus(self.summary(), path)
+        else:
+            with open(path, 'a', encoding='utf-8') as metrics_file:
+                for record in self.records:
+                    metrics_file.write(json.dumps(record) + '\n')
+
+def timed(recorder, name, chunks):
+    """Returns recorder.iter(name, chunks), or the chunks unchanged when recorder is None."""
+    return chunks if recorder is None else recorder.iter(name, chunks)
+
+def timed_stage(recorder, name, rows_in=None):
+    """Returns recorder.stage(name, rows_in), or a no-op context when recorder is None."""
+    return contextlib.nullcontext({'rows_out': None}) if recorder is None else recorder.stage(name, rows_in)
+
+def _escape_label(value):
+    """Escapes a Prometheus label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def write_prometheus(summary, path):
+    """
+    Writes a stage summary in the Prometheus text exposition format.
+
+    Args:
+        summary (pd.DataFrame): Result of StageRecorder.summary().
+        path (str): Output '.prom' file.
+    """
+    metrics = [
+        ('seconds', 'Wall time spent in the stage'),
+        ('rows_in', 'Rows received by the stage'),
+        ('rows_out', 'Rows produced by the stage'),
+        ('rows_per_second', 'Stage throughput'),
+        ('peak_rss_bytes', 'Peak resident set size of the process at the end of the stage'),
+        ('traced_peak_bytes', 'Peak memory traced by tracemalloc during the stage'),
+    ]
+    metrics = [(metric, description) for metric, description in metrics if metric in summary.columns]
+    label_columns = [column for column in summary.columns if column not in RECORD_FIELDS]
+    lines = []
+    for metric, description in metrics:
+        lines.append(f"# HELP {METRIC_PREFIX}_{metric} {description}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_{metric} gauge")
+        for row in summary.to_dict('records'):
+            value = row.get(metric)
+            if value is None or pd.isna(value):
+                continue
+            labels = ','.join(f'{column}="{_escape_label(row[column])}"' for column in label_columns
+                              if not pd.isna(row[column]))
+            lines.append(f"{METRIC_PREFIX}_{metric}{{{labels}}} {float(value)!r}")
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as metrics_file:
+        metrics_file.write('\n'.join(lines) + '\n')
+    os.replace(f"{path}.tmp", path)
+
+def import_times(module, cwd=None):
+    """
+    Imports a module in a fresh interpreter with python -X importtime.
+
+    Args:
+        module (str): Module to import, e.g. 'main'.
+        cwd (str, optional): Directory the module is imported from.
+
+    Returns:
+        dict: Name -> cumulative import time in microseconds of every module the import loaded.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=cwd, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+def imported_modules(module, cwd=None):
+    """
+    Imports a module in a fresh interpreter and lists what it loaded.
+
+    Args:
+        module (str): Module to import, e.g. 'main'.
+        cwd (str, optional): Directory the module is imported from.
+
+    Returns:
+        set: Names in sys.modules after the import.
+    """
+    code = f"import sys, {module}; print(chr(10).join(sys.modules))"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=cwd, check=True)
+    return set(result.stdout.split())
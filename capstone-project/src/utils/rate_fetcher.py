@@ -0,0 +1,268 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from utils.rates import RateTable, get_rate_table, rate_key
+
+# Historical rates API queried when EXCHANGE_RATES_URL is set to 'default'
+DEFAULT_RATES_URL = 'https://api.frankfurter.app'
+
+# On-disk rate cache, can be overridden with EXCHANGE_RATES_CACHE
+DEFAULT_RATES_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                   '.cache', 'exchange_rates.sqlite')
+
+# Fetched rates are fresh for a day and kept for offline use for 30 days
+DEFAULT_TTL = 24 * 3600
+DEFAULT_KEEP = 30 * 24 * 3600
+
+# Table name of the on-disk cache
+CACHE_TABLE = 'rate_cache'
+
+# Date stored for the latest rates, which have no date of their own
+LATEST = 'latest'
+
+class HttpRateProvider:
+    """
+    Fetches rates to USD from a Frankfurter-style HTTP API
+    (GET <base_url>/<YYYY-MM-DD|latest>?from=EUR&to=USD).
+
+    fetch is blocking and may be called from several threads at once. A
+    requests.Session is not thread-safe, so every thread keeps a session of
+    its own and reuses its connection for the following lookups.
+    """
+
+    def __init__(self, base_url=DEFAULT_RATES_URL, timeout=10.0):
+        """
+        Args:
+            base_url (str): API root, e.g. a local stub server in tests.
+            timeout (float): Seconds before a request fails.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        """The calling thread's session, created on its first lookup."""
+        if not hasattr(self._local, 'session'):
+            import requests
+
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def url(self, currency, date):
+        """Returns the URL of one lookup."""
+        day = LATEST if date is None else date.strftime('%Y-%m-%d')
+        return f"{self.base_url}/{day}?from={currency}&to=USD"
+
+    def fetch(self, currency, date):
+        """Returns the rate of currency on date (None for the latest)."""
+        response = self.session.get(self.url(currency, date), timeout=self.timeout)
+        response.raise_for_status()
+        return float(response.json()['rates']['USD'])
+
+class FileRateProvider:
+    """Serves rates from a CSV or SQLite rate file, e.g. a fixture in tests."""
+
+    def __init__(self, path):
+        self.table = RateTable.load(path)
+
+    def fetch(self, currency, date):
+        """Returns the rate of currency on date (None for the latest)."""
+        return self.table.get_rate(currency, date)
+
+class RateCache:
+    """
+    SQLite cache of fetched rates keyed by (currency, date).
+
+    Entries younger than ttl are reused without asking the provider. Older
+    ones are only used when the provider cannot be reached, and are evicted
+    once they are older than keep.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, keep=DEFAULT_KEEP):
+        """
+        Args:
+            path (str, optional): Cache file, defaults to EXCHANGE_RATES_CACHE or .cache/exchange_rates.sqlite.
+            ttl (float): Seconds a fetched rate is fresh.
+            keep (float): Seconds a fetched rate is kept for offline use.
+        """
+        self.path = path or os.getenv('EXCHANGE_RATES_CACHE', DEFAULT_RATES_CACHE)
+        self.ttl = ttl
+        self.keep = max(keep, ttl)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {CACHE_TABLE} "
+                "(currency TEXT NOT NULL, date TEXT NOT NULL, rate REAL NOT NULL, fetched_at REAL NOT NULL, "
+                "PRIMARY KEY (currency, date))"
+            )
+
+    def _connect(self):
+        # Worker processes may write at the same time, wait for the lock instead of failing
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _day(date):
+        return LATEST if date is None else date.strftime('%Y-%m-%d')
+
+    def get_many(self, keys, max_age=None, now=None):
+        """
+        Returns the cached rates of keys.
+
+        Args:
+            keys (iterable): Normalised (currency, date) keys, see rate_key.
+            max_age (float, optional): Only return entries fetched at most this many seconds ago.
+            now (float, optional): Current time, defaults to time.time().
+
+        Returns:
+            dict: Rate per key found.
+        """
+        oldest = -float('inf') if max_age is None else (now or time.time()) - max_age
+        rates = {}
+        with closing(self._connect()) as conn:
+            for currency, date in keys:
+                row = conn.execute(f"SELECT rate FROM {CACHE_TABLE} WHERE currency = ? AND date = ? "
+                                   "AND fetched_at >= ?", (currency, self._day(date), oldest)).fetchone()
+                if row is not None:
+                    rates[(currency, date)] = row[0]
+        return rates
+
+    def put_many(self, rates, now=None):
+        """Stores fetched rates and evicts the entries older than keep."""
+        now = now or time.time()
+        rows = [(currency, self._day(date), rate, now) for (currency, date), rate in rates.items()]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(f"INSERT OR REPLACE INTO {CACHE_TABLE} VALUES (?, ?, ?, ?)", rows)
+            conn.execute(f"DELETE FROM {CACHE_TABLE} WHERE fetched_at < ?", (now - self.keep,))
+
+class RateFetcher:
+    """
+    Looks up exchange rates through a pluggable provider, one request per
+    distinct (currency, date) pair, in a pool of threads.
+
+    Fresh cached rates are reused. When the provider fails, expired cached
+    rates and then the fallback rate table are used instead, so conversion
+    keeps working offline.
+    """
+
+    def __init__(self, provider, cache=None, fallback=None, concurrency=8, currencies=None):
+        """
+        Args:
+            provider: Object with a thread-safe fetch(currency, date) method, e.g. HttpRateProvider.
+            cache (RateCache, optional): On-disk cache of fetched rates.
+            fallback (RateTable, optional): Rates used when a pair cannot be fetched.
+            concurrency (int): Number of threads making lookups.
+            currencies (list, optional): Currencies whose latest rates identify the
+                rates served, see fingerprint. Defaults to those of the fallback table.
+        """
+        self.provider = provider
+        self.cache = cache
+        self.fallback = fallback
+        self.concurrency = concurrency
+        if currencies is None:
+            currencies = list(fallback.latest_rates) if fallback is not None else []
+        self.currencies = sorted(set(currencies) - {'USD'})
+        # Number of provider lookups made, one per distinct pair not in the cache
+        self.lookups = 0
+
+    def get_rates(self, pairs, skip_missing=False):
+        """
+        Returns the rate of every distinct (currency, date) pair.
+
+        Args:
+            pairs (iterable): (currency, date) tuples, date may be None for the latest rate.
+            skip_missing (bool): Leave pairs that can neither be fetched nor found
+                offline out of the result instead of raising.
+
+        Returns:
+            dict: Rate per pair, keyed by rate_key.
+
+        Raises:
+            ValueError: If a pair can neither be fetched nor found offline, unless skip_missing is set.
+        """
+        keys = {rate_key(*pair) for pair in pairs}
+        rates = {key: 1.0 for key in keys if key[0] == 'USD'}
+        if self.cache is not None:
+            rates.update(self.cache.get_many(keys - set(rates), self.cache.ttl))
+        missing = list(keys - set(rates))
+
+        def fetch(key):
+            try:
+                return self.provider.fetch(*key)
+            except Exception as e:
+                return e
+
+        self.lookups += len(missing)
+        results = []
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(missing))) as executor:
+                results = list(executor.map(fetch, missing))
+        fetched = {key: float(rate) for key, rate in zip(missing, results) if not isinstance(rate, Exception)}
+        if fetched and self.cache is not None:
+            self.cache.put_many(fetched)
+        rates.update(fetched)
+
+        failed = [key for key in missing if key not in fetched]
+        if failed:
+            print(f"Could not fetch {len(failed)} exchange rate(s), using offline rates instead")
+            if self.cache is not None:
+                rates.update(self.cache.get_many(failed))
+            unknown = [key for key in failed if key not in rates]
+            if self.fallback is not None:
+                rates.update(self.fallback.get_rates(unknown, skip_missing))
+            for key in unknown:
+                if key not in rates and not skip_missing:
+                    raise ValueError(f"No exchange rate available for {key[0]} on {key[1] or LATEST}")
+        return rates
+
+    def fingerprint(self):
+        """
+        Returns a short hash identifying the rates this fetcher currently serves.
+
+        The hash covers the provider, the fallback table and the latest rate of
+        every currency, looked up like any other rate (so usually from the
+        cache). It only changes when a fetched rate does, not every time the
+        cached rates expire and are fetched again.
+
+        Returns:
+            str: Hex digest of the rate source.
+        """
+        rates = self.get_rates([(currency, None) for currency in self.currencies], skip_missing=True)
+        values = ','.join(f"{currency}={rates[rate_key(currency, None)]!r}" for currency in self.currencies
+                          if rate_key(currency, None) in rates)
+        provider = getattr(self.provider, 'base_url', None) or type(self.provider).__name__
+        fallback = self.fallback.fingerprint() if self.fallback is not None else ''
+        digest = hashlib.sha256(f"{provider}|{fallback}|{values}".encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def get_rate(self, currency, date=None):
+        """Returns the USD rate for a single currency."""
+        return self.get_rates([(currency, date)])[rate_key(currency, date)]
+
+_default_source = None
+
+def get_rate_source():
+    """
+    Returns the process-wide rates used by the currency conversion.
+
+    When EXCHANGE_RATES_URL is set ('default' for the public Frankfurter API),
+    rates are fetched from it and cached on disk, falling back to the rate
+    table offline. Otherwise the rate table is used directly.
+
+    Returns:
+        RateFetcher or RateTable: Object with get_rate and get_rates methods.
+    """
+    global _default_source
+    if _default_source is None:
+        url = os.getenv('EXCHANGE_RATES_URL')
+        if url:
+            provider = HttpRateProvider(DEFAULT_RATES_URL if url == 'default' else url)
+            ttl = float(os.getenv('EXCHANGE_RATES_TTL', DEFAULT_TTL))
+            _default_source = RateFetcher(provider, RateCache(ttl=ttl), fallback=get_rate_table())
+        else:
+            _default_source = get_rate_table()
+    return _default_source
@@ -0,0 +1,198 @@
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+import numpy as np
+import pandas as pd
+
+# Default rates file shipped with the project, can be overridden with EXCHANGE_RATES_PATH
+DEFAULT_RATES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'config', 'exchange_rates.csv')
+
+# Table name used when the rates are stored in SQLite
+RATES_TABLE = 'exchange_rates'
+
+def rate_key(currency, date=None):
+    """
+    Normalises a (currency, date) lookup: upper-case code and a day Timestamp,
+    or None for the latest rate.
+    """
+    if date is None or pd.isna(date):
+        return str(currency).upper(), None
+    return str(currency).upper(), pd.Timestamp(date).normalize()
+
+class RateTable:
+    """
+    Exchange rates to USD keyed by (currency, date).
+
+    A rate applies from its date onwards until the next rate for the same
+    currency. Dates earlier than the first known rate use that first rate.
+    """
+
+    def __init__(self, rates):
+        """
+        Args:
+            rates (pd.DataFrame): Rates with 'currency', 'date' and 'rate' columns.
+        """
+        rates = rates[['currency', 'date', 'rate']].copy()
+        rates['currency'] = rates['currency'].astype(str).str.upper()
+        rates['date'] = pd.to_datetime(rates['date'])
+        rates['rate'] = rates['rate'].astype(np.float64)
+        self.rates = rates.sort_values('date', kind='stable').reset_index(drop=True)
+
+        # USD is always available even if the source does not list it
+        if not (self.rates['currency'] == 'USD').any():
+            usd = pd.DataFrame({'currency': ['USD'], 'date': [pd.Timestamp('1970-01-01')], 'rate': [1.0]})
+            self.rates = pd.concat([usd, self.rates], ignore_index=True)
+
+        self.latest_rates = self.rates.groupby('currency')['rate'].last().to_dict()
+        self.earliest_rates = self.rates.groupby('currency')['rate'].first().to_dict()
+        self._cache = {}
+        self._fingerprint = None
+
+    @classmethod
+    def from_csv(cls, path):
+        """Loads a rate table from a CSV file with currency, date and rate columns."""
+        return cls(pd.read_csv(path))
+
+    @classmethod
+    def from_sqlite(cls, path):
+        """Loads a rate table from the exchange_rates table of a SQLite database."""
+        with closing(sqlite3.connect(path)) as conn:
+            rates = pd.read_sql_query(f"SELECT currency, date, rate FROM {RATES_TABLE}", conn)
+        return cls(rates)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a rate table from a CSV or SQLite file depending on its extension."""
+        if os.path.splitext(path)[1].lower() in ('.db', '.sqlite', '.sqlite3'):
+            return cls.from_sqlite(path)
+        return cls.from_csv(path)
+
+    def to_sqlite(self, path):
+        """
+        Saves the rates to a SQLite database keyed by (currency, date).
+
+        Args:
+            path (str): Path to the SQLite database file.
+        """
+        rows = zip(self.rates['currency'], self.rates['date'].dt.strftime('%Y-%m-%d'), self.rates['rate'])
+        with closing(sqlite3.connect(path)) as conn, conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {RATES_TABLE} "
+                "(currency TEXT NOT NULL, date TEXT NOT NULL, rate REAL NOT NULL, "
+                "PRIMARY KEY (currency, date))"
+            )
+            conn.executemany(f"INSERT OR REPLACE INTO {RATES_TABLE} VALUES (?, ?, ?)", rows)
+
+    def fingerprint(self):
+        """
+        Returns a short hash of the rates, so results converted with them can be
+        told apart from results converted with other rates.
+
+        Returns:
+            str: Hex digest identifying the table contents.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256(self.rates.to_csv(index=False).encode('utf-8'))
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    def get_rate(self, currency, date=None):
+        """
+        Returns the USD rate for a single currency, caching the result.
+
+        Args:
+            currency (str): The currency code (e.g., 'EUR', 'GBP').
+            date (optional): Date the rate should apply to. Uses the latest rate if omitted.
+
+        Returns:
+            float: The exchange rate to USD.
+
+        Raises:
+            ValueError: If the currency is not in the table.
+        """
+        key = (str(currency).upper(), None if date is None else pd.Timestamp(date))
+        if key not in self._cache:
+            rate = self.convert_many([1.0], [key[0]], None if date is None else [key[1]])[0]
+            if np.isnan(rate):
+                raise ValueError(f"Unsupported currency: {currency}")
+            self._cache[key] = float(rate)
+        return self._cache[key]
+
+    def get_rates(self, pairs, skip_missing=False):
+        """
+        Returns the rate of every distinct (currency, date) pair.
+
+        Args:
+            pairs (iterable): (currency, date) tuples, date may be None for the latest rate.
+            skip_missing (bool): Leave pairs whose currency is not in the table out
+                of the result instead of raising.
+
+        Returns:
+            dict: Rate per pair, keyed by rate_key.
+
+        Raises:
+            ValueError: If a currency is not in the table, unless skip_missing is set.
+        """
+        rates = {}
+        for key in {rate_key(*pair) for pair in pairs}:
+            try:
+                rates[key] = self.get_rate(*key)
+            except ValueError:
+                if not skip_missing:
+                    raise
+        return rates
+
+    def convert_many(self, amounts, currencies, dates=None):
+        """
+        Converts many amounts to USD with a single join against the rate table.
+
+        Args:
+            amounts (array-like): Amounts to convert.
+            currencies (array-like): Currency code for each amount.
+            dates (array-like, optional): Date for each amount. Uses the latest rates if omitted.
+
+        Returns:
+            np.ndarray: Amounts in USD, NaN where the currency is unknown.
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        currencies = pd.Series(np.asarray(currencies, dtype=object)).astype(str).str.upper()
+
+        if dates is None:
+            rates = currencies.map(self.latest_rates).to_numpy(dtype=np.float64)
+            return amounts * rates
+
+        lookups = pd.DataFrame({
+            'position': np.arange(len(currencies)),
+            'currency': currencies,
+            'date': pd.to_datetime(pd.Series(np.asarray(dates, dtype=object))),
+        })
+        # Missing dates fall back to the latest known rate
+        missing_date = lookups['date'].isna()
+        lookups.loc[missing_date, 'date'] = self.rates['date'].max()
+
+        joined = pd.merge_asof(
+            lookups.sort_values('date', kind='stable'),
+            self.rates,
+            on='date',
+            by='currency',
+            direction='backward',
+        ).sort_values('position')
+
+        rates = joined['rate'].fillna(joined['currency'].map(self.earliest_rates))
+        return amounts * rates.to_numpy(dtype=np.float64)
+
+_default_table = None
+
+def get_rate_table():
+    """
+    Returns the process-wide rate table, loading it on first use.
+
+    Returns:
+        RateTable: Rates loaded from EXCHANGE_RATES_PATH or the bundled CSV file.
+    """
+    global _default_table
+    if _default_table is None:
+        _default_table = RateTable.load(os.getenv('EXCHANGE_RATES_PATH', DEFAULT_RATES_PATH))
+    return _default_table
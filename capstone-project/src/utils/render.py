@@ -0,0 +1,75 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Above this many rows figures are drawn from server-side summaries instead of
+# sending every row to the browser, can be overridden with DASHBOARD_MAX_POINTS
+DEFAULT_ROW_THRESHOLD = 20000
+
+def get_row_threshold(threshold=None):
+    """Returns the row count above which figures switch to summaries."""
+    if threshold is not None:
+        return threshold
+    return int(os.getenv('DASHBOARD_MAX_POINTS', DEFAULT_ROW_THRESHOLD))
+
+def box_stats(df, by, column):
+    """
+    Computes the box plot statistics of a column for every group, like plotly does.
+
+    Quartiles use linear interpolation (plotly's default quartilemethod) and the
+    whiskers stop at the furthest values within 1.5 IQR of the box.
+
+    Args:
+        df (pd.DataFrame): Rows to summarise.
+        by (str): Grouping column, drawn on the x axis.
+        column (str): Numeric column, drawn on the y axis.
+
+    Returns:
+        pd.DataFrame: One row per group, in order of first appearance, with columns
+        [by, 'q1', 'median', 'q3', 'lowerfence', 'upperfence', 'mean', 'count'].
+    """
+    values = pd.DataFrame({by: df[by], column: pd.to_numeric(df[column], errors='coerce')}).dropna()
+    grouped = values.groupby(by, sort=False, observed=True)[column]
+    stats = pd.DataFrame({
+        'q1': grouped.quantile(0.25),
+        'median': grouped.median(),
+        'q3': grouped.quantile(0.75),
+        'mean': grouped.mean(),
+        'count': grouped.size(),
+    })
+
+    # Whiskers: furthest values inside [q1 - 1.5 IQR, q3 + 1.5 IQR]
+    iqr = stats['q3'] - stats['q1']
+    low = values[by].map(stats['q1'] - 1.5 * iqr).to_numpy(dtype=np.float64)
+    high = values[by].map(stats['q3'] + 1.5 * iqr).to_numpy(dtype=np.float64)
+    inside = values[column].where((values[column] >= low) & (values[column] <= high))
+    fences = inside.groupby(values[by], sort=False, observed=True).agg(['min', 'max'])
+    stats['lowerfence'] = fences['min']
+    stats['upperfence'] = fences['max']
+
+    stats.index.name = by
+    return stats.reset_index()[[by, 'q1', 'median', 'q3', 'lowerfence', 'upperfence', 'mean', 'count']]
+
+def box_outliers(df, by, column, stats, max_points, seed=0):
+    """
+    Returns the rows outside the whiskers, sampled down to at most max_points.
+
+    Args:
+        df (pd.DataFrame): Rows that were summarised.
+        by (str): Grouping column.
+        column (str): Numeric column.
+        stats (pd.DataFrame): Result of box_stats for the same rows.
+        max_points (int): Maximum number of outliers returned.
+        seed (int): Seed of the sample, so reruns draw the same points.
+
+    Returns:
+        pd.DataFrame: Columns [by, column] of the outlying rows.
+    """
+    values = pd.DataFrame({by: df[by], column: pd.to_numeric(df[column], errors='coerce')}).dropna()
+    fences = stats.set_index(by)
+    low = values[by].map(fences['lowerfence']).to_numpy(dtype=np.float64)
+    high = values[by].map(fences['upperfence']).to_numpy(dtype=np.float64)
+    outliers = values[(values[column] < low) | (values[column] > high)]
+    if len(outliers) > max_points:
+        outliers = outliers.sample(n=max_points, random_state=seed).sort_index()
+    return outliers
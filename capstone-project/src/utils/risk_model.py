@@ -0,0 +1,214 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Bump when the artifact layout changes, older artifacts are then rejected
+MODEL_FORMAT_VERSION = 1
+
+# Default location of the trained model artifact
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'models', 'risk_model.json')
+
+# Features used by the model
+NUMERIC_FEATURES = ['Age', 'Income', 'Credit_Score', 'Debt_to_Income_Ratio', 'Loan_Amount']
+CATEGORICAL_FEATURES = ['Education_Level', 'Loan_Purpose']
+TARGET = 'Risk Rating'
+
+def _softmax(logits):
+    """Row-wise softmax of a 2-D array."""
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+class RiskModel:
+    """
+    Multinomial logistic regression predicting the 0-2 risk rating.
+
+    Numeric features are standardised and categorical features one-hot encoded
+    with the categories seen during training. Inference only needs NumPy.
+    """
+
+    def __init__(self, classes, means, stds, categories, coef, intercept, metadata=None):
+        self.classes = np.asarray(classes, dtype=np.float64)
+        self.means = np.asarray(means, dtype=np.float64)
+        self.stds = np.asarray(stds, dtype=np.float64)
+        self.categories = {column: list(values) for column, values in categories.items()}
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.metadata = metadata or {}
+
+    def beats_formula(self):
+        """
+        Returns whether the holdout accuracy measured at training is above the
+        weighted formula's on the same split. Artifacts without both are rejected.
+        """
+        model_accuracy = self.metadata.get('holdout_accuracy')
+        formula_accuracy = self.metadata.get('formula_holdout_accuracy')
+        return model_accuracy is not None and formula_accuracy is not None and model_accuracy > formula_accuracy
+
+    def feature_names(self):
+        """Returns the names of the encoded feature columns."""
+        names = list(NUMERIC_FEATURES)
+        for column in CATEGORICAL_FEATURES:
+            names.extend(f"{column}={value}" for value in self.categories[column])
+        return names
+
+    def encode(self, numeric, categorical):
+        """
+        Builds the design matrix from raw feature values.
+
+        Args:
+            numeric (dict): Arrays for each of NUMERIC_FEATURES.
+            categorical (dict): Arrays for each of CATEGORICAL_FEATURES.
+
+        Returns:
+            np.ndarray: Encoded features, one row per applicant.
+        """
+        values = np.column_stack([np.asarray(numeric[column], dtype=np.float64) for column in NUMERIC_FEATURES])
+        # Missing numbers are imputed with the training mean (0 once standardised)
+        scaled = np.nan_to_num((values - self.means) / self.stds, nan=0.0)
+
+        blocks = [scaled]
+        for column in CATEGORICAL_FEATURES:
+            codes = pd.Categorical(np.asarray(categorical[column], dtype=object),
+                                   categories=self.categories[column]).codes
+            one_hot = np.zeros((len(codes), len(self.categories[column])))
+            known = codes >= 0
+            one_hot[np.flatnonzero(known), codes[known]] = 1.0
+            blocks.append(one_hot)
+        return np.hstack(blocks)
+
+    def encode_frame(self, df):
+        """Builds the design matrix from a loan DataFrame."""
+        numeric = {column: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                   for column in NUMERIC_FEATURES}
+        categorical = {column: df[column].to_numpy(dtype=object) for column in CATEGORICAL_FEATURES}
+        return self.encode(numeric, categorical)
+
+    def predict_proba(self, df):
+        """
+        Returns the probability of each risk rating for every row.
+
+        Args:
+            df (pd.DataFrame): Loan data with the model's feature columns.
+
+        Returns:
+            np.ndarray: Array of shape (rows, classes).
+        """
+        return _softmax(self.encode_frame(df) @ self.coef + self.intercept)
+
+    def predict(self, df):
+        """
+        Predicts the risk rating of every row.
+
+        Args:
+            df (pd.DataFrame): Loan data with the model's feature columns.
+
+        Returns:
+            pd.Series: Predicted ratings aligned with df.
+        """
+        probabilities = self.predict_proba(df)
+        return pd.Series(self.classes[probabilities.argmax(axis=1)], index=df.index, name='Predicted Risk Rating')
+
+    def predict_one(self, age, income, credit_score, dti_ratio, education_level, loan_purpose, loan_amount):
+        """Predicts the risk rating of a single applicant."""
+        df = pd.DataFrame({
+            'Age': [age], 'Income': [income], 'Credit_Score': [credit_score],
+            'Debt_to_Income_Ratio': [dti_ratio], 'Loan_Amount': [loan_amount],
+            'Education_Level': [education_level], 'Loan_Purpose': [loan_purpose],
+        })
+        return int(self.predict(df).iloc[0])
+
+    def to_dict(self):
+        """Returns the model as a JSON-serialisable dict."""
+        return {
+            'format_version': MODEL_FORMAT_VERSION,
+            'classes': self.classes.tolist(),
+            'numeric_features': NUMERIC_FEATURES,
+            'categorical_features': CATEGORICAL_FEATURES,
+            'means': self.means.tolist(),
+            'stds': self.stds.tolist(),
+            'categories': self.categories,
+            'coef': self.coef.tolist(),
+            'intercept': self.intercept.tolist(),
+            'metadata': self.metadata,
+        }
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        """Writes the model artifact as JSON."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as model_file:
+            json.dump(self.to_dict(), model_file, indent=1)
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        """
+        Loads a model artifact written by save().
+
+        Raises:
+            ValueError: If the artifact was written by an incompatible version.
+        """
+        with open(path, encoding='utf-8') as model_file:
+            data = json.load(model_file)
+        if data.get('format_version') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported risk model format: {data.get('format_version')}")
+        if data['numeric_features'] != NUMERIC_FEATURES or data['categorical_features'] != CATEGORICAL_FEATURES:
+            raise ValueError("Risk model was trained on different features")
+        return cls(data['classes'], data['means'], data['stds'], data['categories'],
+                   data['coef'], data['intercept'], data.get('metadata'))
+
+def fit_risk_model(df, l2=1.0, iterations=2000, learning_rate=0.5, metadata=None):
+    """
+    Fits a multinomial logistic regression on processed loan data.
+
+    Args:
+        df (pd.DataFrame): Processed loan data including the 'Risk Rating' column.
+        l2 (float): L2 regularisation strength.
+        iterations (int): Number of full-batch gradient descent steps.
+        learning_rate (float): Gradient descent step size.
+        metadata (dict, optional): Extra information stored in the artifact.
+
+    Returns:
+        RiskModel: The fitted model.
+    """
+    df = df.dropna(subset=[TARGET])
+    numeric = df[NUMERIC_FEATURES].apply(pd.to_numeric, errors='coerce')
+    means = numeric.mean().to_numpy(dtype=np.float64)
+    stds = numeric.std(ddof=0).replace(0, 1).fillna(1).to_numpy(dtype=np.float64)
+    categories = {column: sorted(df[column].dropna().astype(str).unique()) for column in CATEGORICAL_FEATURES}
+    classes = np.sort(df[TARGET].unique())
+
+    model = RiskModel(classes, means, stds, categories,
+                      np.zeros((len(NUMERIC_FEATURES) + sum(map(len, categories.values())), len(classes))),
+                      np.zeros(len(classes)))
+    features = model.encode_frame(df)
+    targets = (df[TARGET].to_numpy()[:, None] == classes[None, :]).astype(np.float64)
+
+    # Full-batch gradient descent on the regularised cross-entropy
+    rows = len(features)
+    for _ in range(iterations):
+        error = _softmax(features @ model.coef + model.intercept) - targets
+        model.coef -= learning_rate * (features.T @ error / rows + l2 * model.coef / rows)
+        model.intercept -= learning_rate * error.mean(axis=0)
+
+    accuracy = float((model.predict(df).to_numpy() == df[TARGET].to_numpy()).mean())
+    model.metadata = dict(metadata or {}, training_rows=rows, training_accuracy=round(accuracy, 4))
+    return model
+
+_loaded_models = {}
+
+def load_risk_model(path=DEFAULT_MODEL_PATH):
+    """
+    Returns the model artifact at path, or None if it has not been trained yet.
+
+    Models are loaded once per process and reloaded if the artifact changes.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _loaded_models.get(path)
+    if cached is None or cached[0] != mtime:
+        _loaded_models[path] = (mtime, RiskModel.load(path))
+    return _loaded_models[path][1]
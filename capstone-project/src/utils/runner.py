@@ -0,0 +1,256 @@
+import glob
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from utils.cache import cached_files
+from utils.ingest import (DEFAULT_CHUNKSIZE, clean_chunks, convert_chunks, fit_rules, impute_converted,
+                          iter_chunks_with_ids, write_chunks)
+from utils.profiling import StageRecorder, timed, timed_stage
+from utils.rate_fetcher import get_rate_source
+from utils.schema import PROCESSED_SCHEMA
+
+# File types picked up from the input directory
+INPUT_PATTERNS = ['*.xlsx', '*.csv', '*.parquet']
+
+def discover_input_files(input_dir, patterns=INPUT_PATTERNS):
+    """
+    Lists the loan files of an input directory in a stable (sorted) order.
+
+    Args:
+        input_dir (str): Directory to scan.
+        patterns (list): Glob patterns of the files to include.
+
+    Returns:
+        list: Sorted file paths. Excel lock files (~$name.xlsx) are skipped.
+    """
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(os.path.join(glob.escape(input_dir), pattern)))
+    return sorted(path for path in paths if not os.path.basename(path).startswith('~$'))
+
+# Name of the file of a cached part folder holding the row counts
+PART_COUNTS_FILE = 'counts.json'
+
+def process_file(source, part_path, chunksize=DEFAULT_CHUNKSIZE, metrics=False, profile=None, profile_dir=None,
+                 rules=None, convert_workers=None, cache_dir=None):
+    """
+    Runs read -> clean -> convert on one file and writes the rows to a part file.
+
+    Rows get local IDs starting at 1; the runner shifts them when merging.
+    Runs in a worker process, so it only uses its arguments.
+
+    Args:
+        source (str): Input file path.
+        part_path (str): CSV file to write the processed rows to.
+        chunksize (int): Maximum number of rows per chunk.
+        metrics (bool): Record the metrics of every stage, returned under 'metrics'.
+        profile (str, optional): Per-stage profiler, see StageRecorder.
+        profile_dir (str, optional): Where cProfile stats are written.
+        rules (CleaningRules, optional): Cleaning rules. The rejected rows are
+            written next to the part file, see rejected_part_path.
+        convert_workers (int, optional): Convert chunks in this many processes of their own.
+            Rows that cannot be converted are written to quarantine_part_path.
+        cache_dir (str, optional): Reuse the part file and sidecars cached in this
+            directory while the file, the exchange rates and the rules are unchanged,
+            see cached_part. Not used when profiling.
+
+    Returns:
+        dict: 'source', 'part_path', 'rows_read' and 'rows_written'.
+    """
+    recorder = None
+    if metrics or profile:
+        recorder = StageRecorder(labels={'source': os.path.basename(source)}, profile=profile,
+                                 profile_dir=profile_dir)
+
+    if cache_dir is not None and not profile:
+        with timed_stage(recorder, 'cache') as stage:
+            rows_read, rows_written = cached_part(source, part_path, chunksize, recorder, rules, convert_workers,
+                                                  cache_dir)
+            stage['rows_out'] = rows_written
+    else:
+        rows_read, rows_written = _process_part(source, part_path, chunksize, recorder, rules, convert_workers)
+    result = {'source': source, 'part_path': part_path, 'rows_read': rows_read, 'rows_written': rows_written}
+    if recorder is not None:
+        result['metrics'] = list(recorder.records)
+    return result
+
+def _process_part(source, part_path, chunksize, recorder, rules, convert_workers):
+    """Runs the stages of process_file, returning the number of rows read and written."""
+    rows_read = 0
+
+    def counted(chunks):
+        nonlocal rows_read
+        for chunk in chunks:
+            rows_read += len(chunk)
+            yield chunk
+
+    state = fit_rules(source, rules, chunksize)
+    chunks = timed(recorder, 'read', counted(iter_chunks_with_ids(source, chunksize)))
+    rejected_path = rejected_part_path(part_path) if rules is not None else None
+    chunks = timed(recorder, 'clean', clean_chunks(chunks, rules, rejected_path, state))
+    chunks = timed(recorder, 'convert', convert_chunks(chunks, quarantine_part_path(part_path), convert_workers))
+    chunks = impute_converted(chunks, rules, rejected_path, state)
+    with timed_stage(recorder, 'write') as stage:
+        rows_written = stage['rows_out'] = write_chunks(chunks, part_path)
+    return rows_read, rows_written
+
+def cached_part(source, part_path, chunksize, recorder, rules, convert_workers, cache_dir):
+    """
+    Copies the part file and sidecars of a source from the cache, processing it first on a miss.
+
+    Entries are keyed by the file contents, the exchange rates and the cleaning
+    rules, so changing any of them processes the file again. The stages are
+    only recorded on a miss.
+
+    Returns:
+        tuple: Number of rows read and written.
+    """
+    def build(folder):
+        counts = _process_part(source, os.path.join(folder, 'part.csv'), chunksize, recorder, rules,
+                               convert_workers)
+        with open(os.path.join(folder, PART_COUNTS_FILE), 'w', encoding='utf-8') as counts_file:
+            json.dump(counts, counts_file)
+
+    key = get_rate_source().fingerprint() + (f"-{rules.fingerprint()}" if rules is not None else '')
+    folder = cached_files(source, 'part', build, cache_dir, key=key)
+    cached_path = os.path.join(folder, 'part.csv')
+    for path_of in (lambda path: path, rejected_part_path, quarantine_part_path):
+        if os.path.exists(path_of(cached_path)):
+            shutil.copyfile(path_of(cached_path), path_of(part_path))
+    with open(os.path.join(folder, PART_COUNTS_FILE), encoding='utf-8') as counts_file:
+        rows_read, rows_written = json.load(counts_file)
+    return rows_read, rows_written
+
+def rejected_part_path(part_path):
+    """Returns the sidecar file holding the rows rejected while writing part_path."""
+    return f"{os.path.splitext(part_path)[0]}.rejected.csv"
+
+def quarantine_part_path(part_path):
+    """Returns the sidecar file holding the rows that could not be converted while writing part_path."""
+    return f"{os.path.splitext(part_path)[0]}.quarantine.csv"
+
+def read_part(path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Reads a part file in chunks with the types of the pipeline output.
+
+    Every chunk gets the same types whatever its values, e.g. a chunk with a
+    missing Age still writes whole numbers. Integer columns are read as
+    nullable integers and only stay nullable where values are missing.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows.
+    """
+    dtypes = {column: dtype.capitalize() if dtype.startswith('int') else dtype
+              for column, dtype in PROCESSED_SCHEMA.items()}
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=dtypes, float_precision='round_trip'):
+        for column, dtype in PROCESSED_SCHEMA.items():
+            if column in chunk.columns and dtype.startswith('int') and not chunk[column].hasnans:
+                chunk[column] = chunk[column].astype(dtype)
+        yield chunk
+
+def merge_parts(results, output_path, chunksize=DEFAULT_CHUNKSIZE, sidecar=None, writer=write_chunks):
+    """
+    Concatenates the part files into one output, making IDs unique across files.
+
+    The IDs of each file are offset by the number of rows read from the files
+    before it, so they do not depend on which worker finished first.
+
+    Args:
+        results (list): process_file results in input file order.
+        output_path (str): Path of the merged output.
+        chunksize (int): Maximum number of rows per chunk.
+        sidecar (callable, optional): Merge the sidecar at sidecar(part_path) of every
+            file instead of the part files, e.g. rejected_part_path.
+        writer (callable): Writes the merged chunks, see utils.writers. Defaults to CSV.
+
+    Returns:
+        int: Number of rows written.
+    """
+    def shifted_chunks():
+        offset = 0
+        for result in results:
+            path = sidecar(result['part_path']) if sidecar is not None else result['part_path']
+            if os.path.exists(path) and os.path.getsize(path):
+                # Sidecars hold raw rows, whose columns may still be text
+                chunks = (pd.read_csv(path, chunksize=chunksize, float_precision='round_trip') if sidecar is not None
+                          else read_part(path, chunksize))
+                for chunk in chunks:
+                    chunk['ID'] += offset
+                    yield chunk
+            offset += result['rows_read']
+
+    return writer(shifted_chunks(), output_path)
+
+def run_pipeline(input_dir, output_path, workers=None, chunksize=DEFAULT_CHUNKSIZE, keep_parts=False, recorder=None,
+                 rules=None, rejected_path=None, quarantine_path=None, convert_workers=None, writer=write_chunks,
+                 cache_dir=None):
+    """
+    Processes every file of an input directory in parallel and merges the results.
+
+    Args:
+        input_dir (str): Directory containing the loan files.
+        output_path (str): Path of the merged output.
+        workers (int, optional): Number of worker processes. Defaults to the CPU count,
+            1 processes the files in the current process.
+        chunksize (int): Maximum number of rows per chunk.
+        keep_parts (bool): Keep the per-file outputs in a parts-* folder next to the merged file.
+        recorder (StageRecorder, optional): Collects the stage metrics of every file
+            (labelled with its name) and of the merge.
+        rules (CleaningRules, optional): Cleaning rules, every incomplete row is dropped without.
+        rejected_path (str, optional): CSV file receiving the rows rejected by the rules.
+        quarantine_path (str, optional): CSV file receiving the rows that could not be
+            converted, only written when there are some.
+        convert_workers (int, optional): Processes converting the chunks of each file.
+        writer (callable): Writes the merged output, e.g. get_writer('parquet'). Defaults to CSV.
+        cache_dir (str, optional): Reuse the per-file outputs of unchanged files from this
+            cache directory, see process_file.
+
+    Returns:
+        list: process_file results in input file order.
+    """
+    sources = discover_input_files(input_dir)
+    if not sources:
+        raise FileNotFoundError(f"No input files found in {input_dir}")
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    parts_dir = tempfile.mkdtemp(prefix='parts-', dir=output_dir)
+    part_paths = [os.path.join(parts_dir, f"{i:04d}-{os.path.splitext(os.path.basename(source))[0]}.csv")
+                  for i, source in enumerate(sources)]
+    workers = min(workers or os.cpu_count() or 1, len(sources))
+
+    # Workers record their own metrics, each cProfile in its own folder
+    options = [{'rules': rules, 'convert_workers': convert_workers, 'cache_dir': cache_dir} for _ in sources]
+    if recorder is not None:
+        for source, option in zip(sources, options):
+            option.update(metrics=True, profile=recorder.profile,
+                          profile_dir=os.path.join(recorder.profile_dir, os.path.splitext(os.path.basename(source))[0]))
+
+    try:
+        if workers == 1:
+            results = [process_file(source, part_path, chunksize, **option)
+                       for source, part_path, option in zip(sources, part_paths, options)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(process_file, source, part_path, chunksize, **option)
+                           for source, part_path, option in zip(sources, part_paths, options)]
+                results = [future.result() for future in futures]
+
+        if recorder is not None:
+            for result in results:
+                recorder.extend(result.pop('metrics'))
+        with timed_stage(recorder, 'merge') as stage:
+            stage['rows_out'] = merge_parts(results, output_path, chunksize, writer=writer)
+        if rules is not None and rejected_path is not None:
+            merge_parts(results, rejected_path, chunksize, sidecar=rejected_part_path)
+        if quarantine_path is not None and any(os.path.exists(quarantine_part_path(result['part_path']))
+                                               for result in results):
+            merge_parts(results, quarantine_path, chunksize, sidecar=quarantine_part_path)
+    finally:
+        # Also when a file fails, so no parts-* folder is left next to the output
+        if not keep_parts:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+    return results
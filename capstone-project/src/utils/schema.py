@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+# Compact in-memory types of the processed loan columns. Integer columns fall
+# back to the nullable pandas type when they have missing values. Currency
+# amounts and ratios stay float64: float32 cannot hold cents above about
+# 100,000 and keeps only 7 digits of a ratio.
+LOAN_SCHEMA = {
+    'ID': 'int32',
+    'Age': 'int16',
+    'Gender': 'category',
+    'Education_Level': 'category',
+    'Marital_Status': 'category',
+    'Income': 'float64',
+    'Credit_Score': 'int16',
+    'Loan_Purpose': 'category',
+    'Debt_to_Income_Ratio': 'float64',
+    'Risk Rating': 'int8',
+    'Loan_Amount': 'float64',
+}
+
+# Types the pipeline writes the numeric columns with, restored by expand_frame
+PROCESSED_SCHEMA = {
+    'ID': 'int64',
+    'Age': 'int64',
+    'Income': 'float64',
+    'Credit_Score': 'float64',
+    'Debt_to_Income_Ratio': 'float64',
+    'Risk Rating': 'float64',
+    'Loan_Amount': 'float64',
+}
+
+def _cast_integer(series, dtype):
+    """Casts to an integer type if every value is a whole number in range, else returns None."""
+    values = pd.to_numeric(series, errors='coerce')
+    if values.isna().sum() != series.isna().sum():
+        # Some cells are not numbers (e.g. unconverted currency strings)
+        return None
+    present = values.dropna()
+    limits = np.iinfo(dtype)
+    if len(present) and (present.min() < limits.min or present.max() > limits.max
+                         or not (present == np.floor(present)).all()):
+        return None
+    if values.isna().any():
+        return values.astype(dtype.capitalize())
+    return values.astype(dtype)
+
+def _cast_float(series, dtype):
+    """Casts to a float type if every present value is numeric, else returns None."""
+    values = pd.to_numeric(series, errors='coerce')
+    if values.isna().sum() != series.isna().sum():
+        return None
+    return values.astype(dtype)
+
+def compact_frame(df, schema=LOAN_SCHEMA):
+    """
+    Casts a processed loan DataFrame to compact types.
+
+    Text columns become categoricals and numeric columns the smallest type of
+    the schema that holds every value. Columns that cannot be cast without
+    losing values (e.g. amounts that failed currency conversion and are still
+    strings) keep their type. Columns missing from the schema are unchanged.
+
+    Args:
+        df (pd.DataFrame): Processed loan data.
+        schema (dict): Target dtype per column.
+
+    Returns:
+        tuple: (compact DataFrame, report) where report has one row per column
+        with 'column', 'from_dtype', 'to_dtype', 'bytes_before' and 'bytes_after'.
+    """
+    compact = {}
+    report = []
+    for column in df.columns:
+        series = df[column]
+        dtype = schema.get(column)
+        cast = None
+        if dtype == 'category':
+            cast = series.astype('category')
+        elif dtype is not None and dtype.startswith('int'):
+            cast = _cast_integer(series, dtype)
+        elif dtype is not None:
+            cast = _cast_float(series, dtype)
+        compact[column] = series if cast is None else cast
+        report.append({
+            'column': column,
+            'from_dtype': str(series.dtype),
+            'to_dtype': str(compact[column].dtype),
+            'bytes_before': int(series.memory_usage(index=False, deep=True)),
+            'bytes_after': int(compact[column].memory_usage(index=False, deep=True)),
+        })
+    return pd.DataFrame(compact, index=df.index), pd.DataFrame(report)
+
+def expand_frame(df, schema=PROCESSED_SCHEMA):
+    """
+    Casts a compact frame back to the types of the pipeline output.
+
+    Exports of a compact frame then format every value like the pipeline
+    does, e.g. a credit score of 720 is written as 720.0. Categoricals become
+    object columns and integer columns with missing values float64, as
+    pandas reads them.
+
+    Args:
+        df (pd.DataFrame): Result of compact_frame.
+        schema (dict): Output dtype per numeric column.
+
+    Returns:
+        pd.DataFrame: The same values with the pipeline's types.
+    """
+    expanded = {}
+    for column in df.columns:
+        series = df[column]
+        dtype = schema.get(column)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        elif dtype is not None and pd.api.types.is_numeric_dtype(series.dtype):
+            series = series.astype('float64' if dtype.startswith('int') and series.isna().any() else dtype)
+        expanded[column] = series
+    return pd.DataFrame(expanded, index=df.index)
+
+def memory_saved(report):
+    """
+    Summarises a compact_frame report.
+
+    Returns:
+        tuple: (bytes before, bytes after, reduction factor).
+    """
+    before = int(report['bytes_before'].sum())
+    after = int(report['bytes_after'].sum())
+    return before, after, before / after if after else float('inf')
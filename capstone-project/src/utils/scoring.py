@@ -0,0 +1,211 @@
+import numpy as np
+
+# Weights of each factor in the risk score, based on correlation analysis
+RISK_WEIGHTS = {
+    'Credit_Score': 0.3,    # Higher credit score = lower risk
+    'DTI': 0.25,           # Higher DTI = higher risk
+    'Income': 0.2,         # Higher income = lower risk
+    'Loan_Amount': 0.15,   # Higher loan amount = higher risk
+    'Age': 0.1             # Age has less impact
+}
+
+# Ranges used to normalise each factor to 0-1
+RISK_NORMALISATION = {
+    'credit_score_min': 300,
+    'credit_score_max': 850,
+    'income_cap': 200000,
+    'loan_amount_cap': 150000,
+    'age_cap': 100,
+}
+
+DEFAULT_PARAMS = {
+    'weights': RISK_WEIGHTS,
+    'normalisation': RISK_NORMALISATION,
+}
+
+# Columns score_batch reads from a loan DataFrame
+SCORE_COLUMNS = ['Age', 'Income', 'Credit_Score', 'Debt_to_Income_Ratio', 'Loan_Amount']
+
+def risk_rating(age, income, credit_score, dti_ratio, loan_amount, params=None):
+    """
+    Calculates the 0-2 risk rating of a single applicant.
+
+    Args:
+        age (float): Applicant age.
+        income (float): Annual income in USD.
+        credit_score (float): Credit score (300-850).
+        dti_ratio (float): Debt to income ratio (0-1).
+        loan_amount (float): Loan amount in USD.
+        params (dict, optional): Model parameters with 'weights' and 'normalisation'.
+
+    Returns:
+        int: 0 (low), 1 (medium) or 2 (high risk).
+
+    Raises:
+        ValueError: If the debt to income ratio is not between 0 and 1.
+    """
+    params = params or DEFAULT_PARAMS
+    weights = params['weights']
+    norm = params['normalisation']
+
+    # Validate DTI ratio is between 0 and 1
+    if not (0 <= dti_ratio <= 1):
+        raise ValueError("Debt to Income ratio must be between 0 and 1")
+
+    # Normalize and score each factor
+    credit_score_norm = (credit_score - norm['credit_score_min']) / (norm['credit_score_max'] - norm['credit_score_min'])
+    dti_score = dti_ratio                                    # DTI already in 0-1 range
+    income_norm = min(income / norm['income_cap'], 1)        # Cap income at 200k
+    loan_amount_norm = min(loan_amount / norm['loan_amount_cap'], 1)  # Cap loan at 150k
+    age_norm = min(age / norm['age_cap'], 1)                 # Cap age at 100
+
+    # Calculate risk score (0 = lowest risk, 1 = highest risk)
+    risk_score = (
+        weights['Credit_Score'] * (1 - credit_score_norm) +  # Invert credit score
+        weights['DTI'] * dti_score +
+        weights['Income'] * (1 - income_norm) +              # Invert income
+        weights['Loan_Amount'] * loan_amount_norm +
+        weights['Age'] * (1 - age_norm)                      # Invert age
+    )
+
+    # Convert to 0-2 scale matching the training data
+    final_risk_rating = round(risk_score * 2)
+
+    return min(max(final_risk_rating, 0), 2)  # Ensure output is 0, 1, or 2
+
+def rate_applicant(age, income, credit_score, dti_ratio, education_level, loan_purpose, loan_amount, params):
+    """
+    Calculates the risk rating of a single applicant like the risk calculator.
+
+    Uses the trained model when params hold one, the weighted formula otherwise.
+
+    Args:
+        params (dict): Model parameters with 'weights', 'normalisation' and 'model',
+            see TrainingStore.params.
+
+    Returns:
+        int: 0 (low), 1 (medium) or 2 (high risk).
+
+    Raises:
+        ValueError: If the debt to income ratio is not between 0 and 1.
+    """
+    if params.get('model') is None:
+        return risk_rating(age, income, credit_score, dti_ratio, loan_amount, params)
+
+    # Validate DTI ratio is between 0 and 1
+    if not (0 <= dti_ratio <= 1):
+        raise ValueError("Debt to Income ratio must be between 0 and 1")
+    return params['model'].predict_one(age, income, credit_score, dti_ratio,
+                                       education_level, loan_purpose, loan_amount)
+
+def score_arrays(age, income, credit_score, dti_ratio, loan_amount, params=None):
+    """
+    Calculates risk ratings for whole arrays of applicants at once.
+
+    Applies the same formula as risk_rating with NumPy operations. Rows with a
+    missing value or a debt to income ratio outside 0-1 get NaN.
+
+    Args:
+        age, income, credit_score, dti_ratio, loan_amount (array-like): Applicant values.
+        params (dict, optional): Model parameters with 'weights' and 'normalisation'.
+
+    Returns:
+        np.ndarray: Float array of ratings 0, 1, 2 or NaN.
+    """
+    params = params or DEFAULT_PARAMS
+    weights = params['weights']
+    norm = params['normalisation']
+
+    age = np.asarray(age, dtype=np.float64)
+    income = np.asarray(income, dtype=np.float64)
+    credit_score = np.asarray(credit_score, dtype=np.float64)
+    dti_ratio = np.asarray(dti_ratio, dtype=np.float64)
+    loan_amount = np.asarray(loan_amount, dtype=np.float64)
+
+    credit_score_norm = (credit_score - norm['credit_score_min']) / (norm['credit_score_max'] - norm['credit_score_min'])
+    income_norm = np.minimum(income / norm['income_cap'], 1)
+    loan_amount_norm = np.minimum(loan_amount / norm['loan_amount_cap'], 1)
+    age_norm = np.minimum(age / norm['age_cap'], 1)
+
+    risk_score = (
+        weights['Credit_Score'] * (1 - credit_score_norm) +
+        weights['DTI'] * dti_ratio +
+        weights['Income'] * (1 - income_norm) +
+        weights['Loan_Amount'] * loan_amount_norm +
+        weights['Age'] * (1 - age_norm)
+    )
+
+    # np.rint rounds halves to even like Python's round()
+    ratings = np.clip(np.rint(risk_score * 2), 0, 2)
+    valid = (dti_ratio >= 0) & (dti_ratio <= 1)
+    return np.where(valid, ratings, np.nan)
+
+def score_batch(df, params=None):
+    """
+    Calculates the risk rating of every row of a loan DataFrame.
+
+    Args:
+        df (pd.DataFrame): Processed loan data with the SCORE_COLUMNS in USD.
+        params (dict, optional): Model parameters with 'weights' and 'normalisation'.
+
+    Returns:
+        pd.Series: Ratings 0, 1 or 2 (NaN for incomplete rows), aligned with df.
+    """
+    # Imported here so the single-applicant scoring only needs NumPy
+    import pandas as pd
+
+    columns = [pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+               for column in SCORE_COLUMNS]
+    return pd.Series(score_arrays(*columns, params=params), index=df.index, name='Predicted Risk Rating')
+
+def sweep_grid(base, grid, params=None, model=None):
+    """
+    Scores every combination of a parameter grid in one vectorized call.
+
+    Each grid factor becomes one axis of the result; the other factors keep
+    their base value. For example grid={'Credit_Score': ..., 'Debt_to_Income_Ratio': ...}
+    gives ratings[i, j] for the i-th credit score and the j-th DTI ratio.
+
+    Args:
+        base (dict): Value of every SCORE_COLUMNS factor, plus 'Education_Level'
+            and 'Loan_Purpose' when a model is used.
+        grid (dict): Factor -> 1-D array of values, in axis order.
+        params (dict, optional): Model parameters with 'weights' and 'normalisation'.
+        model (RiskModel, optional): Trained model used instead of the formula.
+
+    Returns:
+        np.ndarray: Ratings 0, 1, 2 (NaN where the DTI ratio is outside 0-1), one axis per grid factor.
+
+    Raises:
+        ValueError: If a grid factor is not one of SCORE_COLUMNS or a fixed factor has no value.
+    """
+    unknown = [column for column in grid if column not in SCORE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown sweep factors: {', '.join(unknown)} (expected {', '.join(SCORE_COLUMNS)})")
+    missing = [column for column in SCORE_COLUMNS if column not in grid and column not in base]
+    if missing:
+        raise ValueError(f"Missing values for: {', '.join(missing)}")
+
+    # Shape every swept factor along its own axis so NumPy broadcasts the full grid
+    shape = tuple(len(values) for values in grid.values())
+    factors = []
+    for column in SCORE_COLUMNS:
+        if column in grid:
+            axis_shape = [1] * len(shape)
+            axis_shape[list(grid).index(column)] = -1
+            factors.append(np.asarray(grid[column], dtype=np.float64).reshape(axis_shape))
+        else:
+            factors.append(np.float64(base[column]))
+
+    if model is None:
+        return np.broadcast_to(score_arrays(*factors, params=params), shape).copy()
+
+    import pandas as pd
+
+    frame = pd.DataFrame({column: np.broadcast_to(values, shape).ravel()
+                          for column, values in zip(SCORE_COLUMNS, factors)})
+    frame['Education_Level'] = base['Education_Level']
+    frame['Loan_Purpose'] = base['Loan_Purpose']
+    dti_ratio = frame['Debt_to_Income_Ratio'].to_numpy()
+    ratings = model.predict(frame).to_numpy(dtype=np.float64)
+    return np.where((dti_ratio >= 0) & (dti_ratio <= 1), ratings, np.nan).reshape(shape)
@@ -0,0 +1,248 @@
+import importlib.util
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from utils.cube import AGE_BINS, AGE_LABELS, MEASURES, LoanCube
+
+# Above this many rows the dashboard aggregates with SQL over Parquet instead of
+# holding the rows in pandas, can be overridden with LOAN_SQL_MIN_ROWS
+DEFAULT_SQL_ROW_THRESHOLD = 1_000_000
+
+# DuckDB column types treated as numbers, like DataFrame.select_dtypes(include='number')
+NUMERIC_TYPES = ['TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'UTINYINT', 'USMALLINT', 'UINTEGER',
+                 'UBIGINT', 'FLOAT', 'DOUBLE']
+
+def get_sql_threshold(threshold=None):
+    """Returns the row count above which the dashboard switches to the SQL backend."""
+    if threshold is not None:
+        return threshold
+    return int(os.getenv('LOAN_SQL_MIN_ROWS', DEFAULT_SQL_ROW_THRESHOLD))
+
+def duckdb_available():
+    """Returns whether the optional duckdb package is installed."""
+    return importlib.util.find_spec('duckdb') is not None
+
+def use_sql_backend(rows, threshold=None):
+    """Returns whether data of this many rows is aggregated with SQL, which needs duckdb."""
+    return rows > get_sql_threshold(threshold) and duckdb_available()
+
+def parquet_rows(path):
+    """Row count of a Parquet file or partitioned dataset, read from the file footers."""
+    import pyarrow.dataset as ds
+
+    return ds.dataset(path, partitioning='hive').count_rows()
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _age_band_sql(column='Age'):
+    """SQL equivalent of cube.age_bands, NULL outside the bins."""
+    cases = ' '.join(f"WHEN {_quote(column)} > {low} AND {_quote(column)} <= {high} THEN {_literal(label)}"
+                     for low, high, label in zip(AGE_BINS, AGE_BINS[1:], AGE_LABELS))
+    return f"CASE {cases} END"
+
+def _number_sql(column):
+    return f"TRY_CAST({_quote(column)} AS DOUBLE)"
+
+class ParquetLoans:
+    """
+    Processed loan data queried in place with DuckDB.
+
+    Every query streams over the Parquet files and only its result is
+    returned, so datasets larger than memory can be analysed. Hive partition
+    folders, as written by the parquet output format, are read as columns.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Parquet file or folder of a partitioned dataset.
+        """
+        import duckdb
+        import pyarrow.dataset as ds
+
+        self.path = path
+        self._connection = duckdb.connect()
+        pattern = os.path.join(path, '**', '*.parquet') if os.path.isdir(path) else path
+        self.source = f"read_parquet({_literal(pattern)}, hive_partitioning = true, union_by_name = true)"
+
+        schema = self.query(f"DESCRIBE SELECT * FROM {self.source}")
+        # Partition folders are read as the last columns, restore the order the data was written in
+        written = [column['name'] for column in
+                   (ds.dataset(path, partitioning='hive').schema.pandas_metadata or {}).get('columns', [])]
+        schema['position'] = [written.index(name) if name in written else len(written)
+                              for name in schema['column_name']]
+        schema = schema.sort_values('position', kind='stable')
+        self.columns = schema['column_name'].tolist()
+        self.numeric_columns = [name for name, column_type in zip(schema['column_name'], schema['column_type'])
+                                if column_type in NUMERIC_TYPES or column_type.startswith('DECIMAL')]
+        self.rows = int(self.query(f"SELECT COUNT(*) AS n FROM {self.source}")['n'].iloc[0])
+
+    def query(self, sql, params=None, tables=None):
+        """
+        Runs a query and returns its result.
+
+        Args:
+            sql (str): Query, reading the dataset from self.source.
+            params (list, optional): Values of the ? placeholders.
+            tables (dict, optional): Name -> DataFrame made available to the query.
+
+        Returns:
+            pd.DataFrame: Query result.
+        """
+        # A cursor per query, the dataset is shared by the sessions' threads
+        with self._connection.cursor() as cursor:
+            for name, df in (tables or {}).items():
+                cursor.register(name, df)
+            return cursor.execute(sql, params or []).df()
+
+    def where(self, filters):
+        """
+        WHERE clause of the dashboard filters, like BitmapIndex.select.
+
+        Args:
+            filters (dict): 'Age_Band', 'Education_Level' or 'Loan_Purpose' -> selected
+                values, empty or missing selections do not filter.
+
+        Returns:
+            tuple: (clause, parameters), the clause is empty when nothing is filtered.
+        """
+        clauses, params = [], []
+        for name, values in (filters or {}).items():
+            if not values:
+                continue
+            expression = _age_band_sql() if name == 'Age_Band' else _quote(name)
+            clauses.append(f"{expression} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ''), params
+
+    def head(self, rows):
+        """First rows of the dataset, for previews."""
+        return self.query(f"SELECT {', '.join(map(_quote, self.columns))} FROM {self.source} LIMIT {int(rows)}")
+
+    def _values(self, by, column, filters):
+        where, params = self.where(filters)
+        sql = (f"SELECT * FROM (SELECT {_quote(by)} AS g, {_number_sql(column)} AS y FROM {self.source} {where}) "
+               f"WHERE g IS NOT NULL AND y IS NOT NULL")
+        return sql, params
+
+    def box_stats(self, by, column, filters=None):
+        """
+        Box plot statistics of a column for every group of the filtered rows, like render.box_stats.
+
+        Returns:
+            pd.DataFrame: One row per group, sorted by group, with columns
+            [by, 'q1', 'median', 'q3', 'lowerfence', 'upperfence', 'mean', 'count'].
+        """
+        values, params = self._values(by, column, filters)
+        sql = f"""
+            WITH v AS ({values}),
+            s AS (SELECT g, quantile_cont(y, 0.25) AS q1, quantile_cont(y, 0.5) AS median,
+                         quantile_cont(y, 0.75) AS q3, avg(y) AS mean, COUNT(*) AS count
+                  FROM v GROUP BY g)
+            SELECT s.g AS {_quote(by)}, q1, median, q3,
+                   min(y) FILTER (WHERE y BETWEEN q1 - 1.5 * (q3 - q1) AND q3 + 1.5 * (q3 - q1)) AS lowerfence,
+                   max(y) FILTER (WHERE y BETWEEN q1 - 1.5 * (q3 - q1) AND q3 + 1.5 * (q3 - q1)) AS upperfence,
+                   mean, count
+            FROM s JOIN v ON v.g = s.g
+            GROUP BY s.g, q1, median, q3, mean, count
+            ORDER BY s.g
+        """
+        return self.query(sql, params)
+
+    def box_outliers(self, by, column, stats, max_points, filters=None, seed=0):
+        """
+        Returns the filtered rows outside the whiskers, sampled down to at most max_points.
+
+        Args:
+            stats (pd.DataFrame): Result of box_stats for the same column and filters.
+
+        Returns:
+            pd.DataFrame: Columns [by, column] of the outlying rows.
+        """
+        values, params = self._values(by, column, filters)
+        fences = stats[[by, 'lowerfence', 'upperfence']].set_axis(['g', 'lowerfence', 'upperfence'], axis=1)
+        sql = (f"SELECT g AS {_quote(by)}, y AS {_quote(column)} FROM "
+               f"(SELECT v.g, v.y FROM ({values}) v JOIN fences f ON v.g = f.g "
+               f"WHERE v.y < f.lowerfence OR v.y > f.upperfence) "
+               f"USING SAMPLE reservoir({int(max_points)} ROWS) REPEATABLE ({int(seed)})")
+        return self.query(sql, params, tables={'fences': fences})
+
+    def corr(self, columns, filters=None):
+        """
+        Pearson correlation matrix of the filtered rows like DataFrame.corr(), each
+        pair of columns using the rows where both are present.
+
+        Returns:
+            pd.DataFrame: Correlation matrix.
+        """
+        columns = list(columns)
+        where, params = self.where(filters)
+        pairs = list(itertools.combinations(range(len(columns)), 2))
+        aggregates = [f"corr({_number_sql(columns[j])}, {_number_sql(columns[i])}) AS \"{i}|{j}\"" for i, j in pairs]
+        aggregates += [f"stddev_samp({_number_sql(column)}) AS \"{i}\"" for i, column in enumerate(columns)]
+        result = self.query(f"SELECT {', '.join(aggregates)} FROM {self.source} {where}", params).iloc[0]
+
+        corr = np.full((len(columns), len(columns)), np.nan)
+        for i, j in pairs:
+            corr[i, j] = corr[j, i] = result[f"{i}|{j}"]
+        for i in range(len(columns)):
+            if result[str(i)] > 0:
+                corr[i, i] = 1.0
+        return pd.DataFrame(np.clip(corr, -1, 1), index=columns, columns=columns)
+
+class SqlLoanCube(LoanCube):
+    """
+    LoanCube whose cells are aggregated by DuckDB over a ParquetLoans dataset.
+
+    The cells hold the same counts and centred sums that LoanCube builds in
+    pandas, so every inherited query (means, grouped means and counts, mode,
+    correlations) gives the same numbers without loading the rows.
+    """
+
+    def __init__(self, dataset):
+        """
+        Args:
+            dataset (ParquetLoans): Processed loan data.
+        """
+        self.dataset = dataset
+        self.measures = [column for column in MEASURES if column in dataset.columns]
+        source = dataset.source
+
+        self.options = {}
+        for name, expression in [('Age_Band', _age_band_sql()), ('Education_Level', _quote('Education_Level')),
+                                 ('Loan_Purpose', _quote('Loan_Purpose'))]:
+            present = dataset.query(f"SELECT DISTINCT value FROM (SELECT {expression} AS value FROM {source}) "
+                                    f"WHERE value IS NOT NULL ORDER BY value")['value'].tolist()
+            self.options[name] = [label for label in AGE_LABELS if label in present] if name == 'Age_Band' else present
+
+        self.shift = dataset.query(
+            f"SELECT {', '.join(f'avg({_number_sql(column)}) AS {_quote(column)}' for column in self.measures)} "
+            f"FROM {source}").iloc[0].astype(np.float64)
+        # Values are taken around the dataset mean, like LoanCube
+        centred = {column: f"({_number_sql(column)} - {_literal(repr(float(self.shift[column])))}::DOUBLE)"
+                   for column in self.measures}
+        complete = ' AND '.join(f"{_number_sql(column)} IS NOT NULL" for column in self.measures) or 'true'
+
+        aggregates = ["CAST(COUNT(*) AS BIGINT) AS count",
+                      f"CAST(COUNT(*) FILTER (WHERE {complete}) AS BIGINT) AS n_complete"]
+        for column in self.measures:
+            aggregates += [f"CAST(COUNT({_number_sql(column)}) AS BIGINT) AS {_quote(f'n|{column}')}",
+                           f"COALESCE(fsum({centred[column]}), 0) AS {_quote(f'sum|{column}')}",
+                           f"COALESCE(fsum({centred[column]}) FILTER (WHERE {complete}), 0) "
+                           f"AS {_quote(f'csum|{column}')}"]
+        for first, second in itertools.combinations_with_replacement(self.measures, 2):
+            aggregates.append(f"COALESCE(fsum({centred[first]} * {centred[second]}) FILTER (WHERE {complete}), 0) "
+                              f"AS {_quote(f'xp|{first}|{second}')}")
+
+        self.cells = dataset.query(f"""
+            SELECT {_age_band_sql()} AS "Age_Band", "Education_Level", "Loan_Purpose",
+                   TRY_CAST("Risk Rating" AS DOUBLE) AS "Risk Rating", {', '.join(aggregates)}
+            FROM {source}
+            GROUP BY 1, 2, 3, 4
+        """)
+        self.rows = dataset.rows
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# Column order and categories of the Dataset1/Dataset2 workbooks
+COLUMNS = ['Age', 'Gender', 'Education_Level', 'Marital_Status', 'Income', 'Credit_Score',
+           'Loan_Purpose', 'Debt_to_Income_Ratio', 'Risk Rating', 'Loan_Amount']
+CATEGORIES = {
+    'Gender': ['Female', 'Non-Binary', 'Male', 'Other'],
+    'Education_Level': ['Associate', 'Bachelor', 'PhD', 'High School', 'Master'],
+    'Marital_Status': ['Not Married', 'Married'],
+    'Loan_Purpose': ['Debt Consolidation', 'Car', 'Medical', 'Home', 'Education', 'Personal', 'Business'],
+}
+
+# Columns left complete in the source workbooks, every other column gets missing values
+COMPLETE_COLUMNS = ['Age', 'Gender']
+
+# Euro amounts are suffixed with the mojibake of '€' found in the source workbooks
+EURO_SUFFIX = 'â‚¬'
+
+def generate_loans(rows, seed=0, nan_rate=0.05, euro_share=0.5, income_text_share=0.1):
+    """
+    Generates a synthetic loan table with the schema of the input workbooks.
+
+    Value ranges follow Dataset1: ages 18-79, incomes 20k-200k, credit scores
+    300-850, DTI ratios 0.1-0.9, ratings 0-2 and loan amounts up to 100k
+    written as '12345.67$' or '12345.67€' strings. Incomes are numbers, some
+    written as '12345.67€' strings.
+
+    Args:
+        rows (int): Number of rows.
+        seed (int): Random seed, the same seed always gives the same frame.
+        nan_rate (float): Share of missing values in each column except Age and Gender.
+        euro_share (float): Share of loan amounts written in euros.
+        income_text_share (float): Share of incomes written as euro strings.
+
+    Returns:
+        pd.DataFrame: Raw rows, like pd.read_excel of an input workbook.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Age': rng.integers(18, 80, rows),
+        'Gender': pd.Categorical.from_codes(rng.integers(0, 4, rows), CATEGORIES['Gender']).astype(object),
+        'Education_Level': pd.Categorical.from_codes(rng.integers(0, 5, rows),
+                                                     CATEGORIES['Education_Level']).astype(object),
+        'Marital_Status': pd.Categorical.from_codes(rng.integers(0, 2, rows),
+                                                    CATEGORIES['Marital_Status']).astype(object),
+        'Income': rng.uniform(20000, 200000, rows).round(5),
+        'Credit_Score': rng.integers(300, 851, rows).astype(np.float64),
+        'Loan_Purpose': pd.Categorical.from_codes(rng.integers(0, 7, rows),
+                                                  CATEGORIES['Loan_Purpose']).astype(object),
+        'Debt_to_Income_Ratio': rng.uniform(0.1, 0.9, rows),
+        'Risk Rating': rng.integers(0, 3, rows).astype(np.float64),
+    })
+
+    amounts = pd.Series(rng.uniform(1000, 100000, rows).round(2)).astype(str)
+    suffixes = np.where(rng.random(rows) < euro_share, EURO_SUFFIX, '$')
+    df['Loan_Amount'] = (amounts + suffixes).astype(object)
+
+    as_text = rng.random(rows) < income_text_share
+    if as_text.any():
+        incomes = df['Income'].astype(object)
+        incomes[as_text] = df['Income'][as_text].round(2).astype(str) + EURO_SUFFIX
+        df['Income'] = incomes
+
+    for column in COLUMNS:
+        if column not in COMPLETE_COLUMNS:
+            df[column] = df[column].mask(rng.random(rows) < nan_rate)
+    return df[COLUMNS]
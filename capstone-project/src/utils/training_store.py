@@ -0,0 +1,99 @@
+import os
+import threading
+import pandas as pd
+from config.settings import get_training_files
+from utils.cache import load_processed_workbook
+from utils.merge import merge_sources
+from utils.risk_model import DEFAULT_MODEL_PATH, RiskModel
+from utils.scoring import RISK_NORMALISATION, RISK_WEIGHTS
+
+def _file_signature(paths):
+    """Returns (path, size, mtime) for each file so changes can be detected cheaply."""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+class TrainingStore:
+    """
+    Process-wide store for the risk calculator's training data and model parameters.
+
+    The training workbooks are loaded once and shared by every caller. Each
+    access compares the files' size and modification time with the loaded
+    version and reloads only when one of them changed.
+    """
+
+    def __init__(self, paths=None, model_path=DEFAULT_MODEL_PATH):
+        """
+        Args:
+            paths (list, optional): Training workbooks. Defaults to the configured training files.
+            model_path (str, optional): Trained model artifact, used when it exists and
+                beats the weighted formula (see RiskModel.beats_formula).
+        """
+        self.paths = list(paths) if paths is not None else get_training_files()
+        self.model_path = model_path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._data = None
+        self._params = None
+
+    def _load(self):
+        """Loads the training data and model parameters."""
+        frames = [load_processed_workbook(path) for path in self.paths if os.path.exists(path)]
+        if len(frames) > 1:
+            # Applicants found in several workbooks are only trained on once
+            self._data = merge_sources(frames)[0]
+        else:
+            self._data = frames[0] if frames else pd.DataFrame()
+        self._params = {
+            'weights': dict(RISK_WEIGHTS),
+            'normalisation': dict(RISK_NORMALISATION),
+            'model': None,
+        }
+        if self.model_path and os.path.exists(self.model_path):
+            model = RiskModel.load(self.model_path)
+            # A model less accurate than the formula on its holdout rows is ignored
+            if model.beats_formula():
+                self._params['model'] = model
+
+    def refresh(self):
+        """Reloads the store if any training file or the model changed since the last load."""
+        signature = _file_signature(self.paths + ([self.model_path] if self.model_path else []))
+        if signature == self._signature:
+            return
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if signature != self._signature:
+                self._load()
+                self._signature = signature
+
+    def training_data(self):
+        """Returns the combined processed training data."""
+        self.refresh()
+        return self._data
+
+    def params(self):
+        """Returns the model parameters used by the risk calculator."""
+        self.refresh()
+        return self._params
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_training_store():
+    """
+    Returns the process-wide training store, creating it on first use.
+
+    Returns:
+        TrainingStore: The shared store for the configured training files.
+    """
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = TrainingStore()
+    return _default_store
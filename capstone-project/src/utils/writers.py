@@ -0,0 +1,159 @@
+import gzip
+import os
+import shutil
+import numpy as np
+from utils.ingest import DEFAULT_CHUNKSIZE, write_chunks
+from utils.schema import LOAN_SCHEMA, PROCESSED_SCHEMA
+
+# Columns the Parquet output is partitioned by
+DEFAULT_PARTITION_COLUMNS = ['Loan_Purpose', 'Risk Rating']
+
+# File extension of each output format, a partitioned Parquet dataset is a folder
+FORMAT_EXTENSIONS = {'csv': '.csv', 'csv.gz': '.csv.gz', 'parquet': '.parquet'}
+
+def frame_chunks(df, chunksize=DEFAULT_CHUNKSIZE):
+    """Yields consecutive slices of at most chunksize rows of a DataFrame."""
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+def write_compressed_csv(chunks, output_path, compression='gzip'):
+    """
+    Appends each chunk of a stream to a gzip-compressed CSV file, writing the header once.
+
+    Args:
+        chunks (iterable): Stream of DataFrames.
+        output_path (str): Path of the .csv.gz file to create.
+        compression (str): Only 'gzip' is supported.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if compression != 'gzip':
+        raise ValueError(f"Unsupported compression: {compression}")
+    rows_written = 0
+    header = True
+    with gzip.open(output_path, 'wt', newline='', encoding='utf-8') as output_file:
+        for chunk in chunks:
+            chunk.to_csv(output_file, index=False, header=header)
+            header = False
+            rows_written += len(chunk)
+    return rows_written
+
+def arrow_schema(df):
+    """
+    Parquet schema of processed loan rows, the same whatever values a chunk holds.
+
+    The numeric columns get their PROCESSED_SCHEMA type and the text columns
+    of LOAN_SCHEMA strings, so a column that is empty in one chunk is typed
+    like in the others. Other columns keep their inferred type, strings if
+    they are empty.
+
+    Args:
+        df (pd.DataFrame): Chunk of processed rows.
+
+    Returns:
+        pa.Schema: Schema with a field per column of df.
+    """
+    import pyarrow as pa
+
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    fields = []
+    for field in inferred:
+        if field.name in PROCESSED_SCHEMA:
+            field = field.with_type(pa.from_numpy_dtype(np.dtype(PROCESSED_SCHEMA[field.name])))
+        elif LOAN_SCHEMA.get(field.name) == 'category' or pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        fields.append(field)
+    return pa.schema(fields, metadata=inferred.metadata)
+
+def write_partitioned_parquet(chunks, output_path, partition_columns=None):
+    """
+    Writes a stream of chunks to a Hive-partitioned Parquet dataset.
+
+    Each chunk adds one file per partition it touches, e.g.
+    output_path/Loan_Purpose=Car/Risk Rating=1.0/part-00000-0.parquet. Every
+    chunk is written with the arrow_schema of the first one. An existing
+    dataset at output_path is replaced.
+
+    Args:
+        chunks (iterable): Stream of DataFrames.
+        output_path (str): Folder of the dataset.
+        partition_columns (list, optional): Defaults to DEFAULT_PARTITION_COLUMNS.
+
+    Returns:
+        int: Number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    partition_columns = list(partition_columns or DEFAULT_PARTITION_COLUMNS)
+    if os.path.isdir(output_path):
+        shutil.rmtree(output_path)
+    os.makedirs(output_path)
+
+    rows_written = 0
+    schema = None
+    for i, chunk in enumerate(chunks):
+        if not len(chunk):
+            continue
+        schema = schema or arrow_schema(chunk)
+        table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+        pq.write_to_dataset(table, output_path, partition_cols=partition_columns,
+                            basename_template=f"part-{i:05d}-{{i}}.parquet")
+        rows_written += len(chunk)
+    return rows_written
+
+def read_partitioned_parquet(path):
+    """
+    Reads a Parquet file or a dataset written by write_partitioned_parquet.
+
+    Partition columns are read with their plain types, so partitions of
+    missing values (__HIVE_DEFAULT_PARTITION__) come back as NaN.
+
+    Returns:
+        pd.DataFrame: Every row, in the column order the data was written in.
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, partitioning='hive')
+    df = dataset.to_table().to_pandas()
+    written = [column['name'] for column in (dataset.schema.pandas_metadata or {}).get('columns', [])]
+    return df[[column for column in written if column in df.columns] +
+              [column for column in df.columns if column not in written]]
+
+# Writer of each output format, see register_writer to add one
+WRITERS = {
+    'csv': write_chunks,
+    'csv.gz': write_compressed_csv,
+    'parquet': write_partitioned_parquet,
+}
+
+def register_writer(output_format, writer, extension=''):
+    """
+    Adds an output format.
+
+    Args:
+        output_format (str): Format name, e.g. 'feather'.
+        writer (callable): writer(chunks, output_path) returning the number of rows written.
+        extension (str): Extension of the files it writes.
+    """
+    WRITERS[output_format] = writer
+    FORMAT_EXTENSIONS[output_format] = extension
+
+def get_writer(output_format='csv'):
+    """
+    Returns the writer of an output format.
+
+    Raises:
+        ValueError: If the format has no writer.
+    """
+    if output_format not in WRITERS:
+        raise ValueError(f"Unknown output format: {output_format} (expected one of {', '.join(WRITERS)})")
+    return WRITERS[output_format]
+
+def output_stem(path):
+    """Returns path without its output format extension, e.g. for sidecar files."""
+    for extension in sorted(FORMAT_EXTENSIONS.values(), key=len, reverse=True):
+        if extension and path.endswith(extension):
+            return path[:-len(extension)]
+    return os.path.splitext(path)[0]